@@ -24,6 +24,9 @@ Usage (inside a postgresql container)::
     # Machine-readable JSON output (for piping to jq / diff)
     python3 dump_zk.py --format json
 
+    # Stream JSON lines as nodes are read (huge trees, shared ensembles)
+    python3 dump_zk.py --format jsonl --max-in-flight 256
+
     # Dump only the tree structure (paths, no values)
     python3 dump_zk.py --tree
 
@@ -44,9 +47,11 @@ import argparse
 import json
 import logging
 import sys
+import zlib
+from collections import deque
 from configparser import RawConfigParser, NoOptionError, NoSectionError
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Callable
 
 try:
     from kazoo.client import KazooClient
@@ -61,6 +66,8 @@ _LOG = logging.getLogger("dump_zk")
 # Default paths matching the pgconsul test container layout.
 DEFAULT_CONFIG = "/etc/pgconsul.conf"
 DEFAULT_PREFIX = "/pgconsul/postgresql/"
+# Nodes whose reads are pipelined at once; each costs a get and a get_children.
+DEFAULT_MAX_IN_FLIGHT = 64
 
 
 @dataclass
@@ -177,37 +184,100 @@ def build_kazoo_client(params: ZkConnectionParams) -> Any:
     return KazooClient(**args)
 
 
-def dump_tree(client: Any, root: str, include_values: bool = True) -> list[ZkNode]:
-    """Recursively walk the ZK tree from *root* and collect all nodes.
+def _decode_value(data: bytes) -> str:
+    """Decode a node value, including pgconsul's compact encoding (zk_compact_encoding).
 
-    Returns a flat list ordered by path (depth-first), which keeps parent
-    nodes before their children — convenient for reading and diffing.
+    Mirrors ``src.zk_client.decode_zk_value``: a NUL byte, a version byte
+    (1 = zlib-compressed UTF-8) and the payload. Kept standalone so the script
+    has no pgconsul imports.
     """
-    results: list[ZkNode] = []
+    if data[:2] == b"\x00\x01":
+        try:
+            data = zlib.decompress(data[2:])
+        except zlib.error:
+            _LOG.warning("Corrupted compact value, dumping raw bytes")
+    return data.decode("utf-8", errors="replace")
+
+
+def walk_tree(
+    client: Any,
+    root: str,
+    on_node: Callable[[ZkNode], None],
+    include_values: bool = True,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> int:
+    """Walk the ZK tree from *root* with pipelined async reads, calling *on_node* for each node.
+
+    Up to *max_in_flight* nodes are requested at once (a get and a
+    get_children each). ZK answers requests of a session in order, so the
+    oldest in-flight node is always the next one to wait for. Nodes are
+    reported in completion order, which is close to but not exactly
+    depth-first; use ``dump_tree`` for a sorted list. Returns the number of
+    nodes reported.
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be positive")
+
+    pending: list[str] = [root]
+    in_flight: deque[tuple[str, Any, Any]] = deque()
+    count = 0
 
-    def _walk(path: str) -> None:
+    while pending or in_flight:
+        while pending and len(in_flight) < max_in_flight:
+            path = pending.pop()
+            get_result = client.get_async(path) if include_values else None
+            in_flight.append((path, get_result, client.get_children_async(path)))
+
+        path, get_result, children_result = in_flight.popleft()
         try:
-            data, _stat = client.get(path)
+            children = children_result.get()
         except NoNodeError:
             _LOG.debug("No node at %s — skipping", path)
-            return
+            if get_result is not None:
+                _wait_quietly(get_result)
+            continue
 
         value: str | None = None
-        if include_values and data is not None:
-            value = data.decode("utf-8", errors="replace")
+        if get_result is not None:
+            try:
+                data, _stat = get_result.get()
+            except NoNodeError:
+                # Deleted between the two reads.
+                _LOG.debug("No node at %s — skipping", path)
+                continue
+            if data is not None:
+                value = _decode_value(data)
 
-        try:
-            children = client.get_children(path)
-        except NoNodeError:
-            children = []
+        children = sorted(children)
+        on_node(ZkNode(path=path, value=value, children=children))
+        count += 1
 
-        results.append(ZkNode(path=path, value=value, children=sorted(children)))
+        # Reversed, so the stack pops siblings in name order.
+        pending.extend(f"{path.rstrip('/')}/{child}" for child in reversed(children))
 
-        for child in sorted(children):
-            child_path = f"{path.rstrip('/')}/{child}"
-            _walk(child_path)
+    return count
+
+
+def _wait_quietly(result: Any) -> None:
+    try:
+        result.get()
+    except NoNodeError:
+        pass
 
-    _walk(root)
+
+def _path_key(node: ZkNode) -> list[str]:
+    return node.path.rstrip("/").split("/")
+
+
+def dump_tree(client: Any, root: str, include_values: bool = True, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> list[ZkNode]:
+    """Walk the ZK tree from *root* and collect all nodes.
+
+    Returns a flat list ordered by path (depth-first), which keeps parent
+    nodes before their children — convenient for reading and diffing.
+    """
+    results: list[ZkNode] = []
+    walk_tree(client, root, results.append, include_values=include_values, max_in_flight=max_in_flight)
+    results.sort(key=_path_key)
     return results
 
 
@@ -254,6 +324,11 @@ def format_json(nodes: list[ZkNode]) -> str:
     return json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True) + "\n"
 
 
+def format_json_line(node: ZkNode) -> str:
+    """Render one node as a JSON-lines record, the streaming form of ``format_json``."""
+    return json.dumps({"path": node.path, "value": node.value}, ensure_ascii=False, sort_keys=True) + "\n"
+
+
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Dump all ZooKeeper records under a path prefix. "
@@ -270,13 +345,18 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         help=f"ZK path prefix to dump (default: from config, e.g. {DEFAULT_PREFIX})",
     )
     parser.add_argument(
-        "--format", choices=["text", "json"], default="text",
-        help="Output format (default: text)",
+        "--format", choices=["text", "json", "jsonl"], default="text",
+        help="Output format (default: text). jsonl streams one node per line "
+        "as it is read, in completion order, without holding the dump in memory",
     )
     parser.add_argument(
         "--tree", action="store_true",
         help="Show only the tree structure (paths, no values)",
     )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+        help=f"Nodes read concurrently (default: {DEFAULT_MAX_IN_FLIGHT})",
+    )
     parser.add_argument(
         "--verbose", "-v", action="store_true",
         help="Enable debug logging on stderr",
@@ -342,8 +422,19 @@ def main(argv: list[str] | None = None) -> int:
         print(f"ERROR: failed to connect to ZK ({params.hosts}): {exc}", file=sys.stderr)
         return 2
 
+    include_values = not args.tree
     try:
-        nodes = dump_tree(client, params.prefix, include_values=not args.tree)
+        if args.format == "jsonl":
+            count = walk_tree(
+                client,
+                params.prefix,
+                lambda node: sys.stdout.write(format_json_line(node)),
+                include_values=include_values,
+                max_in_flight=args.max_in_flight,
+            )
+            _LOG.info("Dumped %d nodes from %s", count, params.prefix)
+            return 0
+        nodes = dump_tree(client, params.prefix, include_values=include_values, max_in_flight=args.max_in_flight)
     finally:
         client.stop()
         client.close()
@@ -12,6 +12,7 @@ from pwd import getpwnam
 
 import daemon
 from .async_logging import setup_async_logging
+from .clusters import get_cluster_names, run_clusters
 from .helpers import acquire_pid_lock
 from .main import create_pgconsul
 
@@ -44,8 +45,20 @@ def read_config(filename=None, options=None):
             'foreground': 'no',
             'local_conn_string': 'dbname=postgres ' + 'user=postgres connect_timeout=1',
             'append_primary_conn_string': 'connect_timeout=1',
+            'primary_probe_timeout': 0,
             'iteration_timeout': 1.0,
             'zk_hosts': 'localhost:2181',
+            'zk_state_snapshot': 'no',
+            'zk_watch_cache': 'no',
+            'membership_registry': 'lock',
+            'zk_write_refresh_interval': 60,
+            'zk_compact_encoding': 'no',
+            'host_record_schema': 'v1',
+            'zk_cluster_summary': 'no',
+            'zk_read_memo_max_age': 0,
+            'zk_session_resume': 'no',
+            'zk_telemetry_budget': 0,
+            'zk_telemetry_max_latency': 0,
             'zk_lockpath_prefix': None,
             'recovery_conf_rel_path': 'recovery.conf',
             'use_replication_slots': 'no',
@@ -67,6 +80,14 @@ def read_config(filename=None, options=None):
             'quorum_commit': 'no',
             'use_lwaldump': 'no',
             'zk_connect_max_delay': 60,
+            'zk_prefer_low_rtt': 'no',
+            'zk_adaptive_timeouts': 'no',
+            'zk_timeout_min': 0.5,
+            'zk_timeout_max': 10,
+            'zk_read_only_mode': 'no',
+            'zk_gc_grace_period': 0,
+            'zk_gc_hosts_per_scan': 1,
+            'zk_gc_scan_interval': 60,
             'zk_auth': 'no',
             'zk_username': None,
             'zk_password': None,
@@ -178,6 +199,9 @@ def init_logging(config, is_foreground=False):
     format = '{asctime} {levelname:<8}: {message}'
     if config.get('debug', 'log_func_name', fallback=False):
         format = '{asctime} {levelname:<8}: {funcName:<30}: {message}'
+    if get_cluster_names(config):
+        # Cluster loops run in threads named after their [cluster:<name>] section.
+        format = format.replace('{message}', '{threadName}: {message}')
     setup_async_logging(config, level, format, is_foreground)
 
 
@@ -191,6 +215,16 @@ def config_back_compatibility(config):
         config.set('commands', 'pg_stop', pg_stop)
 
 
+def run(config):
+    """
+    Run the main loop: one cluster, or every [cluster:<name>] section (multi-instance mode)
+    """
+    if get_cluster_names(config):
+        run_clusters(config)
+    else:
+        create_pgconsul(config).start()
+
+
 def start(config):
     """
     Start daemon
@@ -213,7 +247,7 @@ def start(config):
             pidfile=pidfile,
         ):
             init_logging(config, is_foreground=True)
-            create_pgconsul(config).start()
+            run(config)
     else:
         working_dir = config.get('global', 'working_dir')
         logfile = open(config.get('global', 'log_file'), 'a')
@@ -224,7 +258,7 @@ def start(config):
             pidfile=pidfile,
         ):
             init_logging(config, is_foreground=False)
-            create_pgconsul(config).start()
+            run(config)
 
 
 def main():
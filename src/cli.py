@@ -17,6 +17,9 @@ from .zk import create_zk, Zookeeper
 from . import helpers
 from .exceptions import SwitchoverException, FailoverException, ResetException
 
+# info --short trusts the primary's cluster summary only if written within this many iterations.
+CLUSTER_SUMMARY_MAX_AGE_ITERATIONS = 5
+
 
 class ParseHosts(argparse.Action):
     """
@@ -139,22 +142,25 @@ def initzk(opts, conf):
         path = f'{Zookeeper.MEMBERS_PATH}/{opts.members[0]}'
         raise RuntimeError(f'Could not create path "{path}" in ZK') from exc
     with zk:
-        for host in opts.members:
-            if opts.test:
+        if opts.test:
+            for host in opts.members:
                 path = zk.get_member_path(host)
                 logging.debug(f'Fetching path "{path}"...')
                 if not zk.member_exists(host):
                     logging.debug(f'Path "{path}" not found in ZK, initialization has not been performed earlier')
                     sys.exit(2)
-            else:
-                path = zk.get_member_path(host)
-                logging.debug('creating "%s"...', path)
-                if not zk.ensure_member(host):
-                    raise RuntimeError(f'Could not create path "{path}" in ZK')
-        if opts.test:
             logging.debug('Initialization for all fqdns has been performed earlier')
-        else:
-            logging.debug('ZK structures are initialized')
+            return
+        paths = [zk.get_member_path(host) for host in opts.members]
+        if opts.dry_run:
+            creates = zk.plan_create(paths)
+            if creates is None:
+                raise RuntimeError('Could not read ZK structures')
+            _print_bulk_ops(creates=creates)
+            return
+        if not _apply_bulk_with_retry(zk, lambda: (zk.plan_create(paths), []), opts.chunk_size):
+            raise RuntimeError(f'Could not create paths {", ".join(paths)} in ZK')
+        logging.debug('ZK structures are initialized')
 
 
 def switchover(opts, conf):
@@ -204,21 +210,28 @@ def failover(opts, conf):
         sys.exit(1)
 
 
-def _delete_node_with_retry(zk: Zookeeper, node: str) -> bool:
-    """Delete a ZK node with retries to handle NotEmptyError race.
+def _print_bulk_ops(creates=(), deletes=()):
+    """Print the op list of a dry run, in the order it would be applied."""
+    for path in deletes:
+        print(f'delete {path}')
+    for path in creates:
+        print(f'create {path}')
+
+
+def _apply_bulk_with_retry(zk: Zookeeper, plan, chunk_size) -> bool:
+    """Apply plan() -> (creates, deletes) with zk.apply_bulk, retrying on failure.
 
     pgconsul instances may still be writing child nodes (alive locks,
-    leader locks, ts, master, <host>) when we try to recursively delete
-    a top-level path. Retry a few times with a short delay to let the
-    instances notice the 'disable' status and stop creating children.
+    leader locks, ts, master, <host>) when we delete a tree, which fails
+    its transaction (NotEmptyError). Chunks committed before the failure
+    stay applied, so every attempt re-plans from the current tree after a
+    short delay that lets the instances notice the 'disable' status.
     """
     for attempt in range(1, _MAINTENANCE_DELETE_RETRIES + 1):
-        if zk.delete(node, recursive=True):
+        creates, deletes = plan()
+        if creates is not None and deletes is not None and zk.apply_bulk(creates=creates, deletes=deletes, chunk_size=chunk_size):
             return True
-        logging.warning(
-            'Failed to delete node "%s" (attempt %d/%d)',
-            node, attempt, _MAINTENANCE_DELETE_RETRIES,
-        )
+        logging.warning('Failed to apply ZK changes (attempt %d/%d)', attempt, _MAINTENANCE_DELETE_RETRIES)
         if attempt < _MAINTENANCE_DELETE_RETRIES:
             time.sleep(_MAINTENANCE_DELETE_RETRY_DELAY)
     return False
@@ -236,6 +249,12 @@ def reset_all(opts, conf):
             logging.error("Could not get nodes to reset")
             all_nodes = []
         nodes_to_delete = [x for x in all_nodes if x not in (zk.MEMBERS_PATH, zk.MAINTENANCE_PATH)] + [zk.MAINTENANCE_PATH]
+        if opts.dry_run:
+            deletes = zk.plan_delete(nodes_to_delete)
+            if deletes is None:
+                raise ResetException('Could not read nodes to reset')
+            _print_bulk_ops(deletes=deletes)
+            return
         if not opts.force:
             prompt = f'Nodes to delete: {", ".join(nodes_to_delete)}\n' \
                      f'This is a potentially dangerous action. Proceed [y/n]?\n'
@@ -254,10 +273,9 @@ def reset_all(opts, conf):
         zk.write_maintenance_status('disable')
         _wait_maintenance_disabled(zk, opts.timeout)
 
-        for node in nodes_to_delete:
-            logging.debug(f'resetting path "{node}"')
-            if not _delete_node_with_retry(zk, node):
-                raise ResetException(f'Could not reset node "{node}" in ZK')
+        logging.debug('resetting paths %s', ', '.join(nodes_to_delete))
+        if not _apply_bulk_with_retry(zk, lambda: ([], zk.plan_delete(nodes_to_delete)), opts.chunk_size):
+            raise ResetException(f'Could not reset nodes {", ".join(nodes_to_delete)} in ZK')
         logging.debug("ZK structures are reset")
 
 
@@ -275,6 +293,10 @@ def show_info(opts, conf):
 
 def _show_info(opts, conf):
     with create_zk(config=conf) as zk:
+        if opts.short:
+            short_info = _short_info_from_summary(zk, conf)
+            if short_info is not None:
+                return short_info
         zk_state = zk.get_state()
         zk_state['primary'] = zk_state.pop('lock_holder')  # rename field name to avoid misunderstandings
         maintenance_path = zk.MAINTENANCE_PATH
@@ -295,6 +317,26 @@ def _show_info(opts, conf):
     return {**db_state, **zk_state}
 
 
+def _short_info_from_summary(zk: Zookeeper, conf):
+    """Short info from the primary's cluster summary (one ZK read), or None if absent or stale."""
+    max_age = CLUSTER_SUMMARY_MAX_AGE_ITERATIONS * conf.getfloat('global', 'iteration_timeout')
+    summary = zk.get_cluster_summary(max_age=max_age)
+    if summary is None:
+        return None
+    maintenance = summary['maintenance']
+    if maintenance is not None and maintenance.get('status') is None:
+        maintenance = None
+    return {
+        'alive': zk.is_alive(),
+        'primary': summary['leader'],
+        'last_failover_time': summary['last_failover_time'],
+        'maintenance': maintenance,
+        'replics_info': _short_replica_infos(
+            [{'client_hostname': host, **replica} for host, replica in summary['replicas'].items()]
+        ),
+    }
+
+
 def _get_db_state(conf):
     fname = '%s/.pgconsul_db_state.cache' % conf.get('global', 'working_dir')
     try:
@@ -320,6 +362,28 @@ def _short_replica_infos(replics):
     return ret
 
 
+def _positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive integer')
+    return number
+
+
+def _add_bulk_arguments(parser):
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        default=False,
+        help='Print the ZK operations without applying them',
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=_positive_int,
+        default=Zookeeper.BULK_CHUNK_SIZE,
+        help='Max ZK operations per transaction',
+    )
+
+
 def parse_args():
     """
     Parse multiple commands.
@@ -375,6 +439,7 @@ def parse_args():
         default=False,
         help='Check if zookeeper initialization had already been performed for given hosts. Returns 0 if it had.',
     )
+    _add_bulk_arguments(initzk_arg)
     initzk_arg.set_defaults(action=initzk)
 
     maintenance_arg = subarg.add_parser('maintenance', aliases=['maint'], help='maintenance mode')
@@ -482,6 +547,7 @@ def parse_args():
     reset_all_arg.add_argument(
         '-t', '--timeout', help='Set timeout for reset all command', type=int, default=5 * 60
     )
+    _add_bulk_arguments(reset_all_arg)
     reset_all_arg.set_defaults(action=reset_all)
 
     try:
@@ -0,0 +1,131 @@
+# encoding: utf-8
+"""
+Multi-instance mode: one daemon managing several local PostgreSQL clusters.
+
+Every `[cluster:<name>]` section of the config describes one cluster. Its
+options override `[global]`; `<section>.<option>` keys override other
+sections (e.g. `commands.pg_start`). All clusters share one ZK connection
+(and session) and the logging pipeline, each runs its own Pgconsul loop.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from configparser import RawConfigParser
+
+from .main import Pgconsul, create_pgconsul, get_zk_session_file
+from .zk_client import create_zk_client
+
+CLUSTER_SECTION_PREFIX = 'cluster:'
+
+# Options of the shared ZK connection and of the process: one value for all clusters.
+SHARED_OPTIONS = (
+    'zk_hosts',
+    'zk_auth',
+    'zk_username',
+    'zk_password',
+    'zk_ssl',
+    'keyfile',
+    'certfile',
+    'ca_cert',
+    'verify_certs',
+    'zk_connect_max_delay',
+    'zk_prefer_low_rtt',
+    'zk_adaptive_timeouts',
+    'zk_timeout_min',
+    'zk_timeout_max',
+    'zk_read_only_mode',
+    'max_delay_on_zk_reinit',
+    'zk_session_resume',
+    'pid_file',
+    'log_file',
+    'log_level',
+    'foreground',
+    'daemon_user',
+    'async_log_queue_size',
+)
+
+# Options that must differ between clusters.
+UNIQUE_OPTIONS = ('zk_lockpath_prefix', 'working_dir', 'local_conn_string')
+
+
+def get_cluster_names(config: RawConfigParser) -> list[str]:
+    """Names of the [cluster:<name>] sections, in config order."""
+    return [section[len(CLUSTER_SECTION_PREFIX):] for section in config.sections() if section.startswith(CLUSTER_SECTION_PREFIX)]
+
+
+def build_cluster_config(config: RawConfigParser, name: str) -> RawConfigParser:
+    """Config of one cluster: the base config with the [cluster:<name>] overrides applied."""
+    cluster_section = CLUSTER_SECTION_PREFIX + name
+    if not config.has_section(cluster_section):
+        raise ValueError(f'No [{cluster_section}] section in config')
+    cluster_config = RawConfigParser()
+    cluster_config.read_dict(
+        {section: dict(config.items(section, raw=True)) for section in config.sections() if not section.startswith(CLUSTER_SECTION_PREFIX)}
+    )
+    for key, value in config.items(cluster_section, raw=True):
+        section, _, option = key.rpartition('.')
+        section = section or 'global'
+        if section == 'global' and option in SHARED_OPTIONS:
+            raise ValueError(f'{option} is shared by all clusters and cannot be set in [{cluster_section}]')
+        if not cluster_config.has_section(section):
+            cluster_config.add_section(section)
+        cluster_config.set(section, option, value)
+    return cluster_config
+
+
+def build_cluster_configs(config: RawConfigParser) -> dict[str, RawConfigParser]:
+    """Configs of all clusters, checked for options that must not collide."""
+    cluster_configs = {name: build_cluster_config(config, name) for name in get_cluster_names(config)}
+    for option in UNIQUE_OPTIONS:
+        seen: dict[str, str] = {}
+        for name, cluster_config in cluster_configs.items():
+            value = cluster_config.get('global', option, fallback=None)
+            if value is None:
+                raise ValueError(f'{option} must be set for cluster {name}')
+            if value in seen:
+                raise ValueError(f'Clusters {seen[value]} and {name} have the same {option}: {value}')
+            seen[value] = name
+    return cluster_configs
+
+
+def _run_cluster(name: str, instance: Pgconsul) -> None:
+    """
+    Thread target of one cluster: its Pgconsul loop.
+
+    A SystemExit or an exception only ends the thread it is raised in, while
+    the shared ZK session stays up and keeps the cluster's leader lock and
+    alive nodes forever. So a cluster loop that ends abnormally stops the whole
+    process, as it would in single-cluster mode.
+    """
+    try:
+        instance.run()
+        return
+    except SystemExit as exc:
+        logging.error('Cluster %s exited with code %s, stopping all clusters', name, exc.code)
+    except BaseException:
+        logging.exception('Cluster %s failed, stopping all clusters', name)
+    atexit._run_exitfuncs()  # pylint: disable=W0212
+    os._exit(1)
+
+
+def run_clusters(config: RawConfigParser) -> None:
+    """Run one Pgconsul loop per cluster on a shared ZK connection until stopped."""
+    cluster_configs = build_cluster_configs(config)
+    zk_client = create_zk_client(config, path_prefix='/', session_file=get_zk_session_file(config))
+    if not zk_client.init():
+        raise Exception('Could not connect to ZK.')
+
+    instances: dict[str, Pgconsul] = {}
+    for name, cluster_config in cluster_configs.items():
+        logging.info('Initializing cluster %s', name)
+        instances[name] = create_pgconsul(cluster_config, shared_zk_client=zk_client)
+
+    threads = [threading.Thread(target=_run_cluster, args=(name, instance), name=CLUSTER_SECTION_PREFIX + name) for name, instance in instances.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Process-wide shutdown (exit functions, exit), the same for every instance.
+    next(iter(instances.values())).stop()
@@ -7,6 +7,10 @@ Owns the infra objects (zk, db, replication_manager, timings) and the bound
 opaque composite callbacks. Dispatches each command type to its effect,
 stopping on the first failing command (fail-fast). Concentrates all I/O in
 one place, aligning with ADR-0002 exception handling.
+
+Consecutive plain ZK-write commands of a Plan are coalesced into one atomic
+multi transaction: one round trip, and the grouped state change is applied
+all-or-nothing.
 """
 
 from __future__ import annotations
@@ -61,6 +65,7 @@ from .log_formatters import log_event
 from .zk import ZookeeperException
 
 if TYPE_CHECKING:
+    from .zk import ZkWrite
     from .failover import FailoverPhase
     from .pg import Postgres
     from .replication_manager import ReplicationManager
@@ -92,6 +97,7 @@ class CommandExecutor:
     Owns infra objects and opaque composite callbacks. ``run()`` calls
     ``machine.plan(observation)`` (pure, no I/O) and executes the returned Plan
     command-by-command, stopping on the first failing command (fail-fast).
+    Runs of two or more consecutive ZK-write commands execute as one batch.
     """
 
     def __init__(
@@ -163,8 +169,16 @@ class CommandExecutor:
                 return
             if not plan:
                 return
-            for cmd in plan:
-                if not self._dispatch(cmd):
+            i = 0
+            while i < len(plan):
+                batch = self._zk_write_run(plan, i)
+                if len(batch) > 1:
+                    ok = self._dispatch_batch(batch)
+                    i += len(batch)
+                else:
+                    ok = self._dispatch(plan[i])
+                    i += 1
+                if not ok:
                     return
         finally:
             # Clear iteration state so a stale dict is never reused.
@@ -187,6 +201,68 @@ class CommandExecutor:
             )
             return False
 
+    # --- Batched ZK writes ---
+
+    def _zk_write_run(self, plan: Plan, start: int) -> list[tuple[Command, ZkWrite]]:
+        """Collect the run of consecutive batchable ZK-write commands starting at plan[start]."""
+        batch = []
+        for cmd in plan[start:]:
+            op = self._zk_write_op(cmd)
+            if op is None:
+                break
+            batch.append((cmd, op))
+        return batch
+
+    def _zk_write_op(self, cmd: Command) -> ZkWrite | None:
+        """Return the single ZK write a command boils down to, or None if it is not batchable."""
+        match cmd:
+            case WriteFailoverState():
+                return self._zk.failover_state_op(cmd.value)
+            case FailoverTransitionTo():
+                return self._zk.failover_state_op(cmd.phase)
+            case TransitionTo():
+                return self._zk.switchover_state_op(cmd.phase)
+            case WriteTimeline():
+                return self._zk.timeline_op(cmd.timeline)
+            case WriteLastSwitchoverTime():
+                return self._zk.last_switchover_time_op()
+            case WriteCandidate():
+                return self._zk.switchover_candidate_op(cmd.candidate)
+            case WriteSideReplicas():
+                return self._zk.switchover_side_replicas_op(list(cmd.side_replicas))
+            case WriteCurrentPromotingHost():
+                return self._zk.current_promoting_host_op()
+            case WriteLastFailoverTime():
+                return self._zk.last_failover_time_op()
+            case WriteElectionStatus():
+                return self._zk.election_status_op(cmd.status)
+            case WriteElectionWinner():
+                return self._zk.election_winner_op(cmd.winner)
+            case _:
+                return None
+
+    def _dispatch_batch(self, batch: list[tuple[Command, ZkWrite]]) -> bool:
+        """Write a run of ZK-write commands in one transaction. Returns False on failure (fail-fast)."""
+        names = ', '.join(type(cmd).__name__ for cmd, _ in batch)
+        try:
+            if not self._zk.write_batch([op for _, op in batch]):
+                logging.error('Failed to persist ZK write batch (%s)', names)
+                return False
+        except ZookeeperException:
+            logging.warning(
+                'ZK write batch (%s) failed with I/O error, will retry next iteration',
+                names,
+                exc_info=True,
+            )
+            return False
+        for cmd, _ in batch:
+            match cmd:
+                case TransitionTo():
+                    log_event(f'SWITCHOVER PHASE → {cmd.phase}', level='warning')
+                case FailoverTransitionTo():
+                    log_event(f'FAILOVER PHASE → {cmd.phase}', level='warning')
+        return True
+
     def _exec(self, cmd: Command) -> bool:
         """Dispatch by command type to the corresponding infra call."""
         match cmd:
@@ -0,0 +1,125 @@
+# encoding: utf-8
+"""
+Departed host collector module.
+
+Removes the ZK nodes hosts leave behind when they are taken out of the
+cluster (all_hosts/<fqdn>, alive/<fqdn>, election_vote/<fqdn>, ...), so
+per-iteration fan-outs over those paths stay proportional to live members.
+Run by the primary only (ADR-0004 factory + dataclass config).
+"""
+import logging
+import time
+
+from configparser import RawConfigParser
+from dataclasses import dataclass
+from typing import Callable
+
+from . import helpers
+from .exceptions import PostgresConnectionError
+from .zk import Zookeeper
+
+
+@dataclass
+class DepartedHostCollectorConfig:
+    """Configuration for DepartedHostCollector."""
+    # Seconds a host must be seen without a ZK session before its nodes are removed; 0 disables.
+    grace_period: float
+    # Max hosts removed per scan.
+    hosts_per_scan: int
+    # Min seconds between scans.
+    scan_interval: float
+
+
+class DepartedHostCollector:
+    """
+    Garbage-collect the ZK subtrees of hosts that left the cluster.
+
+    A host is live while its daemon holds an ephemeral node (daemon, alive or
+    quorum), it is the leader, is in the sync quorum or streams from us. A
+    daemon keeps its daemon node while its PostgreSQL is down, so only hosts
+    without a running daemon are collected. Hosts owning nodes but not live
+    are remembered with the time they were first seen so; after grace_period
+    their replication slots on the primary and then their subtrees are
+    deleted, at most hosts_per_scan per scan. The slots go first: once a host
+    leaves all_hosts, the slot manager no longer sees it. Absence is tracked
+    in memory, so a newly elected primary starts the grace period over.
+    """
+
+    def __init__(
+        self,
+        zk: Zookeeper,
+        config: DepartedHostCollectorConfig,
+        drop_slots_for_hosts: Callable[[list[str]], bool],
+    ):
+        self._zk = zk
+        self._config = config
+        self._drop_slots_for_hosts = drop_slots_for_hosts
+        self._absent_since: dict[str, float] = {}
+        self._last_scan: float | None = None
+
+    def collect(self, db_state: dict) -> None:
+        """Scan for departed hosts and remove some of them (called from primary_iter)."""
+        if self._config.grace_period <= 0:
+            return
+        now = time.monotonic()
+        if self._last_scan is not None and now - self._last_scan < self._config.scan_interval:
+            return
+        self._last_scan = now
+
+        hosts = self._zk.get_hosts_with_nodes()
+        if hosts is None:
+            return
+        candidates = hosts - self._protected_hosts(db_state)
+        live = self._zk.get_hosts_with_sessions(candidates) if candidates else set()
+        if live is None:
+            return
+        absent = candidates - live
+        self._absent_since = {host: self._absent_since.get(host, now) for host in absent}
+
+        departed = sorted(host for host, since in self._absent_since.items() if now - since >= self._config.grace_period)
+        if not departed:
+            return
+        batch = departed[:self._config.hosts_per_scan]
+        logging.warning(
+            'Removing ZK nodes of hosts without a session for more than %s s: %s (%d more left)',
+            self._config.grace_period,
+            ', '.join(batch),
+            len(departed) - len(batch),
+        )
+        try:
+            self._drop_slots_for_hosts(batch)
+        except PostgresConnectionError:
+            # Best-Effort (ADR-0002 §3): keep the nodes, so the slots are retried on next scan.
+            logging.warning('DB connection lost while dropping slots of departed hosts, will retry on next scan.')
+            return
+        if self._zk.delete_host_nodes(batch):
+            for host in batch:
+                del self._absent_since[host]
+        else:
+            logging.warning('Could not remove ZK nodes of departed hosts, will retry on next scan.')
+
+    def _protected_hosts(self, db_state: dict) -> set[str]:
+        """Hosts never collected even without a ZK session."""
+        protected = {helpers.get_hostname()}
+        holder = self._zk.get_current_lock_holder()
+        if holder:
+            protected.add(holder)
+        protected.update(self._zk.get_quorum() or [])
+        for replica in db_state.get('replics_info') or []:
+            if replica.get('client_hostname'):
+                protected.add(replica['client_hostname'])
+        return protected
+
+
+def create_departed_host_collector(
+    config: RawConfigParser, zk: Zookeeper, drop_slots_for_hosts: Callable[[list[str]], bool]
+) -> DepartedHostCollector:
+    """Factory: create DepartedHostCollector from config object."""
+    collector_config = DepartedHostCollectorConfig(
+        grace_period=config.getfloat('global', 'zk_gc_grace_period'),
+        hosts_per_scan=config.getint('global', 'zk_gc_hosts_per_scan'),
+        scan_interval=config.getfloat('global', 'zk_gc_scan_interval'),
+    )
+    if collector_config.grace_period > 0 and collector_config.hosts_per_scan <= 0:
+        raise ValueError(f'zk_gc_hosts_per_scan must be positive, got {collector_config.hosts_per_scan}')
+    return DepartedHostCollector(zk, collector_config, drop_slots_for_hosts)
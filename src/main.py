@@ -21,6 +21,7 @@ from .command_executor import CommandExecutor
 from .command_manager import CommandManager, create_command_manager
 from .helpers import IterationTimer, get_hostname, register_sigterm_handler, should_run
 from .exceptions import PostgresConnectionError
+from .host_gc import DepartedHostCollector, create_departed_host_collector
 from .maintenance import MaintenanceHandler, create_maintenance_handler
 from .pg import Postgres, create_postgres
 from .replication_manager import ReplicationManager, create_replication_manager
@@ -49,6 +50,7 @@ from .return_to_cluster import (
 from .timings import TimingTracker
 from .types import ReplicaInfos
 from .zk import Zookeeper, ZookeeperException, create_zk
+from .zk_client import ZkClient
 
 
 @dataclass
@@ -112,6 +114,7 @@ class Pgconsul:
         slot_manager: ReplicationSlotManager,
         timings: TimingTracker,
         maintenance_handler: MaintenanceHandler,
+        host_collector: DepartedHostCollector,
     ):
         logging.info('Initializing main class.')
         self.config = config
@@ -138,6 +141,7 @@ class Pgconsul:
         self._slot_manager = slot_manager
         self._timings = timings
         self._maintenance = maintenance_handler
+        self._host_collector = host_collector
 
         # Debug failure injection (step 14e, ADR-0004).
         self._debug_failure = DebugFailure(
@@ -361,6 +365,13 @@ class Pgconsul:
         """
         Start iterations
         """
+        self.run()
+        self.stop()
+
+    def run(self):
+        """
+        Run iterations until stopped (without exiting the process)
+        """
         if not self.config.use_replication_slots and self.config.replication_slots_polling:
             logging.warning('Force disable replication_slots_polling because use_replication_slots is disabled.')
             self.config.replication_slots_polling = False
@@ -381,11 +392,13 @@ class Pgconsul:
                 logging.warning('PostgreSQL error during iteration, will retry: %s', e)
             except Exception:
                 logging.exception('Unexpected error during run_iteration')
-        self.stop()
 
     def run_iteration(self, my_prio):
         logging.info('Start iteration on host: %s', helpers.get_hostname())
         timer = IterationTimer()
+        self.zk.begin_iteration()
+        self.db.begin_iteration()
+        self.zk.register_daemon()
         if self.is_rewind_flag_set():
             logging.error('Rewind fail flag is set, skipping iteration. Remove %s to resume.', self._rewind_flag_path())
             self.finish_iteration(timer)
@@ -409,6 +422,10 @@ class Pgconsul:
             if logging.getLogger().isEnabledFor(logging.DEBUG):
                 logging.debug(format_zk_state_for_log(zk_state))
             helpers.write_status_file(db_state, zk_state, self.config.working_dir)
+            if zk_state['read_only']:
+                self.read_only_iter(role, db_state)
+                self.finish_iteration(timer)
+                return
             self._maintenance.update_status(db_state, zk_state, self._is_single_node)
             self._zk_alive_refresh(role, db_state, zk_state)
             if db_state.get('replication_state') is not None:
@@ -463,6 +480,7 @@ class Pgconsul:
         self.finish_iteration(timer)
 
     def finish_iteration(self, timer):
+        self.zk.end_iteration()
         logging.info('Finished iteration ==============================')
         timer.sleep(self.config.iteration_timeout)
 
@@ -552,6 +570,8 @@ class Pgconsul:
             if not self._verify_timeline(db_state, zk_state):
                 return None
 
+            self.zk.write_cluster_summary(db_state, zk_state)
+
             if zk_state[self.zk.FAILOVER_MUST_BE_RESET]:
                 self.reset_failover_node(zk_state)
                 return None
@@ -617,6 +637,7 @@ class Pgconsul:
 
             # Stale cleanup runs last (ADR-0005 §2).
             self._drop_stale_switchover(db_state)
+            self._host_collector.collect(db_state)
 
         except ZookeeperException:
             if not self.zk.try_acquire_lock():
@@ -641,17 +662,36 @@ class Pgconsul:
         zk_state = self.zk.get_state()
         self.reset_failover_node(zk_state)
 
+    def read_only_iter(self, role, db_state):
+        """
+        ZK ensemble has no quorum and we are connected to a read-only server
+        (zk_read_only_mode): the state was read and saved, but nothing can be
+        written or locked, so every action is skipped.
+        """
+        logging.warning('ZK server is read-only (ensemble without quorum), skipping actions that need ZK writes.')
+        if self._maintenance.is_in_maintenance:
+            return
+        if role == 'primary' and not self._is_single_node:
+            # The leader lock cannot be verified on a read-only server: the same as losing ZK.
+            # Kazoo reconnects to a read-write server by itself, no reconnect here.
+            self._close_primary_without_lock()
+        elif role == 'replica':
+            self.handle_detached_replica(db_state)
+
+    def _close_primary_without_lock(self, close_master_without_lock=True):
+        if close_master_without_lock and self._replication_manager.should_close():
+            self.db.pgpooler('stop')
+            # We need to stop archiving WAL because when network connectivity
+            # returns, it can be another primary in cluster. We need to stop
+            # archiving to prevent "wrong" WAL appears in archive.
+            self.db.stop_archiving_wal()
+        else:
+            self.start_pooler()
+
     def resolve_zk_primary_lock(self, my_hostname, close_master_without_lock=True):
         holder = self.zk.get_current_lock_holder()
         if holder is None:
-            if close_master_without_lock and self._replication_manager.should_close():
-                self.db.pgpooler('stop')
-                # We need to stop archiving WAL because when network connectivity
-                # returns, it can be another primary in cluster. We need to stop
-                # archiving to prevent "wrong" WAL appears in archive.
-                self.db.stop_archiving_wal()
-            else:
-                self.start_pooler()
+            self._close_primary_without_lock(close_master_without_lock)
             logging.warning('Lock in ZK is released but could not be acquired. Reconnecting to ZK.')
             self.zk.reconnect()
         elif holder != my_hostname:
@@ -1945,14 +1985,12 @@ class Pgconsul:
     def _zk_alive_refresh(self, role, db_state, zk_state):
         self._replication_manager.drop_zk_fail_timestamp()
         if role is None:
-            self.zk.release_lock(self.zk.get_host_alive_lock_path())
+            self.zk.unregister_alive()
         else:
             self._is_single_node = self.zk.update_single_node_status(role)
             if self._is_single_node is None:
                 return
-            if self.zk.get_current_lock_holder(self.zk.get_host_alive_lock_path()) is None:
-                logging.warning("I don't hold my alive lock, let's acquire it")
-                self.zk.try_acquire_lock(self.zk.get_host_alive_lock_path())
+            self.zk.register_alive()
 
     def _store_replics_info(self, db_state, zk_state):
         tli_res = None
@@ -2027,17 +2065,31 @@ def build_pgconsul_config(config: RawConfigParser) -> PgconsulConfig:
     )
 
 
-def create_pgconsul(config: RawConfigParser) -> 'Pgconsul':
-    """Create all components and inject them into Pgconsul (ADR-0004)."""
+def get_zk_session_file(config: RawConfigParser) -> str | None:
+    """Path of the saved ZK session (zk_session_resume), None when disabled."""
+    if not config.getboolean('global', 'zk_session_resume', fallback=False):
+        return None
+    return os.path.join(config.get('global', 'working_dir'), '.pgconsul_zk_session')
+
+
+def create_pgconsul(config: RawConfigParser, shared_zk_client: ZkClient | None = None) -> 'Pgconsul':
+    """Create all components and inject them into Pgconsul (ADR-0004).
+
+    shared_zk_client: ZK connection shared by all clusters in multi-instance mode.
+    """
     pgconsul_config = build_pgconsul_config(config)
 
     cmd_manager = create_command_manager(config)
     db = create_postgres(config=config, cmd_manager=cmd_manager)
-    zk = create_zk(config=config)
+    if shared_zk_client is not None:
+        zk = create_zk(config=config, shared_client=shared_zk_client)
+    else:
+        zk = create_zk(config=config, session_file=get_zk_session_file(config))
     replication_manager = create_replication_manager(config, db, zk)
     slot_manager = create_replication_slot_manager(config, db, zk)
     timings = TimingTracker(zk, config.get('commands', 'log_timing', fallback=None))
     maintenance_handler = create_maintenance_handler(config, db, zk, replication_manager)
+    host_collector = create_departed_host_collector(config, zk, slot_manager.drop_slots_for_hosts)
 
     return Pgconsul(
         config=pgconsul_config,
@@ -2048,6 +2100,7 @@ def create_pgconsul(config: RawConfigParser) -> 'Pgconsul':
         slot_manager=slot_manager,
         timings=timings,
         maintenance_handler=maintenance_handler,
+        host_collector=host_collector,
     )
 
 
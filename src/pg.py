@@ -20,6 +20,8 @@ from psycopg2.sql import SQL, Identifier
 from . import helpers
 from .command_manager import CommandManager
 from .exceptions import PostgresConnectionError
+from .pg_control import PgControlReader
+from .pg_probe import KEEPALIVE_PARAMS, ProbeConnectionPool, probe_timeout
 from .types import ReplicaInfos
 from configparser import RawConfigParser
 
@@ -62,15 +64,101 @@ class PostgresConfig:
     iteration_timeout: float
     append_primary_conn_string: str = ''
     wals_to_upload: int = 20
+    # Deadline of one remote probe in is_host_unreachable; 0: connect_timeout of append_primary_conn_string.
+    primary_probe_timeout: float = 0.0
 
     @property
     def db_state_path(self):
         return '%s/.pgconsul_db_state.cache' % self.working_dir
 
 
+def _replics_info_query(current_lsn: str) -> str:
+    """Query of streaming replicas from pg_stat_replication, LSN diffs against current_lsn."""
+    return f"""SELECT pid, application_name,
+                client_hostname, client_addr, state,
+            {current_lsn}
+                AS primary_location,
+            pg_wal_lsn_diff({current_lsn}, sent_lsn)
+                AS sent_location_diff,
+            pg_wal_lsn_diff({current_lsn}, write_lsn)
+                AS write_location_diff,
+            pg_wal_lsn_diff({current_lsn},
+                replay_lsn)
+                AS replay_location_diff,
+            COALESCE(1000*EXTRACT(epoch from replay_lag), 0)::bigint AS replay_lag_msec,
+            extract(epoch from backend_start)::bigint AS backend_start_ts,
+            (1000*extract(epoch from reply_time))::bigint AS reply_time_ms,
+            sync_state FROM pg_stat_replication
+            WHERE application_name != 'pg_basebackup'
+            AND application_name != 'pg_receivewal'
+            AND state = 'streaming'"""
+
+
+REPLICS_INFO_CURRENT_LSN = {'primary': 'pg_current_wal_lsn()', 'replica': 'pg_last_wal_replay_lsn()'}
+
+WAL_RECEIVER_QUERY = """SELECT pid, status, slot_name,
+                   COALESCE(1000*EXTRACT(epoch FROM last_msg_receipt_time), 0)::bigint AS last_msg_receipt_time_msec,
+                   conninfo FROM pg_stat_wal_receiver"""
+
+# GUCs read during an iteration. All are strings or plain integers, so pg_settings.setting is what SHOW returns.
+SNAPSHOT_SETTINGS = (
+    'data_directory',
+    'synchronous_standby_names',
+    'max_connections',
+    'archive_mode',
+    'archive_command',
+    'restore_command',
+    'primary_conninfo',
+)
+
+# One round trip for everything _collect_db_state and the role handlers read (Postgres.take_snapshot).
+# pg_current_wal_lsn() fails in recovery: CASE does not evaluate the volatile branch it does not take.
+SNAPSHOT_QUERY = """WITH settings AS (
+    SELECT json_object_agg(name, setting) AS value FROM pg_settings WHERE name = ANY(%(settings)s)
+), wal_receiver AS (
+    SELECT json_agg(w) -> 0 AS value FROM ({wal_receiver}) w
+), replics AS (
+    SELECT COALESCE(json_agg(r), '[]'::json) AS value FROM ({replics_info}) r
+), sessions AS (
+    SELECT count(*) AS value FROM pg_stat_activity WHERE state != 'idle'
+)
+SELECT pg_is_in_recovery(), settings.value, wal_receiver.value, replics.value, sessions.value,
+    CASE WHEN pg_is_in_recovery() THEN pg_is_wal_replay_paused() END,
+    (pg_control_checkpoint()).timeline_id
+FROM settings, wal_receiver, replics, sessions""".format(
+    wal_receiver=WAL_RECEIVER_QUERY,
+    replics_info=_replics_info_query('CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END'),
+)
+
+
+@dataclass
+class DbSnapshot:
+    """State of the local PostgreSQL read by one query (SNAPSHOT_QUERY)."""
+    in_recovery: bool
+    # SNAPSHOT_SETTINGS visible to our user (data_directory needs pg_read_all_settings).
+    settings: dict[str, str]
+    wal_receiver: dict | None
+    replics_info: ReplicaInfos
+    active_sessions: int
+    # None on a primary.
+    wal_replay_paused: bool | None
+    # Latest checkpoint's timeline from pg_control_checkpoint().
+    timeline: int | None
+
+    @property
+    def role(self) -> str:
+        return 'replica' if self.in_recovery else 'primary'
+
+
 class Postgres(object):
     """
     Postgres class
+
+    Getters of the database state answer from the iteration's DbSnapshot
+    (take_snapshot) on their first call and query the server on later calls:
+    a getter called again is polling for a change. Actions that change the
+    state (ALTER SYSTEM, reload, promote, start / stop, rewind) drop the
+    snapshot, so does begin_iteration.
     """
 
     DISABLED_ARCHIVE_COMMAND = '/bin/false'
@@ -80,6 +168,15 @@ class Postgres(object):
         self.config = config
         self._cmd_manager = cmd_manager
         self.conn_local: psycopg2.extensions.connection | None = None
+        # Whether a query succeeded on conn_local in this iteration (see begin_iteration, _exec_query).
+        self._conn_validated = False
+        self._snapshot: DbSnapshot | None = None
+        # Snapshot fields already returned by a getter (see _from_snapshot).
+        self._snapshot_read: set[str] = set()
+        self._pg_control = PgControlReader()
+        self._probe_pool = ProbeConnectionPool(
+            probe_timeout(self.config.primary_probe_timeout, self.config.append_primary_conn_string)
+        )
         self._wals_to_upload = self.config.wals_to_upload
         self.role: str | None = None
         self.pgdata = ''
@@ -88,17 +185,44 @@ class Postgres(object):
         self._offline_detect_pgdata()
         self.reconnect()
 
+    def begin_iteration(self) -> None:
+        """Start of a main loop iteration: the connection is validated again by its first query."""
+        self._conn_validated = False
+        self.drop_snapshot()
+
+    def take_snapshot(self) -> DbSnapshot:
+        """Read the database state in one query; getters answer from it once.
+
+        Raises:
+            PostgresConnectionError: if the DB connection is lost.
+        """
+        row = self._exec_query(SNAPSHOT_QUERY, settings=list(SNAPSHOT_SETTINGS)).fetchone()
+        in_recovery, settings, wal_receiver, replics_info, active_sessions, wal_replay_paused, timeline = row
+        self._snapshot = DbSnapshot(
+            in_recovery=in_recovery,
+            settings=settings or {},
+            wal_receiver=wal_receiver,
+            replics_info=replics_info,
+            active_sessions=active_sessions,
+            wal_replay_paused=wal_replay_paused,
+            timeline=timeline,
+        )
+        self._snapshot_read = set()
+        return self._snapshot
+
+    def drop_snapshot(self) -> None:
+        self._snapshot = None
+
+    def _from_snapshot(self, field: str) -> DbSnapshot | None:
+        """The snapshot if field has not been read from it yet, else None (query the server)."""
+        if self._snapshot is None or field in self._snapshot_read:
+            return None
+        self._snapshot_read.add(field)
+        return self._snapshot
+
     def _create_cursor(self):
-        if self.conn_local:
-            try:
-                cursor = self.conn_local.cursor()
-                cursor.execute('SELECT 1;')
-                return cursor
-            except psycopg2.Error:
-                logging.debug('Error creating cursor, reconnecting', exc_info=True)
-                self.reconnect()
-        else:
-            # No active connection — reconnect; reconnect() raises
+        if self.conn_local is None or self.conn_local.closed:
+            # No usable connection — reconnect; reconnect() raises
             # PostgresConnectionError if it cannot restore the connection.
             self.reconnect()
         if self.conn_local is None:
@@ -106,12 +230,29 @@ class Postgres(object):
         return self.conn_local.cursor()
 
     def _exec_query(self, query, **kwargs):
+        """Execute a query and return the cursor.
+
+        The first query on a connection not validated in this iteration is
+        retried once on a new connection if it fails: the old one may have
+        been broken since the previous iteration. Any other connection loss
+        raises PostgresConnectionError (ADR-0001).
+        """
+        retry = not self._conn_validated
         cur = self._create_cursor()
         try:
             cur.execute(query, kwargs)
         except psycopg2.OperationalError as exc:
             self.close()
-            raise PostgresConnectionError(str(exc)) from exc
+            if not retry:
+                raise PostgresConnectionError(str(exc)) from exc
+            logging.debug('Query on a connection not validated yet failed, retrying on a new one', exc_info=True)
+            cur = self._create_cursor()
+            try:
+                cur.execute(query, kwargs)
+            except psycopg2.OperationalError as retry_exc:
+                self.close()
+                raise PostgresConnectionError(str(retry_exc)) from retry_exc
+        self._conn_validated = True
         return cur
 
     def _get(self, query, **kwargs):
@@ -130,11 +271,20 @@ class Postgres(object):
 
     def _get_data_from_control_file(self, parameter, preproc=None, log=True):
         """
-        Run pg_controldata and grep it's output
+        Read a pg_controldata field: parse global/pg_control natively (cached
+        until the file changes), fall back to running the get_control_parameter
+        command for unsupported control file versions or unreadable files.
         """
+        control = self._pg_control.read(self.pgdata)
+        value = control.parameter(parameter) if control is not None else None
+        if value is not None:
+            return preproc(value) if preproc else value
         return self._cmd_manager.get_control_parameter(self.pgdata, parameter, preproc, log)
 
     def get_timeline(self):
+        snapshot = self._from_snapshot('timeline')
+        if snapshot is not None and snapshot.timeline is not None:
+            return snapshot.timeline
         return self._get_data_from_control_file('Latest checkpoint.s TimeLineID', preproc=int, log=False)
 
     def get_database_cluster_state(self):
@@ -207,6 +357,8 @@ class Postgres(object):
         try:
             self.conn_local = psycopg2.connect(self.config.conn_string)
             self.conn_local.autocommit = True
+            # A fresh connection needs no validation (and must not be retried from get_role below).
+            self._conn_validated = True
             self.role = self.get_role()
             self.pgdata = self._get_pgdata_path()
             self.terminal_state = True
@@ -227,6 +379,7 @@ class Postgres(object):
         Closes current connection in any state
         """
         logging.debug('Closing connection to PG')
+        self.drop_snapshot()
         if self.conn_local:
             try:
                 self.conn_local.close()
@@ -240,7 +393,10 @@ class Postgres(object):
         Called only when the liveness probe confirms DB is alive.
         Raises PostgresConnectionError on connection loss — propagates to
         run_iteration() (ADR-0001 / ADR-0002 §1).
+
+        Fields come from one DbSnapshot query; the getters below read it.
         """
+        self.take_snapshot()
         data['role'] = self.role = self.get_role()
         data['pgdata'] = self.pgdata = self._get_pgdata_path()
         data['opened'] = self.pgpooler('status')[1]
@@ -340,10 +496,14 @@ class Postgres(object):
         Check that postgresql is alive.
         Returns (is_alive, is_terminal_state) where is_terminal_state=False means
         PostgreSQL is starting up or shutting down (non-terminal / transient state).
+
+        The probe runs on the open connection when there is a healthy one; only
+        when that fails the connection is dropped and established anew, which
+        also refreshes role / pgdata and detects a starting or stopping server.
         """
+        if self._probe_open_connection():
+            return True, True
         try:
-            # In order to check that postgresql is really alive
-            # we need to drop current connection and establish a new one
             self.reconnect()
             res = self._exec_query('SELECT 42;').fetchone()
             return len(res) > 0, True
@@ -352,11 +512,28 @@ class Postgres(object):
             logging.debug('Error checking alive/running state', exc_info=True)
             return False, self.terminal_state
 
+    def _probe_open_connection(self) -> bool:
+        """Run the liveness query on the current connection. False if there is none or the query failed."""
+        if self.conn_local is None or self.conn_local.closed:
+            return False
+        try:
+            with contextlib.closing(self.conn_local.cursor()) as cur:
+                cur.execute('SELECT 42;')
+                self._conn_validated = cur.fetchone() is not None
+                return self._conn_validated
+        except psycopg2.Error:
+            # Liveness probe (ADR-0001): the caller reconnects.
+            logging.debug('Liveness probe on the open connection failed', exc_info=True)
+            return False
+
     def get_role(self) -> str:
         """
         Get role of local postgresql (replica or primary).
         Raises PostgresConnectionError if the database is unavailable.
         """
+        snapshot = self._from_snapshot('role')
+        if snapshot is not None:
+            return snapshot.role
         res = self._exec_query('SELECT pg_is_in_recovery();')
         if res.fetchone()[0]:
             return 'replica'
@@ -367,6 +544,9 @@ class Postgres(object):
         """
         Get local pg_data
         """
+        snapshot = self._from_snapshot('setting:data_directory')
+        if snapshot is not None and 'data_directory' in snapshot.settings:
+            return snapshot.settings['data_directory']
         res = self._exec_query('SHOW data_directory;').fetchone()
         return res[0]
 
@@ -376,43 +556,10 @@ class Postgres(object):
         Raises:
             PostgresConnectionError: if the DB connection is lost.
         """
-        current_lsn = {'primary': 'pg_current_wal_lsn()', 'replica': 'pg_last_wal_replay_lsn()'}
-        wal_func = {
-            'current_lsn': current_lsn[role],
-            'diff_lsn': 'pg_wal_lsn_diff',
-            'app_name': 'pg_receivewal',
-            'sent_lsn': 'sent_lsn',
-            'write_lsn': 'write_lsn',
-            'replay_lsn': 'replay_lsn',
-        }
-        replay_lag = 'COALESCE(1000*EXTRACT(epoch from replay_lag), 0)::bigint AS replay_lag_msec,'
-        query = """SELECT pid, application_name,
-                    client_hostname, client_addr, state,
-                {current_lsn}
-                    AS primary_location,
-                {diff_lsn}({current_lsn}, {sent_lsn})
-                    AS sent_location_diff,
-                {diff_lsn}({current_lsn}, {write_lsn})
-                    AS write_location_diff,
-                {diff_lsn}({current_lsn},
-                    {replay_lsn})
-                    AS replay_location_diff,
-                {replay_lag}
-                extract(epoch from backend_start)::bigint AS backend_start_ts,
-                (1000*extract(epoch from reply_time))::bigint AS reply_time_ms,
-                sync_state FROM pg_stat_replication
-                WHERE application_name != 'pg_basebackup'
-                AND application_name != '{app_name}'
-                AND state = 'streaming'""".format(
-            current_lsn=wal_func['current_lsn'],
-            diff_lsn=wal_func['diff_lsn'],
-            app_name=wal_func['app_name'],
-            sent_lsn=wal_func['sent_lsn'],
-            write_lsn=wal_func['write_lsn'],
-            replay_lag=replay_lag,
-            replay_lsn=wal_func['replay_lsn'],
-        )
-        return self._get(query)
+        snapshot = self._from_snapshot('replics_info')
+        if snapshot is not None and snapshot.role == role:
+            return snapshot.replics_info
+        return self._get(_replics_info_query(REPLICS_INFO_CURRENT_LSN[role]))
 
     def _get_wal_receiver_info(self):
         """Get wal_receiver info from pg_stat_wal_receiver.
@@ -420,10 +567,10 @@ class Postgres(object):
         Raises:
             PostgresConnectionError: if the DB connection is lost.
         """
-        query = """SELECT pid, status, slot_name,
-                   COALESCE(1000*EXTRACT(epoch FROM last_msg_receipt_time), 0)::bigint AS last_msg_receipt_time_msec,
-                   conninfo FROM pg_stat_wal_receiver"""
-        result = self._get(query)
+        snapshot = self._from_snapshot('wal_receiver')
+        if snapshot is not None:
+            return snapshot.wal_receiver
+        result = self._get(WAL_RECEIVER_QUERY)
         if result:
             return result[0]
         return None
@@ -434,9 +581,12 @@ class Postgres(object):
         Raises:
             PostgresConnectionError: if the DB connection is lost.
         """
-        res = self._exec_query('SHOW synchronous_standby_names;').fetchone()
-        res = ('async', None) if res[0] == '' else ('sync', res[0])
-        return res
+        snapshot = self._from_snapshot('setting:synchronous_standby_names')
+        if snapshot is not None and 'synchronous_standby_names' in snapshot.settings:
+            value = snapshot.settings['synchronous_standby_names']
+        else:
+            value = self._exec_query('SHOW synchronous_standby_names;').fetchone()[0]
+        return ('async', None) if value == '' else ('sync', value)
 
     def get_sessions_ratio(self):
         """Get ratio of active sessions/max sessions (in percents).
@@ -444,6 +594,9 @@ class Postgres(object):
         Raises:
             PostgresConnectionError: if the DB connection is lost.
         """
+        snapshot = self._from_snapshot('sessions_ratio')
+        if snapshot is not None and 'max_connections' in snapshot.settings:
+            return (snapshot.active_sessions / int(snapshot.settings['max_connections'])) * 100
         cur = self._exec_query("SELECT count(*) FROM pg_stat_activity WHERE state!='idle';")
         cur = cur.fetchone()[0]
         max_sessions = self._exec_query('SHOW max_connections;').fetchone()[0]
@@ -574,6 +727,7 @@ class Postgres(object):
         self.pg_wal_replay_resume()
 
         logging.info('ACTION. Starting promote')
+        self.drop_snapshot()
         promoted = self._cmd_manager.promote(self.pgdata) == 0
         if promoted:
             if not self.resume_archiving_wal():
@@ -712,6 +866,7 @@ class Postgres(object):
                 logging.warning('Could not backup replication slots before rewinding. Skipping it.')
 
         logging.info('ACTION. Starting pg_rewind')
+        self.drop_snapshot()
         res = self._cmd_manager.rewind(self.pgdata, primary_host)
 
         if self.config.use_replication_slots and res == 0:
@@ -731,6 +886,9 @@ class Postgres(object):
         return res
 
     def _get_param_value(self, param):
+        snapshot = self._from_snapshot(f'setting:{param}')
+        if snapshot is not None and param in snapshot.settings:
+            return snapshot.settings[param]
         cursor = self._exec_query(f'SHOW {param}')
         (value,) = cursor.fetchone()
         return value
@@ -754,6 +912,7 @@ class Postgres(object):
         def unequal(prev_value) -> bool:
             return self._get_param_value(param) != prev_value
 
+        self.drop_snapshot()
         if reset:
             prev_value = self._get_param_value(param)
             logging.info(f'ACTION. Resetting {param} with ALTER SYSTEM')
@@ -940,6 +1099,7 @@ class Postgres(object):
         """
         Start PG server on current host
         """
+        self.drop_snapshot()
         return self._cmd_manager.start_postgresql(timeout, self.pgdata)
 
     def get_postgresql_status(self):
@@ -954,6 +1114,7 @@ class Postgres(object):
 
         If synchronous replication is ON, but sync replica is dead, then we aren't able to stop PG.
         """
+        self.drop_snapshot()
         return self._cmd_manager.stop_postgresql(timeout, self.pgdata, wait=wait)
 
     def is_replaying_wal(self, check_time):
@@ -968,6 +1129,9 @@ class Postgres(object):
             self._pg_wal_replay("resume")
 
     def is_wal_replay_paused(self):
+        snapshot = self._from_snapshot('wal_replay_paused')
+        if snapshot is not None and snapshot.wal_replay_paused is not None:
+            return snapshot.wal_replay_paused
         return self._exec_query('SELECT pg_is_wal_replay_paused();').fetchone()[0]
 
     def ensure_replaying_wal(self):
@@ -1036,6 +1200,7 @@ class Postgres(object):
 
     def _pg_wal_replay(self, pause_or_resume):
         logging.info('ACTION. WAL replay: %s', pause_or_resume)
+        self.drop_snapshot()
         self._exec_query(f'SELECT pg_wal_replay_{pause_or_resume}();')
 
     def check_extension_installed(self, name):
@@ -1057,25 +1222,30 @@ class Postgres(object):
             if not primary:
                 return False
         append = self.config.append_primary_conn_string
-        if check_primary and ('target_session_attrs' not in append):
-            ensure_connect_primary = 'target_session_attrs=primary'
-        else:
-            ensure_connect_primary = ''
+        own_session_attrs = 'target_session_attrs' in append
+        params = ['host=%s' % primary, append]
+        if 'keepalives' not in append:
+            params.append(KEEPALIVE_PARAMS)
+        ensure_primary = check_primary and not own_session_attrs
+        if ensure_primary:
+            params.append('target_session_attrs=primary')
+        conninfo = ' '.join(param for param in params if param)
 
         try:
-            conn = psycopg2.connect('host=%s %s %s' % (primary, append, ensure_connect_primary))
-            conn.autocommit = True
-            cur = conn.cursor()
-            cur.execute('SELECT 42')
-            result = cur.fetchone()
-            if result and result[0] == 42:
-                return False
-            return True
+            # target_session_attrs is only checked on connect: a pooled connection
+            # must tell by itself whether the host is still a primary. Attributes set
+            # in append_primary_conn_string can only be checked by libpq, so such
+            # probes open a new connection every time.
+            in_recovery = self._probe_pool.probe(conninfo, 'SELECT pg_is_in_recovery()', reuse=not own_session_attrs)
         except Exception as err:
             logging.debug('%s while trying to check primary health.', str(err))
             return True
+        if in_recovery is None:
+            return True
+        return ensure_primary and bool(in_recovery)
 
     def reload(self):
+        self.drop_snapshot()
         return not bool(self._cmd_manager.reload_postgresql(self.pgdata))
 
 
@@ -1094,6 +1264,7 @@ def build_postgres_config(config: RawConfigParser) -> PostgresConfig:
         postgres_timeout=config.getfloat('global', 'postgres_timeout'),
         iteration_timeout=config.getfloat('global', 'iteration_timeout'),
         append_primary_conn_string=config.get('global', 'append_primary_conn_string', fallback=''),
+        primary_probe_timeout=config.getfloat('global', 'primary_probe_timeout', fallback=0.0),
         wals_to_upload=config.getint('global', 'wals_to_upload'),
     )
 
@@ -0,0 +1,238 @@
+# encoding: utf-8
+"""
+Reader of PostgreSQL's global/pg_control file.
+
+Replaces the `pg_controldata | grep` subprocess for the few fields pgconsul
+needs. The file holds ControlFileData in the server's native byte order and
+alignment, so each supported PG_CONTROL_VERSION is described as a ctypes
+structure. A file is trusted only if its CRC-32C matches and some fields with
+known values are in place. Anything else (unknown version, torn read, missing
+permissions) returns None, and Postgres falls back to the configured
+get_control_parameter command.
+"""
+
+import ctypes
+import logging
+import os
+import sys
+from dataclasses import dataclass
+
+
+def _make_crc32c_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _make_crc32c_table()
+
+
+def crc32c(data: bytes) -> int:
+    """CRC-32C (Castagnoli), as computed by PostgreSQL's COMP_CRC32C."""
+    crc = 0xFFFFFFFF
+    for byte in data:
+        crc = _CRC32C_TABLE[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def _checkpoint_struct(with_wal_level: bool) -> type[ctypes.Structure]:
+    """CheckPoint from catalog/pg_control.h (PG 12+; wal_level since PG 17)."""
+    fields = [
+        ('redo', ctypes.c_uint64),
+        ('this_timeline_id', ctypes.c_uint32),
+        ('prev_timeline_id', ctypes.c_uint32),
+        ('full_page_writes', ctypes.c_bool),
+    ]
+    if with_wal_level:
+        fields.append(('wal_level', ctypes.c_int))
+    fields += [
+        ('next_xid', ctypes.c_uint64),
+        ('next_oid', ctypes.c_uint32),
+        ('next_multi', ctypes.c_uint32),
+        ('next_multi_offset', ctypes.c_uint32),
+        ('oldest_xid', ctypes.c_uint32),
+        ('oldest_xid_db', ctypes.c_uint32),
+        ('oldest_multi', ctypes.c_uint32),
+        ('oldest_multi_db', ctypes.c_uint32),
+        ('time', ctypes.c_int64),
+        ('oldest_commit_ts_xid', ctypes.c_uint32),
+        ('newest_commit_ts_xid', ctypes.c_uint32),
+        ('oldest_active_xid', ctypes.c_uint32),
+    ]
+    return type('CheckPoint', (ctypes.Structure,), {'_fields_': fields})
+
+
+def _control_file_struct(
+    checkpoint: type[ctypes.Structure], float4_by_val: bool, default_char_signedness: bool
+) -> type[ctypes.Structure]:
+    """ControlFileData from catalog/pg_control.h."""
+    fields = [
+        ('system_identifier', ctypes.c_uint64),
+        ('pg_control_version', ctypes.c_uint32),
+        ('catalog_version_no', ctypes.c_uint32),
+        ('state', ctypes.c_int),
+        ('time', ctypes.c_int64),
+        ('check_point', ctypes.c_uint64),
+        ('check_point_copy', checkpoint),
+        ('unlogged_lsn', ctypes.c_uint64),
+        ('min_recovery_point', ctypes.c_uint64),
+        ('min_recovery_point_tli', ctypes.c_uint32),
+        ('backup_start_point', ctypes.c_uint64),
+        ('backup_end_point', ctypes.c_uint64),
+        ('backup_end_required', ctypes.c_bool),
+        ('wal_level', ctypes.c_int),
+        ('wal_log_hints', ctypes.c_bool),
+        ('max_connections', ctypes.c_int),
+        ('max_worker_processes', ctypes.c_int),
+        ('max_wal_senders', ctypes.c_int),
+        ('max_prepared_xacts', ctypes.c_int),
+        ('max_locks_per_xact', ctypes.c_int),
+        ('track_commit_timestamp', ctypes.c_bool),
+        ('max_align', ctypes.c_uint32),
+        ('float_format', ctypes.c_double),
+        ('blcksz', ctypes.c_uint32),
+        ('relseg_size', ctypes.c_uint32),
+        ('xlog_blcksz', ctypes.c_uint32),
+        ('xlog_seg_size', ctypes.c_uint32),
+        ('name_data_len', ctypes.c_uint32),
+        ('index_max_keys', ctypes.c_uint32),
+        ('toast_max_chunk_size', ctypes.c_uint32),
+        ('loblksize', ctypes.c_uint32),
+    ]
+    if float4_by_val:
+        fields.append(('float4_by_val', ctypes.c_bool))
+    fields += [
+        ('float8_by_val', ctypes.c_bool),
+        ('data_checksum_version', ctypes.c_uint32),
+    ]
+    if default_char_signedness:
+        fields.append(('default_char_signedness', ctypes.c_bool))
+    fields += [
+        ('mock_authentication_nonce', ctypes.c_char * 32),
+        ('crc', ctypes.c_uint32),
+    ]
+    return type('ControlFileData', (ctypes.Structure,), {'_fields_': fields})
+
+
+# PG_CONTROL_VERSION -> layout. 1300 covers PG 13-16.
+LAYOUTS: dict[int, type[ctypes.Structure]] = {
+    1201: _control_file_struct(_checkpoint_struct(with_wal_level=False), float4_by_val=True, default_char_signedness=False),
+    1300: _control_file_struct(_checkpoint_struct(with_wal_level=False), float4_by_val=False, default_char_signedness=False),
+    1700: _control_file_struct(_checkpoint_struct(with_wal_level=True), float4_by_val=False, default_char_signedness=False),
+    1800: _control_file_struct(_checkpoint_struct(with_wal_level=True), float4_by_val=False, default_char_signedness=True),
+}
+
+# pg_control_version sits right after the 8-byte system identifier in every layout.
+_VERSION_OFFSET = 8
+
+# FLOATFORMAT_VALUE: written to catch float format mismatches, doubles as a layout check.
+FLOAT_FORMAT_VALUE = 1234567.0
+
+# DBState names as printed by pg_controldata.
+DB_STATES = (
+    'starting up',
+    'shut down',
+    'shut down in recovery',
+    'shutting down',
+    'in crash recovery',
+    'in archive recovery',
+    'in production',
+)
+
+
+def _control_version(data: bytes) -> int:
+    return int.from_bytes(data[_VERSION_OFFSET:_VERSION_OFFSET + 4], byteorder=sys.byteorder)
+
+
+@dataclass(frozen=True)
+class PgControlData:
+    """Fields of pg_control pgconsul reads."""
+    pg_control_version: int
+    state: str
+    timeline: int
+    wal_log_hints: bool
+    data_checksum_version: int
+
+    def parameter(self, name: str) -> str | None:
+        """Value of a pg_controldata line (name as passed to get_control_parameter), formatted like pg_controldata."""
+        values = {
+            'Latest checkpoint.s TimeLineID': str(self.timeline),
+            'Database cluster state': self.state,
+            'Data page checksum version': str(self.data_checksum_version),
+            'wal_log_hints setting': 'on' if self.wal_log_hints else 'off',
+        }
+        return values.get(name)
+
+
+def parse_pg_control(data: bytes) -> PgControlData | None:
+    """Parse the content of global/pg_control. None if the version is unknown or the content fails validation."""
+    if len(data) < _VERSION_OFFSET + 4:
+        logging.debug('pg_control is too short: %d bytes', len(data))
+        return None
+    version = _control_version(data)
+    layout = LAYOUTS.get(version)
+    if layout is None:
+        logging.debug('Unknown pg_control version %d', version)
+        return None
+    if len(data) < ctypes.sizeof(layout):
+        logging.debug('pg_control is too short for version %d: %d bytes', version, len(data))
+        return None
+    control = layout.from_buffer_copy(data[:ctypes.sizeof(layout)])
+    if crc32c(data[:layout.crc.offset]) != control.crc:
+        logging.debug('pg_control CRC mismatch (version %d)', version)
+        return None
+    if control.float_format != FLOAT_FORMAT_VALUE or not 0 <= control.state < len(DB_STATES):
+        logging.debug('pg_control fields are not where layout %d expects them', version)
+        return None
+    return PgControlData(
+        pg_control_version=version,
+        state=DB_STATES[control.state],
+        timeline=control.check_point_copy.this_timeline_id,
+        wal_log_hints=bool(control.wal_log_hints),
+        data_checksum_version=control.data_checksum_version,
+    )
+
+
+class PgControlReader(object):
+    """
+    Read pg_control of a data directory, re-parsing only when its content changes.
+
+    The file is read every time: PostgreSQL rewrites it in place with the same
+    size, and two writes within one clock tick (a shutdown checkpoint) keep the
+    same mtime, so stat cannot tell whether it changed. Reading 8 kB is cheap.
+    """
+
+    def __init__(self):
+        self._path: str | None = None
+        self._content: bytes | None = None
+        self._data: PgControlData | None = None
+        self._unsupported_logged: set[int] = set()
+
+    def read(self, pgdata: str) -> PgControlData | None:
+        """Parsed pg_control of pgdata, None if it cannot be read natively."""
+        if not pgdata:
+            return None
+        path = os.path.join(pgdata, 'global', 'pg_control')
+        try:
+            with open(path, 'rb') as fobj:
+                content = fobj.read()
+        except OSError as exc:
+            logging.debug('Could not read %s: %s', path, exc)
+            return None
+        if path == self._path and content == self._content:
+            return self._data
+        data = parse_pg_control(content)
+        if data is None:
+            self._log_unsupported(content)
+        self._path, self._content, self._data = path, content, data
+        return data
+
+    def _log_unsupported(self, content: bytes) -> None:
+        version = _control_version(content)
+        if version not in LAYOUTS and version not in self._unsupported_logged:
+            self._unsupported_logged.add(version)
+            logging.info('pg_control version %d is not supported natively, using get_control_parameter command', version)
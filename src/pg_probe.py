@@ -0,0 +1,137 @@
+# encoding: utf-8
+"""
+Health probes of remote PostgreSQL hosts (Postgres.is_host_unreachable).
+
+A probe used to open a new connection (TCP, TLS, authentication) every time.
+ProbeConnectionPool keeps one connection per probed host and runs a cheap
+query on it. Connections are asynchronous (libpq ignores connect_timeout for
+them), so the whole probe, a retry included, is bounded by one deadline, and
+TCP keepalives are enabled so an idle pooled socket to a dead host is noticed
+by the kernel.
+"""
+
+import logging
+import re
+import select
+import time
+from collections import OrderedDict
+
+import psycopg2
+import psycopg2.extensions
+
+# Added to the probe conninfo unless append_primary_conn_string sets keepalives itself.
+KEEPALIVE_PARAMS = 'keepalives=1 keepalives_idle=5 keepalives_interval=1 keepalives_count=3'
+
+
+# Probe deadline when neither primary_probe_timeout nor connect_timeout is set.
+DEFAULT_PROBE_TIMEOUT = 1.0
+
+_CONNECT_TIMEOUT_RE = re.compile(r'(?:^|\s)connect_timeout\s*=\s*(\d+)')
+
+
+class ProbeTimeout(Exception):
+    """The probe did not finish before its deadline."""
+
+
+def probe_timeout(configured: float, append_conn_string: str) -> float:
+    """Deadline of one probe: configured if positive, else connect_timeout of append_conn_string, else DEFAULT_PROBE_TIMEOUT."""
+    if configured > 0:
+        return configured
+    match = _CONNECT_TIMEOUT_RE.search(append_conn_string)
+    if match and int(match.group(1)) > 0:
+        return float(match.group(1))
+    return DEFAULT_PROBE_TIMEOUT
+
+
+def _wait(conn, deadline: float) -> None:
+    """Drive an asynchronous psycopg2 connection until the current operation completes or the deadline passes."""
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ProbeTimeout()
+        if state == psycopg2.extensions.POLL_READ:
+            select.select([conn.fileno()], [], [], remaining)
+        elif state == psycopg2.extensions.POLL_WRITE:
+            select.select([], [conn.fileno()], [], remaining)
+        else:
+            raise psycopg2.OperationalError(f'Unexpected poll state {state}')
+
+
+class ProbeConnectionPool(object):
+    """
+    Persistent probe connections, one per conninfo, at most MAX_CONNECTIONS.
+
+    probe() runs the query on the pooled connection. If that fails, the
+    connection may simply be stale (host restarted since the last probe),
+    so it is dropped and the probe is repeated once on a new connection;
+    only a failure of the new connection reports the host as unreachable.
+    Both attempts share one deadline of timeout seconds.
+    """
+
+    # Primary, replication source, switchover target...: a handful of hosts at most.
+    MAX_CONNECTIONS = 4
+
+    def __init__(self, timeout: float):
+        self._timeout = timeout
+        self._connections: OrderedDict[str, psycopg2.extensions.connection] = OrderedDict()
+
+    def probe(self, conninfo: str, query: str, reuse: bool = True):
+        """First column of the query's first row, run on conninfo. Raises on failure or timeout.
+
+        With reuse=False the probe runs on a new connection that is closed afterwards.
+        """
+        deadline = time.monotonic() + self._timeout
+        conn = self._connections.pop(conninfo, None)
+        if conn is not None and (conn.closed or not reuse):
+            self._close(conn)
+        elif conn is not None:
+            try:
+                result = self._query(conn, query, deadline)
+                self._keep(conninfo, conn)
+                return result
+            except Exception as err:
+                logging.debug('Probe on pooled connection failed (%s), retrying on a new one.', err)
+                self._close(conn)
+            if time.monotonic() >= deadline:
+                raise ProbeTimeout()
+
+        conn = psycopg2.connect(conninfo, async_=True)
+        try:
+            _wait(conn, deadline)
+            result = self._query(conn, query, deadline)
+        except Exception:
+            self._close(conn)
+            raise
+        if reuse:
+            self._keep(conninfo, conn)
+        else:
+            self._close(conn)
+        return result
+
+    def close(self) -> None:
+        while self._connections:
+            _, conn = self._connections.popitem()
+            self._close(conn)
+
+    def _query(self, conn, query: str, deadline: float):
+        with conn.cursor() as cur:
+            cur.execute(query)
+            _wait(conn, deadline)
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def _keep(self, conninfo: str, conn) -> None:
+        self._connections[conninfo] = conn
+        while len(self._connections) > self.MAX_CONNECTIONS:
+            _, evicted = self._connections.popitem(last=False)
+            self._close(evicted)
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error as err:
+            logging.debug('Failed to close probe connection: %s', err)
@@ -257,10 +257,10 @@ class ReplicationManager:
         return self.change_replication_to_quorum(quorum_hosts)
 
     def enter_sync_group(self, replica_infos: ReplicaInfos):
-        self._zk.acquire_lock(self._zk.get_host_quorum_path())
+        self._zk.register_quorum_member()
 
     def leave_sync_group(self):
-        self._zk.release_if_hold(self._zk.get_host_quorum_path())
+        self._zk.unregister_quorum_member()
 
     def remove_self_from_quorum_after_promote(self) -> None:
         """Remove winner from ZK quorum after promote (MDB-41951).
@@ -148,6 +148,22 @@ class ReplicationSlotManager:
         self._create_missing_slots(slot_names, current)
         return True
 
+    def drop_slots_for_hosts(self, hosts: list[str]) -> bool:
+        """Drop the slots of the given host FQDNs and forget their drop countdown (departed hosts).
+
+        Once a host is gone from all_hosts handle_slots never sees it again, so
+        its slot has to go before its ZK nodes do.
+        Pure primitive (ADR-0002): propagates PostgresConnectionError to the caller.
+        """
+        for host in hosts:
+            self._drop_countdown.pop(host, None)
+        if not self._config.use_replication_slots or not hosts:
+            return True
+        slot_names = [helpers.app_name_from_fqdn(fqdn) for fqdn in hosts]
+        current = self._db.get_replication_slots()
+        self._drop_redundant_slots(slot_names, current)
+        return True
+
     def reset_on_promote(self) -> None:
         """Reset the drop countdown after a promote."""
         self._drop_countdown = {}
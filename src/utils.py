@@ -296,11 +296,8 @@ class Switchover:
         quorum_holders = []
         for _ in range(timeout):
             time.sleep(1)
-            quorum_holders = [
-                h
-                for h in ha_group
-                if self._zk.get_current_lock_holder(self._zk.get_host_quorum_path(h)) is not None
-            ]
+            sync_quorum_hosts = set(self._zk.get_sync_quorum_hosts())
+            quorum_holders = [h for h in ha_group if h in sync_quorum_hosts]
             self._log.debug('quorum locks held: %s', (', '.join(quorum_holders) or 'none'))
             if len(quorum_holders) >= min_replicas:
                 return
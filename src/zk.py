@@ -3,13 +3,19 @@
 Zookeeper wrapper module. Zookeeper class defined here.
 """
 
+import hashlib
 import json
 import logging
 import time
 from configparser import RawConfigParser
 from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable
 
 from . import helpers
+from .zk_cache import ZkWatchCache
+from .zk_memo import ZkReadMemo
+from .zk_scheduler import ZkOpPriority, ZkOpScheduler
 from .zk_client import (
     LockHandle,
     ZkClient,
@@ -18,17 +24,69 @@ from .zk_client import (
     ZkConnectionState,
     ZkLockTimeout,
     ZkNoNodeError,
+    ZkReadOnlyError,
     ZkSessionExpiredError,
     create_zk_client,
+    encode_compact,
+    first_lock_node,
+    lock_version_from_children,
 )
 
 
+class MembershipRegistry(Enum):
+    """How hosts publish alive / quorum membership."""
+    # Per-host lock (legacy): readers list contenders of every host.
+    LOCK = 'lock'
+    # Rolling upgrade: hosts publish both, readers prefer the registry.
+    COMPAT = 'compat'
+    # One ephemeral node per host: the whole set is one get_children call.
+    REGISTRY = 'registry'
+
+
+class HostRecordSchema(Enum):
+    """Layout of per-host state under all_hosts/<fqdn>."""
+    # One node per field (legacy).
+    V1 = 'v1'
+    # Rolling upgrade: hosts also publish the consolidated record, readers use per-field nodes.
+    DUAL = 'dual'
+    # Readers load the whole membership from records, per-field nodes remain a fallback.
+    V2 = 'v2'
+
+
+@dataclass(frozen=True)
+class ZkWrite:
+    """One node write of an atomic batch (see Zookeeper.write_batch)."""
+    key: str
+    data: Any
+    preproc: Callable | None = None
+    need_lock: bool = True
+
+
 @dataclass
 class ZookeeperConfig:
     release_lock_after_acquire_failed: bool
     timeout: float
     path_prefix: str
     lock_contender_name: str | None = None
+    state_snapshot: bool = False
+    watch_cache: bool = False
+    membership_registry: MembershipRegistry = MembershipRegistry.LOCK
+    # Seconds an unchanged payload may go unwritten (write_if_changed); 0 disables suppression.
+    write_refresh_interval: float = 0.0
+    # Write large JSON nodes (COMPACT_KEYS) with the compact binary encoding; reading is always dual.
+    compact_encoding: bool = False
+    host_record_schema: HostRecordSchema = HostRecordSchema.V1
+    cluster_summary: bool = False
+    # Max age (seconds) of a memoized read within one iteration; 0 disables the memo.
+    read_memo_max_age: float = 0.0
+    # Max deferred telemetry writes per iteration; 0 means no limit.
+    telemetry_budget: int = 0
+    # Smoothed ZK latency (seconds) above which telemetry writes are dropped; 0 disables.
+    telemetry_max_latency: float = 0.0
+
+
+# Highest priority first.
+_PRIORITY_ORDER = [ZkOpPriority.CRITICAL, ZkOpPriority.STATE, ZkOpPriority.TELEMETRY]
 
 
 class ZookeeperException(Exception):
@@ -46,6 +104,9 @@ class Zookeeper(object):
 
     QUORUM_PATH = 'quorum'
     QUORUM_MEMBER_LOCK_PATH = f'{QUORUM_PATH}/members/%s'
+    # '_' never appears in a FQDN, so the registry cannot clash with a host lock path.
+    QUORUM_REGISTRY_PATH = f'{QUORUM_PATH}/members/_registry'
+    HOST_QUORUM_REGISTRY_PATH = f'{QUORUM_REGISTRY_PATH}/%s'
 
     REPLICS_INFO_PATH = 'replics_info'
     TIMELINE_INFO_PATH = 'timeline'
@@ -66,11 +127,19 @@ class Zookeeper(object):
     MAINTENANCE_PRIMARY_PATH = f'{MAINTENANCE_PATH}/master'
     HOST_MAINTENANCE_PATH = f'{MAINTENANCE_PATH}/%s'
     HOST_ALIVE_LOCK_PATH = 'alive/%s'
+    ALIVE_REGISTRY_PATH = 'alive/_registry'
+    HOST_ALIVE_REGISTRY_PATH = f'{ALIVE_REGISTRY_PATH}/%s'
+    # Ephemeral held by the running daemon whatever the state of local PostgreSQL.
+    HOST_DAEMON_PATH = 'daemons/%s'
     HOST_REPLICATION_SOURCES = 'replication_sources'
     TIMINGS_PATH = 'timing/%s'
 
     SINGLE_NODE_PATH = 'is_single_node'
 
+    # One-read view of the cluster published by the primary (zk_cluster_summary).
+    CLUSTER_SUMMARY_PATH = 'cluster_summary'
+    CLUSTER_SUMMARY_VERSION = 1
+
     ELECTION_ENTER_LOCK_PATH = 'enter_election'
     ELECTION_MANAGER_LOCK_PATH = 'epoch_manager'
     ELECTION_WINNER_PATH = 'election_winner'
@@ -87,12 +156,86 @@ class Zookeeper(object):
     SSN_PATH = f'{MEMBERS_PATH}/%s/synchronous_standby_names'
     SSN_VALUE_PATH = f'{SSN_PATH}/value'
     SSN_DATE_PATH = f'{SSN_PATH}/last_update'
+    # Schema v2: one JSON record with every field the host owns (op and
+    # tried_remaster are written by other hosts / CLI and stay separate nodes).
+    HOST_RECORD_PATH = f'{MEMBERS_PATH}/%s/record'
+    HOST_RECORD_VERSION = 2
+
+    # Mostly-static nodes served from memory when zk_watch_cache is enabled.
+    WATCH_CACHE_DATA_PATHS = (
+        TIMELINE_INFO_PATH,
+        MAINTENANCE_PATH,
+        MAINTENANCE_TIME_PATH,
+        MAINTENANCE_PRIMARY_PATH,
+        LAST_FAILOVER_TIME_PATH,
+        LAST_SWITCHOVER_TIME_PATH,
+        SWITCHOVER_PRIMARY_PATH,
+        SWITCHOVER_CANDIDATE,
+        SWITCHOVER_SIDE_REPLICAS,
+        SWITCHOVER_STATE_PATH,
+    )
+    WATCH_CACHE_CHILDREN_PATHS = (MEMBERS_PATH,)
+
+    # Subtrees owned by one host, removed together when it leaves the cluster (delete_host_nodes).
+    HOST_NODE_PATHS = (
+        f'{MEMBERS_PATH}/%s',
+        HOST_ALIVE_LOCK_PATH,
+        ELECTION_VOTE_PATH,
+        f'{HOST_REPLICATION_SOURCES}/%s',
+        HOST_MAINTENANCE_PATH,
+        QUORUM_MEMBER_LOCK_PATH,
+    )
+    # Children of the HOST_NODE_PATHS parents that are not hostnames.
+    HOST_NODE_RESERVED_NAMES = ('ts', 'master')
+
+    # Max ops per multi transaction of apply_bulk (well below the default 1 MB jute.maxbuffer).
+    BULK_CHUNK_SIZE = 500
+
+    # Nodes (and their subtrees) of the leader lock, elections and failover / switchover coordination.
+    CRITICAL_PATHS = (
+        PRIMARY_LOCK_PATH,
+        PRIMARY_SWITCH_LOCK_PATH,
+        FAILOVER_STATE_PATH,
+        FAILOVER_MUST_BE_RESET,
+        CURRENT_PROMOTING_HOST,
+        SWITCHOVER_ROOT_PATH,
+        ELECTION_ENTER_LOCK_PATH,
+        ELECTION_MANAGER_LOCK_PATH,
+        ELECTION_WINNER_PATH,
+        ELECTION_STATUS_PATH,
+        'election_vote',
+    )
+    # Per-host nodes under all_hosts/<fqdn> that are only reported, never acted on
+    # (zk_telemetry_budget). replics_info and wal_receiver are not among them: cascade
+    # and catch-up decisions read them from other hosts, so they are state.
+    TELEMETRY_HOST_NODES = ('synchronous_standby_names',)
+    # Cluster-wide nodes only displayed (pgconsul-util), never acted on by the daemon.
+    TELEMETRY_PATHS = (CLUSTER_SUMMARY_PATH,)
+
+    # Large pg_stat_replication-derived JSON nodes written with zk_compact_encoding.
+    COMPACT_KEYS = (REPLICS_INFO_PATH,)
+    COMPACT_HOST_NODES = ('replics_info', 'wal_receiver', 'record')
 
     def __init__(self, zk_client: ZkClient, config: ZookeeperConfig):
         self.config = config
         self._locks: dict[str, LockHandle] = {}
         self._lockpath = self.config.path_prefix + self.PRIMARY_LOCK_PATH
         self._zk_client = zk_client
+        self._cache: ZkWatchCache | None = None
+        # key -> (payload digest, monotonic write time, fence path) of our last real write.
+        self._write_digests: dict[str, tuple[bytes, float, str | None]] = {}
+        # Fields of this host's record last written through this instance (schema v2).
+        self._own_record: dict = {}
+        # ZK session our HOST_DAEMON_PATH node was created in.
+        self._daemon_session: int | None = None
+        self._memo = ZkReadMemo(self.config.read_memo_max_age)
+        self._scheduler = ZkOpScheduler(self.config.telemetry_budget, self.config.telemetry_max_latency, zk_client.rtt)
+        if self.config.watch_cache:
+            self._cache = ZkWatchCache(
+                zk_client,
+                data_paths=self.WATCH_CACHE_DATA_PATHS,
+                children_paths=self.WATCH_CACHE_CHILDREN_PATHS,
+            )
         self._zk_client.set_state_listener(self._listener)
         self._init_lock(self.PRIMARY_LOCK_PATH)
 
@@ -124,6 +267,13 @@ class Zookeeper(object):
 
     def _listener(self, state: ZkConnectionState):
         """Business logic listener for ZkClient state changes."""
+        if self._cache is not None:
+            # Runs on the kazoo thread: only drop values here, watches are re-armed
+            # lazily by the next lookup from the main loop.
+            self._cache.disarm()
+        # Nodes may have changed behind our back while disconnected.
+        self._write_digests = {}
+        self._memo.clear()
         if state == ZkConnectionState.LOST:
             logging.error("Connection to ZK lost, clean all locks.")
             self._locks = {}
@@ -133,12 +283,29 @@ class Zookeeper(object):
             logging.info("Reconnected to ZK.")
 
     def _write(self, path, data, need_lock=True):
-        # Each locked write checks lock ownership via a ZK round-trip (contenders()).
-        # Local caching would risk stale state; the round-trip is intentional.
-        if need_lock and self.get_current_lock_holder() != self._get_lock_contender_name():
+        if not need_lock:
+            return self._zk_client.write(path, data)
+        # Locked writes are fenced by our own leader lock node: the check and the
+        # write commit in one transaction, so a deposed primary cannot write.
+        fence_path = self._leader_fence_path()
+        if fence_path is not None:
+            return self._zk_client.write_fenced(path, data, fence_path)
+        # Lock not held through this session (e.g. CLI with a contender name):
+        # fall back to a holder check, which costs a contenders() round trip.
+        if self.get_current_lock_holder() != self._get_lock_contender_name():
             return False
         return self._zk_client.write(path, data)
 
+    def _write_batch(self, writes, need_lock=True):
+        fence_path = self._leader_fence_path() if need_lock else None
+        if need_lock and fence_path is None and self.get_current_lock_holder() != self._get_lock_contender_name():
+            return False
+        return self._zk_client.write_batch(writes, fence_path=fence_path)
+
+    def _leader_fence_path(self):
+        lock = self._locks.get(self.PRIMARY_LOCK_PATH)
+        return lock.node_path() if lock is not None else None
+
     def _init_lock(self, name, read_lock=False):
         path = self.config.path_prefix + name
         if read_lock:
@@ -149,7 +316,7 @@ class Zookeeper(object):
 
     def _acquire_lock(self, name, allow_queue, timeout, read_lock=False):
         if timeout is None:
-            timeout = self.config.timeout
+            timeout = self._zk_client.op_timeout()
         if not self._zk_client.is_connected():
             logging.warning('Not able to acquire %s ' % name + 'lock without alive connection.')
             return False
@@ -172,6 +339,7 @@ class Zookeeper(object):
             if not (allow_queue or read_lock):
                 logging.warning('%s lock is already taken by %s.', name[0].upper() + name[1:], contenders[0])
                 return False
+        self._memo.invalidate(self._memo_path(name))
         try:
             acquired = lock.acquire(blocking=True, timeout=timeout)
             if not acquired:
@@ -179,6 +347,9 @@ class Zookeeper(object):
         except ZkLockTimeout:
             logging.warning('Unable to obtain lock %s within timeout (%s s)', name, timeout)
             acquired = False
+        except ZkReadOnlyError:
+            logging.warning('Not able to acquire %s lock on a read-only ZK server.', name)
+            acquired = False
         except ZkClientError:
             logging.exception('Unexpected error while acquiring lock "%s"', name)
             acquired = False
@@ -203,11 +374,16 @@ class Zookeeper(object):
             del self._locks[name]
 
     def _release_lock(self, name: str):
+        self._memo.invalidate(self._memo_path(name))
         if name in self._locks:
             lock = self._locks[name]
             self._delete_lock(name)
             return lock.release()
 
+    def is_read_only(self) -> bool:
+        """True while connected to a read-only ZK server (zk_read_only_mode, ensemble without quorum)."""
+        return self._zk_client.is_read_only()
+
     def is_alive(self):
         """Return True if we are connected to zk"""
         return self._zk_client.is_alive()
@@ -221,6 +397,10 @@ class Zookeeper(object):
         """
         logging.debug("Reconnecting to ZooKeeper")
         self._drop_all_locks()
+        if self._cache is not None:
+            self._cache.disarm()
+        self._write_digests = {}
+        self._memo.clear()
 
         connected = self._zk_client.reconnect()
 
@@ -238,19 +418,88 @@ class Zookeeper(object):
         except Exception:
             logging.exception('Unexpected error during re_init')
 
+    def begin_iteration(self) -> None:
+        """Open the read memo and the op scheduler for one main loop iteration (each opt-in)."""
+        self._memo.open()
+        self._scheduler.open()
+
+    def end_iteration(self) -> tuple[int, int]:
+        """Run deferred telemetry writes, close the read memo. Returns (hits, misses) of the iteration."""
+        self._scheduler.flush()
+        return self._memo.close()
+
+    def op_priority(self, key) -> ZkOpPriority:
+        """Classify an operation on key (absolute or relative to the prefix)."""
+        path = self._memo_path(key)
+        for critical in self.CRITICAL_PATHS:
+            if path == critical or path.startswith(critical + '/'):
+                return ZkOpPriority.CRITICAL
+        if path in self.TELEMETRY_PATHS:
+            return ZkOpPriority.TELEMETRY
+        parts = path.split('/')
+        if len(parts) >= 3 and parts[0] == self.MEMBERS_PATH and parts[2] in self.TELEMETRY_HOST_NODES:
+            return ZkOpPriority.TELEMETRY
+        return ZkOpPriority.STATE
+
+    def zk_latency(self) -> float | None:
+        """Smoothed ZK round trip time of single requests in seconds (ZkClient.rtt), None before the first one."""
+        return self._zk_client.rtt()
+
+    def read_memo_stats(self) -> dict:
+        return {'hits': self._memo.hits, 'misses': self._memo.misses}
+
+    def _memo_path(self, path) -> str:
+        if path.startswith(self.config.path_prefix):
+            path = path[len(self.config.path_prefix):]
+        return path.strip('/')
+
+    def _seed_memo(self, batch) -> None:
+        """Make the results of a pipelined read_batch available to later reads of the iteration."""
+        if not self._memo.is_open():
+            return
+        for path, value in batch.data.items():
+            self._memo.store('get', self._memo_path(path), value)
+        for path, children in batch.children.items():
+            self._memo.store('children', self._memo_path(path), children)
+        for path, exists in batch.exists.items():
+            self._memo.store('exists', self._memo_path(path), exists)
+
+    def _cache_lookup(self, key) -> tuple[bool, str | None]:
+        if self._cache is None or not self._zk_client.is_connected():
+            return False, None
+        return self._cache.lookup(key)
+
+    def _cache_lookup_children(self, path) -> tuple[bool, list[str]]:
+        if self._cache is None or not self._zk_client.is_connected():
+            return False, []
+        return self._cache.lookup_children(path)
+
     def get(self, key, preproc=None, debug=False):
         """Get key value from zk"""
+        hit, value = self._cache_lookup(key)
+        if hit:
+            return self._preproc_read(key, value, preproc, debug)
+        memo_path = self._memo_path(key)
+        hit, value = self._memo.lookup('get', memo_path)
+        if hit:
+            return self._preproc_read(key, value, preproc, debug)
         try:
+            self._scheduler.observe(self.op_priority(key))
             value = self._zk_client.get(key)
         except ZkNoNodeError:
             if debug:
                 logging.debug(f"NoNodeError when trying to get {key}")
+            self._memo.store('get', memo_path, None)
             return None
         except ZkSessionExpiredError as exception:
             logging.error('ZK session expired during get operation')
             raise ZookeeperException(exception)
         except ZkClientError as exception:
             raise ZookeeperException(exception)
+        self._memo.store('get', memo_path, value)
+        return self._preproc_read(key, value, preproc, debug)
+
+    def _preproc_read(self, key, value, preproc=None, debug=False):
         if value is None:
             return None
         if preproc:
@@ -269,6 +518,7 @@ class Zookeeper(object):
 
     def ensure_path(self, path):
         """Check that path exists and create if not. Returns stat or None on error."""
+        self._memo.invalidate(self._memo_path(path))
         try:
             return self._zk_client.ensure_path(path)
         except ZkClientError:
@@ -276,8 +526,14 @@ class Zookeeper(object):
             return None
 
     def exists_path(self, path, catch_except=True):
+        memo_path = self._memo_path(path)
+        hit, exists = self._memo.lookup('exists', memo_path)
+        if hit:
+            return exists
         try:
-            return self._zk_client.exists(path)
+            exists = self._zk_client.exists(path)
+            self._memo.store('exists', memo_path, exists)
+            return exists
         except ZkClientError as e:
             logging.exception('Error checking if path exists: %s', path)
             if not catch_except:
@@ -288,8 +544,17 @@ class Zookeeper(object):
         """Get children nodes of path.
         Returns list ([] when node absent). Returns None / raises ZookeeperException on error.
         """
+        hit, children = self._cache_lookup_children(path)
+        if hit:
+            return children
+        memo_path = self._memo_path(path)
+        hit, children = self._memo.lookup('children', memo_path)
+        if hit:
+            return children
         try:
-            return self._zk_client.get_children(path)
+            children = self._zk_client.get_children(path)
+            self._memo.store('children', memo_path, children)
+            return children
         except ZkClientError as e:
             logging.exception('Error getting children of path: %s', path)
             if not catch_except:
@@ -301,6 +566,20 @@ class Zookeeper(object):
         data = {'alive': self.is_alive()}
         if not data['alive']:
             raise ZookeeperException("Zookeeper connection is unavailable now")
+        if self.config.state_snapshot:
+            self._read_state_snapshot(data)
+        else:
+            self._read_state(data)
+
+        # Final liveness check: connection may have dropped during the reads above.
+        if not self.is_alive():
+            raise ZookeeperException("Zookeeper connection is unavailable now")
+        data['zk_server'] = self._zk_client.connected_server()
+        data['zk_rtt'] = self._zk_client.rtt_stats()
+        data['read_only'] = self.is_read_only()
+        return data
+
+    def _read_state(self, data: dict) -> None:
         data[self.REPLICS_INFO_PATH] = self.get(self.REPLICS_INFO_PATH, preproc=json.loads)
         data[self.LAST_FAILOVER_TIME_PATH] = self.get(self.LAST_FAILOVER_TIME_PATH, preproc=float)
         data[self.LAST_SWITCHOVER_TIME_PATH] = self.get(self.LAST_SWITCHOVER_TIME_PATH, preproc=float)
@@ -322,20 +601,140 @@ class Zookeeper(object):
         data[self.LAST_PRIMARY_PATH] = self.get(self.LAST_PRIMARY_PATH)
         data['synchronous_standby_names'] = self._get_ssn_info()
 
-        # Final liveness check: connection may have dropped during the reads above.
-        if not self.is_alive():
-            raise ZookeeperException("Zookeeper connection is unavailable now")
-        return data
+    def _read_state_snapshot(self, data: dict) -> None:
+        """Pipelined variant of _read_state: two round trips instead of one per node.
+
+        The first batch reads all plain values, the leader lock contenders and the
+        member list; the second one reads the lock holder node and per-member SSN info.
+        """
+        value_paths = (
+            self.REPLICS_INFO_PATH,
+            self.LAST_FAILOVER_TIME_PATH,
+            self.LAST_SWITCHOVER_TIME_PATH,
+            self.FAILOVER_STATE_PATH,
+            self.CURRENT_PROMOTING_HOST,
+            self.TIMELINE_INFO_PATH,
+            self.SWITCHOVER_PRIMARY_PATH,
+            self.SWITCHOVER_CANDIDATE,
+            self.SWITCHOVER_SIDE_REPLICAS,
+            self.SWITCHOVER_STATE_PATH,
+            self.MAINTENANCE_PATH,
+            self.MAINTENANCE_TIME_PATH,
+            self.LAST_PRIMARY_PATH,
+        )
+        # Nodes served by the watch cache are left out of the batch.
+        cached = {}
+        for path in value_paths:
+            hit, value = self._cache_lookup(path)
+            if hit:
+                cached[path] = value
+        members_cached, members = self._cache_lookup_children(self.MEMBERS_PATH)
+        try:
+            first = self._zk_client.read_batch(
+                get_paths=[path for path in value_paths if path not in cached],
+                children_paths=(self._lockpath,) if members_cached else (self._lockpath, self.MEMBERS_PATH),
+                exists_paths=(self.FAILOVER_MUST_BE_RESET, self.SINGLE_NODE_PATH),
+            )
+            first.data.update(cached)
+            if not members_cached:
+                members = first.children[self.MEMBERS_PATH]
+            lock_children = first.children[self._lockpath]
+            holder_node = first_lock_node(lock_children)
+            holder_path = f'{self._lockpath}/{holder_node}' if holder_node else None
+            if self._reads_host_records():
+                ssn_paths = {}
+                record_paths = {host: self._get_host_record_path(host) for host in members}
+                second_paths = list(record_paths.values())
+            else:
+                record_paths = {}
+                ssn_paths = {
+                    host: (
+                        helpers.get_host_path(self.SSN_VALUE_PATH, host),
+                        helpers.get_host_path(self.SSN_DATE_PATH, host),
+                    )
+                    for host in members
+                }
+                second_paths = [path for pair in ssn_paths.values() for path in pair]
+            if holder_path:
+                second_paths.append(holder_path)
+            second = self._zk_client.read_batch(get_paths=second_paths)
+        except ZkSessionExpiredError as exception:
+            logging.error('ZK session expired during state snapshot')
+            raise ZookeeperException(exception)
+        except ZkClientError as exception:
+            raise ZookeeperException(exception)
+        self._seed_memo(first)
+        self._seed_memo(second)
+
+        values = first.data
+        data[self.REPLICS_INFO_PATH] = self._preproc_read(
+            self.REPLICS_INFO_PATH, values[self.REPLICS_INFO_PATH], json.loads
+        )
+        data[self.LAST_FAILOVER_TIME_PATH] = self._preproc_read(
+            self.LAST_FAILOVER_TIME_PATH, values[self.LAST_FAILOVER_TIME_PATH], float
+        )
+        data[self.LAST_SWITCHOVER_TIME_PATH] = self._preproc_read(
+            self.LAST_SWITCHOVER_TIME_PATH, values[self.LAST_SWITCHOVER_TIME_PATH], float
+        )
+        data[self.FAILOVER_STATE_PATH] = values[self.FAILOVER_STATE_PATH]
+        data[self.FAILOVER_MUST_BE_RESET] = first.exists[self.FAILOVER_MUST_BE_RESET]
+        data[self.CURRENT_PROMOTING_HOST] = values[self.CURRENT_PROMOTING_HOST]
+        data['lock_version'] = lock_version_from_children(lock_children)
+        holder = second.data.get(holder_path) if holder_path else None
+        if holder_path and holder is None:
+            # Holder node vanished between the two batches: fall back to a consistent listing.
+            holder = self.get_current_lock_holder()
+        data['lock_holder'] = holder
+        data['single_node'] = first.exists[self.SINGLE_NODE_PATH]
+        data[self.TIMELINE_INFO_PATH] = self._preproc_read(
+            self.TIMELINE_INFO_PATH, values[self.TIMELINE_INFO_PATH], int
+        )
+        data[self.SWITCHOVER_ROOT_PATH] = self._preproc_read(
+            self.SWITCHOVER_PRIMARY_PATH, values[self.SWITCHOVER_PRIMARY_PATH], json.loads
+        )
+        data[self.SWITCHOVER_CANDIDATE] = values[self.SWITCHOVER_CANDIDATE]
+        data[self.SWITCHOVER_SIDE_REPLICAS] = self._preproc_read(
+            self.SWITCHOVER_SIDE_REPLICAS, values[self.SWITCHOVER_SIDE_REPLICAS], json.loads
+        )
+        data[self.SWITCHOVER_STATE_PATH] = values[self.SWITCHOVER_STATE_PATH]
+        data[self.MAINTENANCE_PATH] = {
+            'status': values[self.MAINTENANCE_PATH],
+            'ts': values[self.MAINTENANCE_TIME_PATH],
+        }
+        data[self.LAST_PRIMARY_PATH] = values[self.LAST_PRIMARY_PATH]
+        data['synchronous_standby_names'] = {
+            host: (second.data[value_path], second.data[date_path])
+            for host, (value_path, date_path) in ssn_paths.items()
+        }
+        if record_paths:
+            records = {host: self._parse_host_record(host, second.data[path]) for host, path in record_paths.items()}
+            data['synchronous_standby_names'] = self._ssn_info_from_records(records)
 
     def _get_ssn_info(self) -> dict:
         ssn_info: dict = {}
         all_hosts = self.get_children(self.MEMBERS_PATH, catch_except=True)
         if not all_hosts:
             return ssn_info
+        if self._reads_host_records():
+            return self._ssn_info_from_records(self._noexcept_get_host_records(all_hosts))
         for host in all_hosts:
-            path_value = helpers.get_host_path(self.SSN_VALUE_PATH, host)
-            path_date = helpers.get_host_path(self.SSN_DATE_PATH, host)
-            ssn_info[host] = (self.get(path_value), self.get(path_date))
+            ssn_info[host] = self._get_legacy_ssn(host)
+        return ssn_info
+
+    def _get_legacy_ssn(self, host):
+        path_value = helpers.get_host_path(self.SSN_VALUE_PATH, host)
+        path_date = helpers.get_host_path(self.SSN_DATE_PATH, host)
+        return self.get(path_value), self.get(path_date)
+
+    def _ssn_info_from_records(self, records: dict) -> dict:
+        """SSN (value, last_update) per host; hosts without a record are read from per-field nodes."""
+        ssn_info = {}
+        for host, record in records.items():
+            if record is not None:
+                ssn = record.get('ssn') or (None, None)
+                ssn_info[host] = (ssn[0], ssn[1])
+            else:
+                ssn_info[host] = self._get_legacy_ssn(host)
         return ssn_info
 
     def _preproc_write(self, key, data, preproc):
@@ -345,18 +744,69 @@ class Zookeeper(object):
             sdata = str(data)
         return key, sdata
 
+    def _encode_value(self, key, sdata):
+        """Return the compact encoding of sdata when enabled for key and smaller, else sdata."""
+        if not self.config.compact_encoding or not self._is_compact_key(key):
+            return sdata
+        encoded = encode_compact(sdata)
+        return encoded if len(encoded) < len(sdata) else sdata
+
+    def _is_compact_key(self, key):
+        if key in self.COMPACT_KEYS:
+            return True
+        parts = key.split('/')
+        return len(parts) == 3 and parts[0] == self.MEMBERS_PATH and parts[2] in self.COMPACT_HOST_NODES
+
     def write(self, key, data, preproc=None, need_lock=True):
         """Write value to key in zk"""
         key, sdata = self._preproc_write(key, data, preproc)
+        self._memo.invalidate(self._memo_path(key))
         try:
-            return self._write(key, sdata, need_lock=need_lock)
+            self._scheduler.observe(self.op_priority(key))
+            written = self._write(key, self._encode_value(key, sdata), need_lock=need_lock)
+            if written and self._cache is not None:
+                self._cache.update(key, sdata)
+            return written
         except ZkSessionExpiredError as exception:
             logging.error('ZK session expired during write operation')
             raise ZookeeperException(exception)
+        except ZkReadOnlyError as exception:
+            logging.warning('Not writing zk node %s: ZK server is read-only', key)
+            raise ZookeeperException(exception)
         except ZkClientError as exception:
             logging.exception('Failed to write zk node %s (data size: %d bytes): %s', key, len(sdata), sdata)
             raise ZookeeperException(exception)
 
+    def write_batch(self, ops: list[ZkWrite]) -> bool:
+        """Write several keys in one all-or-nothing transaction.
+
+        The batch is fenced by the leader lock if any op needs the lock.
+        """
+        if not ops:
+            return True
+        writes = [self._preproc_write(op.key, op.data, op.preproc) for op in ops]
+        keys = [key for key, _ in writes]
+        for key in keys:
+            self._memo.invalidate(self._memo_path(key))
+        try:
+            encoded = [(key, self._encode_value(key, sdata)) for key, sdata in writes]
+            priority = min((self.op_priority(key) for key in keys), key=_PRIORITY_ORDER.index)
+            self._scheduler.observe(priority)
+            written = self._write_batch(encoded, need_lock=any(op.need_lock for op in ops))
+            if written and self._cache is not None:
+                for key, sdata in writes:
+                    self._cache.update(key, sdata)
+            return written
+        except ZkSessionExpiredError as exception:
+            logging.error('ZK session expired during batch write operation')
+            raise ZookeeperException(exception)
+        except ZkReadOnlyError as exception:
+            logging.warning('Not writing zk nodes %s: ZK server is read-only', ', '.join(keys))
+            raise ZookeeperException(exception)
+        except ZkClientError as exception:
+            logging.exception('Failed to write zk nodes %s', ', '.join(keys))
+            raise ZookeeperException(exception)
+
     def noexcept_write(self, key, data, preproc=None, need_lock=True):
         """Write value to key in zk without zk exceptions forwarding"""
         try:
@@ -365,18 +815,63 @@ class Zookeeper(object):
             logging.exception('Failed to write zk node')
             return False
 
+    def write_if_changed(self, key, data, preproc=None, need_lock=True):
+        """write() that skips a payload identical to our last successful write of key.
+
+        A real write is still forced every write_refresh_interval seconds, after
+        any connection state change, and (for locked writes) under a new leader
+        lock node, so a node changed or deleted by someone else is restored.
+        """
+        interval = self.config.write_refresh_interval
+        if interval <= 0:
+            return self.write(key, data, preproc=preproc, need_lock=need_lock)
+        _, sdata = self._preproc_write(key, data, preproc)
+        digest = hashlib.blake2b(sdata.encode(), digest_size=16).digest()
+        fence_path = self._leader_fence_path() if need_lock else None
+        now = time.monotonic()
+        cached = self._write_digests.pop(key, None)
+        if cached is not None and self._zk_client.is_connected():
+            cached_digest, written_at, cached_fence_path = cached
+            if cached_digest == digest and cached_fence_path == fence_path and now - written_at < interval:
+                self._write_digests[key] = cached
+                logging.debug('Skipping write of unchanged zk node %s', key)
+                return True
+        written = self.write(key, data, preproc=preproc, need_lock=need_lock)
+        if written:
+            self._write_digests[key] = (digest, now, fence_path)
+        return written
+
+    def noexcept_write_if_changed(self, key, data, preproc=None, need_lock=True):
+        """write_if_changed() without zk exceptions forwarding"""
+        try:
+            return self.write_if_changed(key, data, preproc=preproc, need_lock=need_lock)
+        except Exception:
+            logging.exception('Failed to write zk node')
+            return False
+
     def delete(self, key, recursive=False) -> bool:
         """Delete key from zk. Returns True on success or when absent, False on error."""
         try:
-            return self._zk_client.delete(key, recursive=recursive)
+            self._forget_write_digests(key)
+            self._memo.invalidate(self._memo_path(key))
+            deleted = self._zk_client.delete(key, recursive=recursive)
+            if deleted and self._cache is not None:
+                self._cache.delete_subtree(key)
+            return deleted
         except ZkClientError:
             logging.exception('Failed to delete zk node %s', key)
             return False
 
     def get_lock_contenders(self, name, catch_except=True, read_lock=False):
         """Get all hostnames competing for the lock, including the holder."""
+        memo_kind = 'read_contenders' if read_lock else 'contenders'
+        memo_path = self._memo_path(name)
+        hit, contenders = self._memo.lookup(memo_kind, memo_path)
+        if hit:
+            return contenders
         try:
             contenders = self._get_lock(name, read_lock).contenders()
+            self._memo.store(memo_kind, memo_path, contenders)
             if len(contenders) > 0:
                 return contenders
         except Exception as e:
@@ -463,7 +958,11 @@ class Zookeeper(object):
         """
         Persist value as the current SSN for this host in ZooKeeper.
         Writes value and timestamp only when stored value differs.
+        Telemetry: deferred to the end of the iteration by the op scheduler.
         """
+        return self._scheduler.submit(self._get_ssn_value_path(), lambda: self._write_ssn_on_changes(value))
+
+    def _write_ssn_on_changes(self, value) -> bool:
         try:
             hostname = helpers.get_hostname()
             value_path = self._get_ssn_value_path(hostname)
@@ -473,8 +972,12 @@ class Zookeeper(object):
             self.ensure_path(date_path)
 
             if self.get(value_path) != value:
+                now = time.time()
                 self.write(value_path, value, need_lock=False)
-                self.write(date_path, time.time(), need_lock=False)
+                self.write(date_path, now, need_lock=False)
+                self._own_record['ssn'] = [str(value), str(now)]
+            elif self._writes_host_record() and self._own_record.get('ssn', [None])[0] != str(value):
+                self._own_record['ssn'] = [str(value), self.get(date_path)]
 
             return True
         except Exception:
@@ -543,8 +1046,16 @@ class Zookeeper(object):
         if all_hosts is None:
             logging.error('Failed to get HA host list from ZK')
             return None
+        records = {}
+        if self._reads_host_records():
+            records = self._noexcept_get_host_records(all_hosts) if catch_except else self.get_host_records(all_hosts)
         ha_hosts = []
         for host in all_hosts:
+            record = records.get(host)
+            if record is not None:
+                if record.get('ha'):
+                    ha_hosts.append(host)
+                continue
             path = f"{self.MEMBERS_PATH}/{host}/ha"
             if self.exists_path(path, catch_except=catch_except):
                 ha_hosts.append(host)
@@ -591,9 +1102,7 @@ class Zookeeper(object):
         return helpers.get_host_path(self.HOST_REPLICS_INFO_PATH, hostname)
 
     def write_host_replics_info(self, replics_info, hostname=None) -> bool:
-        return self.noexcept_write(
-            self._get_host_replics_info_path(hostname), replics_info, preproc=json.dumps, need_lock=False
-        )
+        return self.noexcept_write_if_changed(self._get_host_replics_info_path(hostname), replics_info, preproc=json.dumps, need_lock=False)
 
     def get_host_replics_info(self, hostname) -> list | None:
         return self.get(self._get_host_replics_info_path(hostname), preproc=json.loads)
@@ -602,9 +1111,7 @@ class Zookeeper(object):
         return helpers.get_host_path(self.HOST_WAL_RECEIVER_PATH, hostname)
 
     def write_host_wal_receiver(self, wal_receiver_info, hostname=None) -> bool:
-        return self.noexcept_write(
-            self._get_host_wal_receiver_path(hostname), wal_receiver_info, preproc=json.dumps, need_lock=False
-        )
+        return self.noexcept_write_if_changed(self._get_host_wal_receiver_path(hostname), wal_receiver_info, preproc=json.dumps, need_lock=False)
 
     def get_host_wal_receiver(self, hostname) -> dict | None:
         return self.get(self._get_host_wal_receiver_path(hostname), preproc=json.loads)
@@ -656,6 +1163,11 @@ class Zookeeper(object):
             logging.exception('Failed to write host maintenance enabled')
             return False
 
+    def _forget_write_digests(self, key):
+        prefix = key.rstrip('/') + '/'
+        for written_key in [k for k in self._write_digests if k == key or k.startswith(prefix)]:
+            self._write_digests.pop(written_key, None)
+
     # === Timeline methods ===
 
     def get_timeline(self) -> int | None:
@@ -678,7 +1190,7 @@ class Zookeeper(object):
 
     def write_replics_info(self, replics_info) -> bool:
         try:
-            return self.write(self.REPLICS_INFO_PATH, replics_info, preproc=json.dumps)
+            return self.write_if_changed(self.REPLICS_INFO_PATH, replics_info, preproc=json.dumps)
         except Exception:
             logging.exception('Failed to write replics_info')
             return False
@@ -776,6 +1288,39 @@ class Zookeeper(object):
             logging.exception('Failed to write last switchover time')
             return False
 
+    # === Write ops for atomic batches (see write_batch) ===
+    # Each op mirrors the key, preproc and need_lock of the matching write_* method.
+
+    def failover_state_op(self, state: str) -> ZkWrite:
+        return ZkWrite(self.FAILOVER_STATE_PATH, state, need_lock=False)
+
+    def timeline_op(self, timeline: int) -> ZkWrite:
+        return ZkWrite(self.TIMELINE_INFO_PATH, timeline)
+
+    def current_promoting_host_op(self, hostname=None) -> ZkWrite:
+        return ZkWrite(self.CURRENT_PROMOTING_HOST, hostname if hostname is not None else helpers.get_hostname())
+
+    def last_failover_time_op(self) -> ZkWrite:
+        return ZkWrite(self.LAST_FAILOVER_TIME_PATH, time.time(), need_lock=False)
+
+    def switchover_state_op(self, state: str) -> ZkWrite:
+        return ZkWrite(self.SWITCHOVER_STATE_PATH, state, need_lock=False)
+
+    def switchover_candidate_op(self, candidate: str) -> ZkWrite:
+        return ZkWrite(self.SWITCHOVER_CANDIDATE, candidate)
+
+    def switchover_side_replicas_op(self, replicas: list) -> ZkWrite:
+        return ZkWrite(self.SWITCHOVER_SIDE_REPLICAS, replicas, preproc=json.dumps)
+
+    def last_switchover_time_op(self) -> ZkWrite:
+        return ZkWrite(self.LAST_SWITCHOVER_TIME_PATH, time.time(), need_lock=False)
+
+    def election_status_op(self, status: str) -> ZkWrite:
+        return ZkWrite(self.ELECTION_STATUS_PATH, status, need_lock=False)
+
+    def election_winner_op(self, hostname: str) -> ZkWrite:
+        return ZkWrite(self.ELECTION_WINNER_PATH, hostname, need_lock=False)
+
     def cleanup_switchover(self) -> None:
         """Clean up all switchover-related nodes."""
         paths_to_delete = [
@@ -803,10 +1348,88 @@ class Zookeeper(object):
     def delete_timing(self, name: str) -> bool:
         return self.delete(self._get_timing_path(name), recursive=True)
 
+    # === Alive / quorum membership ===
+
+    def _uses_registry(self) -> bool:
+        return self.config.membership_registry != MembershipRegistry.LOCK
+
+    def _uses_locks(self) -> bool:
+        return self.config.membership_registry != MembershipRegistry.REGISTRY
+
+    def _get_registry_members(self, registry_path, catch_except=True) -> set[str]:
+        children = self.get_children(registry_path, catch_except=catch_except)
+        return set(children or [])
+
+    def _register(self, registry_path) -> bool:
+        self._memo.invalidate(self._memo_path(registry_path))
+        try:
+            self._zk_client.ensure_ephemeral(registry_path)
+            return True
+        except ZkClientError:
+            logging.exception('Failed to register ephemeral node %s', registry_path)
+            return False
+
+    def register_daemon(self) -> bool:
+        """Publish that the daemon runs on this host, whatever the state of local PostgreSQL.
+
+        Unlike the alive node, this one is held while PostgreSQL is down or being
+        rebuilt, so the departed host collector can tell a stopped daemon from a
+        stopped database. Created once per ZK session.
+        """
+        session_id = self._zk_client.session_id()
+        if session_id is not None and session_id == self._daemon_session:
+            return True
+        if not self._register(helpers.get_host_path(self.HOST_DAEMON_PATH)):
+            return False
+        self._daemon_session = session_id
+        return True
+
+    def register_alive(self) -> bool:
+        """Publish that local PostgreSQL is alive (alive lock and/or registry node)."""
+        registered = True
+        if self._uses_registry():
+            registered = self._register(helpers.get_host_path(self.HOST_ALIVE_REGISTRY_PATH))
+        if self._uses_locks():
+            alive_path = self.get_host_alive_lock_path()
+            if self.get_current_lock_holder(alive_path) is None:
+                logging.warning("I don't hold my alive lock, let's acquire it")
+                registered = self.try_acquire_lock(alive_path) and registered
+        return registered
+
+    def unregister_alive(self) -> None:
+        """Withdraw the alive publication of the local host."""
+        if self._uses_registry():
+            self.delete(helpers.get_host_path(self.HOST_ALIVE_REGISTRY_PATH))
+        if self._uses_locks():
+            self.release_lock(self.get_host_alive_lock_path())
+
+    def register_quorum_member(self) -> None:
+        """Enter the sync quorum candidates set. Raises ZookeeperException on failure."""
+        if self._uses_registry() and not self._register(helpers.get_host_path(self.HOST_QUORUM_REGISTRY_PATH)):
+            raise ZookeeperException('Failed to register quorum member')
+        if self._uses_locks():
+            self.acquire_lock(self.get_host_quorum_path())
+
+    def unregister_quorum_member(self) -> None:
+        """Leave the sync quorum candidates set."""
+        if self._uses_registry():
+            self.delete(helpers.get_host_path(self.HOST_QUORUM_REGISTRY_PATH))
+        if self._uses_locks():
+            self.release_if_hold(self.get_host_quorum_path())
+
+    def _is_host_alive_now(self, hostname, catch_except=True):
+        if self._uses_registry():
+            path = helpers.get_host_path(self.HOST_ALIVE_REGISTRY_PATH, hostname)
+            if self.exists_path(path, catch_except=catch_except):
+                return True
+        if self._uses_locks():
+            alive_path = self.get_host_alive_lock_path(hostname)
+            return self.get_current_lock_holder(alive_path, catch_except) is not None
+        return False
+
     def is_host_alive(self, hostname, timeout=0.0, catch_except=True):
-        alive_path = self.get_host_alive_lock_path(hostname)
         return helpers.await_for(
-            lambda: self.get_current_lock_holder(alive_path, catch_except) is not None, timeout, f'{hostname} is alive'
+            lambda: self._is_host_alive_now(hostname, catch_except), timeout, f'{hostname} is alive'
         )
 
     def _is_host_in_sync_quorum(self, hostname):
@@ -818,7 +1441,13 @@ class Zookeeper(object):
         if all_hosts is None:
             logging.error('Failed to get HA host list from ZK')
             return []
-        return [host for host in all_hosts if self._is_host_in_sync_quorum(host)]
+        registered: set[str] = set()
+        if self._uses_registry():
+            registered = self._get_registry_members(self.QUORUM_REGISTRY_PATH)
+        if not self._uses_locks():
+            return [host for host in all_hosts if host in registered]
+        # Lock fallback only for hosts that did not publish a registry node (not upgraded yet).
+        return [host for host in all_hosts if host in registered or self._is_host_in_sync_quorum(host)]
 
     def ensure_quorum_path(self) -> bool:
         """Ensure the quorum path exists in ZK. Returns True on success."""
@@ -830,7 +1459,11 @@ class Zookeeper(object):
         return self.get(self.QUORUM_PATH, preproc=helpers.load_json_or_default)
 
     def write_quorum(self, hosts: list) -> bool:
-        """Persist quorum host list to ZK."""
+        """Persist quorum host list to ZK.
+
+        Always a real write: other hosts rewrite the quorum too (promote,
+        switchover), so our last written value says nothing about ZK's.
+        """
         try:
             return self.write(self.QUORUM_PATH, hosts, preproc=json.dumps, need_lock=False)
         except Exception:
@@ -864,6 +1497,86 @@ class Zookeeper(object):
         """Ensure the member node exists in ZK. Returns True on success."""
         return self.ensure_path(self.get_member_path(hostname)) is not None
 
+    def plan_create(self, paths) -> list[str] | None:
+        """Full paths to create for paths to exist, parents first (see apply_bulk). None on error."""
+        try:
+            return self._zk_client.plan_create(paths)
+        except ZkClientError:
+            logging.exception('Failed to plan creation of %s', ', '.join(paths))
+            return None
+
+    def plan_delete(self, paths) -> list[str] | None:
+        """Full paths of paths and their subtrees, children first (see apply_bulk). None on error."""
+        try:
+            return self._zk_client.plan_delete(paths)
+        except ZkClientError:
+            logging.exception('Failed to plan deletion of %s', ', '.join(paths))
+            return None
+
+    def apply_bulk(self, creates=(), deletes=(), chunk_size=BULK_CHUNK_SIZE) -> bool:
+        """Apply planned deletes and creates in chunked multi transactions. Returns False on error."""
+        self._memo.clear()
+        self._write_digests = {}
+        if self._cache is not None:
+            self._cache.disarm()
+        try:
+            self._zk_client.commit_bulk(creates=creates, deletes=deletes, chunk_size=chunk_size)
+            return True
+        except ZkClientError:
+            logging.exception('Failed to apply ZK bulk operations')
+            return False
+
+    def get_hosts_with_nodes(self) -> set[str] | None:
+        """Hostnames owning a node in any HOST_NODE_PATHS subtree (one pipelined read). None on error."""
+        parents = [path.rsplit('/', 1)[0] for path in self.HOST_NODE_PATHS]
+        try:
+            batch = self._zk_client.read_batch(children_paths=parents)
+        except ZkClientError:
+            logging.exception('Failed to list hosts with ZK nodes')
+            return None
+        hosts: set[str] = set()
+        for children in batch.children.values():
+            # '_registry' and other internal nodes start with '_', which never appears in a FQDN.
+            hosts.update(child for child in children if not child.startswith('_') and child not in self.HOST_NODE_RESERVED_NAMES)
+        return hosts
+
+    def get_hosts_with_sessions(self, hosts) -> set[str] | None:
+        """Hosts among hosts holding an ephemeral daemon, alive or quorum node (lock contender or registry). None on error.
+
+        The daemon node alone proves the daemon runs; the alive / quorum nodes cover
+        hosts running a version without it.
+        """
+        hosts = list(hosts)
+        children_paths = []
+        exists_paths = []
+        for host in hosts:
+            children_paths += [self.get_host_alive_lock_path(host), self.get_host_quorum_path(host)]
+            exists_paths += [
+                self.HOST_DAEMON_PATH % host,
+                self.HOST_ALIVE_REGISTRY_PATH % host,
+                self.HOST_QUORUM_REGISTRY_PATH % host,
+            ]
+        try:
+            batch = self._zk_client.read_batch(children_paths=children_paths, exists_paths=exists_paths)
+        except ZkClientError:
+            logging.exception('Failed to read ephemeral nodes of %s', ', '.join(hosts))
+            return None
+        return {
+            host for host in hosts
+            if batch.exists[self.HOST_DAEMON_PATH % host]
+            or batch.children[self.get_host_alive_lock_path(host)]
+            or batch.children[self.get_host_quorum_path(host)]
+            or batch.exists[self.HOST_ALIVE_REGISTRY_PATH % host]
+            or batch.exists[self.HOST_QUORUM_REGISTRY_PATH % host]
+        }
+
+    def delete_host_nodes(self, hosts) -> bool:
+        """Delete every HOST_NODE_PATHS subtree of hosts in chunked transactions. Returns False on error."""
+        deletes = self.plan_delete([path % host for host in hosts for path in self.HOST_NODE_PATHS])
+        if deletes is None:
+            return False
+        return self.apply_bulk(deletes=deletes)
+
     def get_members(self, catch_except=True) -> list | None:
         """Return list of all cluster member hostnames."""
         return self.get_children(self.MEMBERS_PATH, catch_except=catch_except)
@@ -884,7 +1597,10 @@ class Zookeeper(object):
 
     def write_host_prio(self, prio, hostname=None) -> bool:
         """Persist priority for hostname (current host if None)."""
-        return self.noexcept_write(self._get_host_prio_path(hostname), prio, need_lock=False)
+        written = self.noexcept_write_if_changed(self._get_host_prio_path(hostname), prio, need_lock=False)
+        if written and hostname in (None, helpers.get_hostname()):
+            self._own_record['prio'] = str(prio)
+        return written
 
     # === Single-node status methods ===
 
@@ -968,8 +1684,135 @@ class Zookeeper(object):
             if not self.write_host_replics_info(replics_info, hostname):
                 logging.warning('Could not write host replics_info to ZK.')
                 return False
+        if self._writes_host_record():
+            if not self._write_host_record(hostname, not stream_from, replics_info, wal_receiver_info):
+                logging.warning('Could not write host record to ZK.')
+                return False
         return True
 
+    # === Cluster summary ===
+
+    def write_cluster_summary(self, db_state: dict, zk_state: dict) -> bool:
+        """Publish the primary's view of the cluster as a single node.
+
+        Locked (fenced) write, so only the current leader can publish it.
+        No-op unless zk_cluster_summary is enabled.
+        Telemetry: deferred to the end of the iteration by the op scheduler.
+        """
+        if not self.config.cluster_summary:
+            return True
+        replicas = {}
+        for row in db_state.get('replics_info') or []:
+            host = row.get('client_hostname') or row.get('application_name')
+            if host:
+                replicas[host] = {
+                    'state': row.get('state'),
+                    'sync_state': row.get('sync_state'),
+                    'replay_lag_msec': row.get('replay_lag_msec'),
+                }
+        summary = {
+            'v': self.CLUSTER_SUMMARY_VERSION,
+            'ts': time.time(),
+            'leader': helpers.get_hostname(),
+            'timeline': db_state.get('timeline'),
+            'quorum': self.get_quorum(),
+            'replicas': replicas,
+            'maintenance': zk_state.get(self.MAINTENANCE_PATH),
+            'failover_state': zk_state.get(self.FAILOVER_STATE_PATH),
+            'switchover_state': zk_state.get(self.SWITCHOVER_STATE_PATH),
+            'last_failover_time': zk_state.get(self.LAST_FAILOVER_TIME_PATH),
+        }
+        return self._scheduler.submit(self.CLUSTER_SUMMARY_PATH, lambda: self._write_cluster_summary(summary))
+
+    def _write_cluster_summary(self, summary: dict) -> bool:
+        try:
+            return self.write(self.CLUSTER_SUMMARY_PATH, summary, preproc=json.dumps)
+        except ZookeeperException:
+            logging.exception('Failed to write cluster summary')
+            return False
+
+    def get_cluster_summary(self, max_age: float | None = None) -> dict | None:
+        """Return the cluster summary in one read, or None if absent, unknown version or older than max_age seconds."""
+        summary = self.noexcept_get(self.CLUSTER_SUMMARY_PATH, preproc=json.loads)
+        if not isinstance(summary, dict) or summary.get('v') != self.CLUSTER_SUMMARY_VERSION:
+            return None
+        if max_age is not None and time.time() - summary.get('ts', 0) > max_age:
+            logging.debug('Cluster summary is stale (written at %s)', summary.get('ts'))
+            return None
+        return summary
+
+    # === Per-host record (schema v2) ===
+
+    def _writes_host_record(self) -> bool:
+        return self.config.host_record_schema != HostRecordSchema.V1
+
+    def _reads_host_records(self) -> bool:
+        return self.config.host_record_schema == HostRecordSchema.V2
+
+    def _get_host_record_path(self, hostname=None):
+        return helpers.get_host_path(self.HOST_RECORD_PATH, hostname)
+
+    def _write_host_record(self, hostname, ha, replics_info, wal_receiver_info) -> bool:
+        """Publish this host's record; fields absent this iteration keep their last value."""
+        own = self._own_record
+        own['ha'] = ha
+        if replics_info is not None:
+            own['replics_info'] = replics_info
+        if wal_receiver_info is not None:
+            own['wal_receiver'] = wal_receiver_info
+        if own.get('prio') is None:
+            own['prio'] = self.get_host_prio(hostname)
+        if 'ssn' not in own:
+            ssn = self._get_legacy_ssn(hostname)
+            if ssn != (None, None):
+                own['ssn'] = list(ssn)
+        record = {
+            'v': self.HOST_RECORD_VERSION,
+            'ha': own['ha'],
+            'prio': own.get('prio'),
+            'replics_info': own.get('replics_info'),
+            'wal_receiver': own.get('wal_receiver'),
+            'ssn': own.get('ssn'),
+        }
+        return self.noexcept_write_if_changed(
+            self._get_host_record_path(hostname), record, preproc=json.dumps, need_lock=False
+        )
+
+    def _parse_host_record(self, hostname, value) -> dict | None:
+        if value is None:
+            return None
+        try:
+            record = json.loads(value)
+        except ValueError:
+            logging.warning('Malformed host record of %s, falling back to per-field nodes', hostname)
+            return None
+        if not isinstance(record, dict) or record.get('v') != self.HOST_RECORD_VERSION:
+            return None
+        return record
+
+    def get_host_records(self, hosts) -> dict:
+        """Load the records of hosts with one pipelined batch (N parallel reads).
+
+        Returns host -> record dict, or None for hosts without a valid v2 record.
+        Raises ZookeeperException.
+        """
+        paths = {host: self._get_host_record_path(host) for host in hosts}
+        try:
+            batch = self._zk_client.read_batch(get_paths=paths.values())
+        except ZkSessionExpiredError as exception:
+            logging.error('ZK session expired while reading host records')
+            raise ZookeeperException(exception)
+        except ZkClientError as exception:
+            raise ZookeeperException(exception)
+        return {host: self._parse_host_record(host, batch.data.get(path)) for host, path in paths.items()}
+
+    def _noexcept_get_host_records(self, hosts) -> dict:
+        try:
+            return self.get_host_records(hosts)
+        except ZookeeperException:
+            logging.warning('Failed to read host records, falling back to per-field nodes', exc_info=True)
+            return {}
+
     # === Legacy cleanup ===
 
     def delete_legacy_timings_path(self) -> None:
@@ -980,8 +1823,14 @@ class Zookeeper(object):
         ha_hosts = self.get_ha_hosts(catch_except=catch_except)
         if ha_hosts is None:
             return []
-        if all_hosts_timeout:
-            minimal_total_timeout = timeout * len(ha_hosts)
+        registered: set[str] = set()
+        if self._uses_registry():
+            registered = self._get_registry_members(self.ALIVE_REGISTRY_PATH, catch_except=catch_except)
+        if not self._uses_locks():
+            return [host for host in ha_hosts if host in registered]
+        lock_hosts = [host for host in ha_hosts if host not in registered]
+        if all_hosts_timeout and lock_hosts:
+            minimal_total_timeout = timeout * len(lock_hosts)
             if minimal_total_timeout > all_hosts_timeout:
                 logging.warning("Expected timeout for checking host aliveness will be ignored.")
                 logging.debug(
@@ -992,24 +1841,51 @@ class Zookeeper(object):
                     all_hosts_timeout,
                 )
             else:
-                timeout = all_hosts_timeout / len(ha_hosts)
-        alive_hosts = [host for host in ha_hosts if self.is_host_alive(host, timeout, catch_except)]
+                timeout = all_hosts_timeout / len(lock_hosts)
+        alive_hosts = [
+            host for host in ha_hosts
+            if host in registered or self._is_host_alive_by_lock(host, timeout, catch_except)
+        ]
         return alive_hosts
 
+    def _is_host_alive_by_lock(self, hostname, timeout, catch_except):
+        alive_path = self.get_host_alive_lock_path(hostname)
+        return helpers.await_for(
+            lambda: self.get_current_lock_holder(alive_path, catch_except) is not None, timeout, f'{hostname} is alive'
+        )
+
+
+def create_zk(config: RawConfigParser, lock_contender_name=None, session_file=None, shared_client: ZkClient | None = None) -> Zookeeper:
+    """Factory: build and connect a Zookeeper instance from config.
 
-def create_zk(config: RawConfigParser, lock_contender_name=None) -> Zookeeper:
-    """Factory: build and connect a Zookeeper instance from config."""
+    session_file: resume the ZK session saved there by a previous process (daemon only).
+    shared_client: run on this connection under our own prefix instead of opening one (multi-instance mode).
+    """
     prefix = config.get('global', 'zk_lockpath_prefix')
     zk_config = ZookeeperConfig(
         release_lock_after_acquire_failed=config.getboolean('global', 'release_lock_after_acquire_failed'),
         timeout=config.getfloat('global', 'iteration_timeout'),
         path_prefix=prefix if prefix is not None else helpers.get_lockpath_prefix(),
         lock_contender_name=lock_contender_name,
+        state_snapshot=config.getboolean('global', 'zk_state_snapshot'),
+        watch_cache=config.getboolean('global', 'zk_watch_cache'),
+        membership_registry=MembershipRegistry(config.get('global', 'membership_registry')),
+        write_refresh_interval=config.getfloat('global', 'zk_write_refresh_interval'),
+        compact_encoding=config.getboolean('global', 'zk_compact_encoding'),
+        host_record_schema=HostRecordSchema(config.get('global', 'host_record_schema')),
+        cluster_summary=config.getboolean('global', 'zk_cluster_summary'),
+        read_memo_max_age=config.getfloat('global', 'zk_read_memo_max_age'),
+        telemetry_budget=config.getint('global', 'zk_telemetry_budget'),
+        telemetry_max_latency=config.getfloat('global', 'zk_telemetry_max_latency'),
     )
 
+    zk_client: ZkClient
     try:
         # Create and connect the client first (no listener yet — set after Zookeeper is constructed)
-        zk_client = create_zk_client(config, path_prefix=zk_config.path_prefix)
+        if shared_client is not None:
+            zk_client = shared_client.view(zk_config.path_prefix)
+        else:
+            zk_client = create_zk_client(config, path_prefix=zk_config.path_prefix, session_file=session_file)
         if not zk_client.init():
             raise Exception('Could not connect to ZK.')
     except Exception:
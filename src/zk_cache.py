@@ -0,0 +1,161 @@
+# encoding: utf-8
+"""
+Watch-driven cache of mostly-static ZK nodes (opt-in, see zk_watch_cache).
+"""
+
+import logging
+import threading
+from typing import Iterable
+
+from .zk_client import ZkClient, ZkClientError
+
+
+class ZkWatchCache(object):
+    """
+    In-memory copy of a fixed set of ZK nodes kept current by kazoo watches.
+
+    Values are armed lazily from the caller's thread and dropped on every
+    connection transition: watch callbacks of an older generation stop
+    themselves, so a reconnected session never mixes values from two sessions.
+    Local writes go through update() so a host always reads its own writes.
+    A lookup that misses (not armed, node not watched, children watch stopped)
+    is expected to fall back to a regular ZK read.
+    """
+
+    def __init__(self, zk_client: ZkClient, data_paths: Iterable[str], children_paths: Iterable[str] = ()):
+        self._zk_client = zk_client
+        self._data_paths = tuple(data_paths)
+        self._children_paths = tuple(children_paths)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._armed = False
+        self._values: dict[str, str | None] = {}
+        self._children: dict[str, list[str]] = {}
+
+    def is_armed(self) -> bool:
+        return self._armed
+
+    def disarm(self) -> None:
+        """Forget all values; watches of the current generation stop on their next event."""
+        with self._lock:
+            self._generation += 1
+            self._armed = False
+            self._values = {}
+            self._children = {}
+
+    def arm(self) -> bool:
+        """Register watches for all tracked paths. Returns True on success."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._values = {}
+            self._children = {}
+        try:
+            for path in self._data_paths:
+                self._zk_client.watch_data(path, self._make_data_callback(path, generation), self._on_watch_error)
+            for path in self._children_paths:
+                self._arm_children(path, generation)
+        except ZkClientError:
+            logging.warning('Failed to arm ZK watch cache, falling back to direct reads', exc_info=True)
+            self.disarm()
+            return False
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._armed = True
+        logging.debug('ZK watch cache armed (generation %d)', generation)
+        return True
+
+    def _arm_children(self, path: str, generation: int) -> None:
+        # The data watch notices deletion of the parent node, which silently
+        # stops the children watch; the next lookup re-arms it.
+        self._zk_client.watch_children(path, self._make_children_callback(path, generation))
+        if path not in self._data_paths:
+            self._zk_client.watch_data(path, self._make_parent_callback(path, generation), self._on_watch_error)
+
+    def _on_watch_error(self, error: ZkClientError) -> None:
+        # An undecodable value must not leave the previous one cached: direct reads report it.
+        logging.warning('ZK watch cache disarmed: %s', error)
+        self.disarm()
+
+    def _make_data_callback(self, path: str, generation: int):
+        def callback(value):
+            with self._lock:
+                if generation != self._generation:
+                    return False
+                self._values[path] = value
+            return None
+
+        return callback
+
+    def _make_children_callback(self, path: str, generation: int):
+        def callback(children):
+            with self._lock:
+                if generation != self._generation:
+                    return False
+                self._children[path] = list(children)
+            return None
+
+        return callback
+
+    def _make_parent_callback(self, path: str, generation: int):
+        def callback(value):
+            with self._lock:
+                if generation != self._generation:
+                    return False
+                if value is None:
+                    self._children.pop(path, None)
+            return None
+
+        return callback
+
+    def _ensure_armed(self) -> bool:
+        if self._armed:
+            return True
+        return self.arm()
+
+    def lookup(self, path: str) -> tuple[bool, str | None]:
+        """Return (hit, value) for a data path."""
+        if path not in self._data_paths or not self._ensure_armed():
+            return False, None
+        with self._lock:
+            if path in self._values:
+                return True, self._values[path]
+        return False, None
+
+    def lookup_children(self, path: str) -> tuple[bool, list[str]]:
+        """Return (hit, children) for a children path, re-arming a stopped children watch."""
+        if path not in self._children_paths or not self._ensure_armed():
+            return False, []
+        with self._lock:
+            if path in self._children:
+                return True, list(self._children[path])
+            generation = self._generation
+        try:
+            self._zk_client.watch_children(path, self._make_children_callback(path, generation))
+        except ZkClientError:
+            logging.debug('Failed to re-arm children watch for %s', path, exc_info=True)
+            return False, []
+        with self._lock:
+            if path in self._children:
+                return True, list(self._children[path])
+        return False, []
+
+    def update(self, path: str, value: str | None) -> None:
+        """Write-through after a successful local write (None after a delete)."""
+        with self._lock:
+            if path in self._data_paths and self._armed:
+                self._values[path] = value
+
+    def delete_subtree(self, path: str) -> None:
+        """Write-through after a successful local (possibly recursive) delete."""
+        prefix = path.rstrip('/') + '/'
+        with self._lock:
+            if not self._armed:
+                return
+            for tracked in self._data_paths:
+                if tracked == path or tracked.startswith(prefix):
+                    self._values[tracked] = None
+            for tracked in self._children_paths:
+                if tracked == path or tracked.startswith(prefix):
+                    self._children.pop(tracked, None)
@@ -3,22 +3,33 @@
 ZkClient module. Low-level KazooClient wrapper for ZooKeeper connection management.
 """
 
+import asyncio
+import contextlib
+import dataclasses
+import functools
+import json
 import logging
 import os
+import socket
+import threading
 import time
+import zlib
 from configparser import RawConfigParser
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
 from random import uniform
-from typing import Callable, List, Optional
+from typing import Callable, Iterable, List, Optional
 
-from kazoo.client import KazooClient, KazooState
+from kazoo.client import KazooClient, KazooState, KeeperState
 from kazoo.exceptions import (
     ConnectionClosedError,
     KazooException,
     LockTimeout,
     NodeExistsError,
     NoNodeError,
+    NotReadOnlyCallError,
+    RolledBackError,
     SessionExpiredError,
 )
 from kazoo.handlers.threading import KazooTimeoutError, SequentialThreadingHandler
@@ -47,6 +58,10 @@ class ZkLockTimeout(ZkClientError):
     """Lock acquisition timed out."""
 
 
+class ZkReadOnlyError(ZkClientError):
+    """Write refused: connected to a read-only server of an ensemble without quorum."""
+
+
 # === Connection state ===
 
 class ZkConnectionState(Enum):
@@ -75,6 +90,8 @@ class LockHandle:
             return self._lock.acquire(blocking=blocking, timeout=timeout)
         except LockTimeout as e:
             raise ZkLockTimeout(e)
+        except NotReadOnlyCallError as e:
+            raise ZkReadOnlyError(e)
         except (KazooException, KazooTimeoutError) as e:
             raise ZkClientError(e)
 
@@ -91,6 +108,57 @@ class LockHandle:
         except (KazooException, KazooTimeoutError) as e:
             raise ZkClientError(e)
 
+    def adopt(self, session_id: int) -> bool:
+        """Take over a contender node left by an earlier process of ours in session_id.
+
+        After a resumed session the previous process' node is still in the queue;
+        adopting it makes this handle acquired (fencing, release) instead of queueing
+        a second node behind our own. Only a node that holds the lock is adopted:
+        the lowest contender for a write lock, for a read lock one with no writer
+        ahead of it. A node still queued behind another holder is left alone.
+        Returns True if a node was adopted.
+        """
+        lock = self._lock
+        try:
+            children = lock.client.get_children(lock.path)
+        except NoNodeError:
+            return False
+        except (KazooException, KazooTimeoutError):
+            logging.debug('Failed to list %s for lock adoption', lock.path, exc_info=True)
+            return False
+        # Same rule as kazoo: a writer waits for every earlier contender, a reader only for writers.
+        blocking = ('__lock__', '__rlock__') if lock._NODE_NAME == '__lock__' else ('__lock__',)
+        blocked = False
+        for child in sorted(children, key=_lock_sequence):
+            if lock._NODE_NAME in child and self._owned_by(child, session_id):
+                if blocked:
+                    logging.info('Lock node %s/%s of the resumed ZK session is queued, not adopting it', lock.path, child)
+                    return False
+                # Kazoo contender node names are <prefix><10-digit sequence>.
+                lock.prefix = child[:-10]
+                lock.create_path = f'{lock.path}/{lock.prefix}'
+                lock.node = child
+                lock.is_acquired = True
+                logging.info('Adopted lock node %s/%s of the resumed ZK session', lock.path, child)
+                return True
+            blocked = blocked or any(name in child for name in blocking)
+        return False
+
+    def _owned_by(self, child: str, session_id: int) -> bool:
+        """Whether contender node child was created by session_id with our lock identifier."""
+        lock = self._lock
+        try:
+            data, stat = lock.client.get(f'{lock.path}/{child}')
+        except (KazooException, KazooTimeoutError):
+            return False
+        return stat.ephemeralOwner == session_id and data == lock.data
+
+    def node_path(self) -> str | None:
+        """Full path of our contender node while the lock is held by this handle, else None."""
+        if not self._lock.is_acquired or not self._lock.node:
+            return None
+        return f'{self._lock.path}/{self._lock.node}'
+
     def contenders(self):
         try:
             return self._lock.contenders()
@@ -100,15 +168,229 @@ class LockHandle:
             raise ZkClientError(e)
 
 
-def kazoo_write_zk_value(client, path: str, data: bytes) -> None:
+def _lock_sequence(child: str) -> str:
+    """Sequence suffix of a lock contender node; unknown names sort last (kazoo order)."""
+    for name in ('__lock__', '__rlock__'):
+        idx = child.find(name)
+        if idx != -1:
+            return child[idx + len(name):]
+    return '~'
+
+
+def first_lock_node(children: List[str]) -> str | None:
+    """Return the contender node that currently holds the lock, or None if there are no contenders."""
+    if not children:
+        return None
+    return min(children, key=_lock_sequence)
+
+
+def lock_version_from_children(children: List[str]) -> str | None:
+    """Return min lock sequence among contender nodes. Encapsulates '__' split."""
+    if not children:
+        return None
+    return min(child.split('__')[-1] for child in children)
+
+
+# Compact value encoding. Text values never start with a NUL byte, so it marks a
+# versioned binary value: COMPACT_MAGIC, version byte, payload. Readers decode
+# every known version; writers use it only when zk_compact_encoding is enabled.
+COMPACT_MAGIC = b'\x00'
+COMPACT_ZLIB_V1 = b'\x01'
+
+
+def load_zk_session(path: str, hosts: str) -> tuple[int, bytes] | None:
+    """Return the kazoo client_id saved by save_zk_session for the same hosts, else None."""
+    try:
+        with open(path) as fobj:
+            saved = json.load(fobj)
+        if saved.get('hosts') != hosts:
+            logging.info('Saved ZK session is for other hosts (%s), not resuming it', saved.get('hosts'))
+            return None
+        return int(saved['session_id']), bytes.fromhex(saved['password'])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        logging.warning('Ignoring unreadable ZK session file %s', path, exc_info=True)
+        return None
+
+
+def save_zk_session(path: str, hosts: str, client_id: tuple[int, bytes]) -> None:
+    """Atomically persist a kazoo client_id (readable by the owner only: it holds the session password)."""
+    session_id, password = client_id
+    data = json.dumps({'hosts': hosts, 'session_id': session_id, 'password': password.hex()})
+    tmp_path = path + '.tmp'
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as fobj:
+            fobj.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        logging.warning('Could not save ZK session to %s', path, exc_info=True)
+
+
+def parse_zk_hosts(hosts: str) -> tuple[list[tuple[str, int]], str]:
+    """Split a kazoo hosts string ('h1:2181,h2/chroot') into [(host, port)] and the chroot suffix."""
+    hosts, slash, chroot = hosts.partition('/')
+    servers = []
+    for server in hosts.split(','):
+        server = server.strip()
+        if not server:
+            continue
+        if server.startswith('['):
+            # [ipv6]:port
+            host, _, port = server[1:].partition(']')
+            port = port.lstrip(':')
+        else:
+            host, _, port = server.rpartition(':') if server.count(':') == 1 else (server, '', '')
+        servers.append((host, int(port) if port else 2181))
+    return servers, slash + chroot
+
+
+def measure_rtt(host: str, port: int, timeout: float) -> float | None:
+    """TCP connect time to host:port in seconds, None if unreachable within timeout."""
+    started = time.monotonic()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return time.monotonic() - started
+    except OSError:
+        return None
+
+
+def order_hosts_by_rtt(hosts: str, timeout: float) -> str:
+    """Return hosts reordered by measured RTT, unreachable servers last in their original order."""
+    servers, chroot = parse_zk_hosts(hosts)
+    if len(servers) < 2:
+        return hosts
+    with ThreadPoolExecutor(max_workers=len(servers)) as pool:
+        rtts = list(pool.map(lambda server: measure_rtt(server[0], server[1], timeout), servers))
+    for (host, port), rtt in zip(servers, rtts):
+        logging.debug('ZK server %s:%d RTT: %s', host, port, 'unreachable' if rtt is None else f'{rtt * 1000:.1f} ms')
+    order = sorted(range(len(servers)), key=lambda i: (rtts[i] is None, rtts[i] or 0.0, i))
+    return ','.join(_format_server(*servers[i]) for i in order) + chroot
+
+
+def _format_server(host: str, port: int) -> str:
+    return f'[{host}]:{port}' if ':' in host else f'{host}:{port}'
+
+
+def encode_compact(text: str) -> bytes:
+    """Encode text as a version 1 compact value (zlib-compressed UTF-8)."""
+    return COMPACT_MAGIC + COMPACT_ZLIB_V1 + zlib.compress(text.encode('utf-8'))
+
+
+def decode_zk_value(data: bytes) -> str:
+    """Decode a node value written either as plain UTF-8 text or by encode_compact()."""
+    if data[:1] != COMPACT_MAGIC:
+        return data.decode('utf-8')
+    version = data[1:2]
+    if version == COMPACT_ZLIB_V1:
+        return zlib.decompress(data[2:]).decode('utf-8')
+    raise ValueError(f'Unknown compact ZK value encoding version {version!r}')
+
+
+# What decode_zk_value raises on a value it cannot decode (unknown version, corrupt payload).
+ZK_VALUE_DECODE_ERRORS = (ValueError, UnicodeDecodeError, zlib.error)
+
+
+def _to_bytes(data: str | bytes) -> bytes:
+    return data if isinstance(data, bytes) else data.encode()
+
+
+# Kazoo lock recipes never modify contender nodes after creating them.
+LOCK_NODE_VERSION = 0
+
+# Upper bound (seconds) of one TCP connect probe when ordering servers by RTT.
+RTT_PROBE_TIMEOUT = 1.0
+
+
+class RttEstimator(object):
+    """
+    Smoothed round trip time of single ZK requests and the op timeout derived from it.
+
+    The estimate follows TCP's retransmission timer (RFC 6298): srtt and rttvar
+    are updated from every sample, and the timeout covers TIMEOUT_RTT_MULTIPLIER
+    times srtt + 4 * rttvar (a lock acquisition is several round trips),
+    clamped to [min_timeout, max_timeout]. Samples come from the main loop and,
+    in multi-instance mode, from every cluster thread.
+    """
+
+    ALPHA = 0.125
+    BETA = 0.25
+    TIMEOUT_RTT_MULTIPLIER = 10
+    # Log the derived timeout again once it moved by this fraction.
+    LOG_CHANGE_RATIO = 0.25
+
+    def __init__(self, min_timeout: float, max_timeout: float):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self._logged_timeout: float | None = None
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            if self.srtt is None or self.rttvar is None:
+                self.srtt = seconds
+                self.rttvar = seconds / 2
+            else:
+                self.rttvar += self.BETA * (abs(self.srtt - seconds) - self.rttvar)
+                self.srtt += self.ALPHA * (seconds - self.srtt)
+            timeout = self._timeout()
+            logged = self._logged_timeout
+            if logged is not None and abs(timeout - logged) < self.LOG_CHANGE_RATIO * logged:
+                return
+            self._logged_timeout = timeout
+        logging.info('ZK RTT %.1f ms (variation %.1f ms): op timeout %.2f s', self.srtt * 1000, self.rttvar * 1000, timeout)
+
+    @contextlib.contextmanager
+    def sample(self):
+        """Time the enclosed request; failed (e.g. timed out) requests are samples too."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(time.monotonic() - started)
+
+    def _timeout(self) -> float:
+        if self.srtt is None or self.rttvar is None:
+            return self.max_timeout
+        rto = self.TIMEOUT_RTT_MULTIPLIER * (self.srtt + 4 * self.rttvar)
+        return min(max(rto, self.min_timeout), self.max_timeout)
+
+    def rtt(self) -> float | None:
+        """Smoothed RTT in seconds, None before the first sample."""
+        with self._lock:
+            return self.srtt
+
+    def timeout(self) -> float:
+        """Op timeout in seconds; max_timeout until the first sample."""
+        with self._lock:
+            return self._timeout()
+
+    def stats(self) -> dict | None:
+        """Estimate for the status file, None before the first sample."""
+        with self._lock:
+            if self.srtt is None or self.rttvar is None:
+                return None
+            return {
+                'rtt_ms': round(self.srtt * 1000, 3),
+                'rttvar_ms': round(self.rttvar * 1000, 3),
+                'timeout': round(self._timeout(), 3),
+            }
+
+
+def kazoo_write_zk_value(client, path: str, data: bytes, rtt: RttEstimator | None = None) -> None:
     """Write data to path: set if present, else create(makepath); retry set on race.
 
     Do not use ensure_path first: it creates missing nodes with empty value ''.
     Callers that interpret '' specially (e.g. maintenance disable) may then
     act on that intermediate state before the real value is written.
+    Only the first request (set) is sampled into rtt: the fallbacks are more round trips.
     """
     try:
-        client.set(path, data)
+        with rtt.sample() if rtt is not None else contextlib.nullcontext():
+            client.set(path, data)
     except NoNodeError:
         try:
             client.create(path, value=data, makepath=True)
@@ -116,6 +398,17 @@ def kazoo_write_zk_value(client, path: str, data: bytes) -> None:
             client.set(path, data)
 
 
+@dataclass
+class ZkReadBatch:
+    """Result of ZkClient.read_batch, keyed by the paths the caller passed in.
+
+    Absent nodes map to None (data), [] (children) and False (exists).
+    """
+    data: dict[str, str | None] = field(default_factory=dict)
+    children: dict[str, List[str]] = field(default_factory=dict)
+    exists: dict[str, bool] = field(default_factory=dict)
+
+
 @dataclass
 class ZkClientConfig:
     hosts: str
@@ -131,6 +424,16 @@ class ZkClientConfig:
     key: str | None = None
     ca: str | None = None
     verify_certs: bool = True
+    # File (in working_dir) to save the session to and resume it from; None disables resumption.
+    session_file: str | None = None
+    # Try ensemble servers in order of measured RTT instead of kazoo's random order.
+    prefer_low_rtt: bool = False
+    # Accept read-only servers (ensemble without quorum): reads keep working, writes raise ZkReadOnlyError.
+    read_only: bool = False
+    # Derive lock / read timeouts from the measured RTT, bounded by [timeout_min, timeout_max].
+    adaptive_timeouts: bool = False
+    timeout_min: float = 0.5
+    timeout_max: float = 10.0
 
 
 class ZkClient(object):
@@ -154,6 +457,18 @@ class ZkClient(object):
         # Assigned by _create_kazoo_client() before any data method is called.
         self._kazoo: Optional[KazooClient] = None
 
+        # Session resumption (config.session_file): only the first init() offers the saved session.
+        self._saved_session_offered = False
+        self._offered_session: tuple[int, bytes] | None = None
+        self._saved_session_id: Optional[int] = None
+        self._resumed_session_id: Optional[int] = None
+
+        # Clients sharing this connection under other path prefixes (multi-instance mode).
+        self._views: list['ZkClientView'] = []
+        self._reconnect_lock = threading.Lock()
+
+        self._rtt = RttEstimator(config.timeout_min, config.timeout_max)
+
     @property
     def _client(self) -> KazooClient:
         """Live KazooClient; raises if accessed before init()."""
@@ -168,6 +483,7 @@ class ZkClient(object):
     def init(self) -> bool:
         """Connect to ZK. Returns True on success."""
         logging.debug("Initializing ZooKeeper client")
+        client_id = self._offered_session = self._take_saved_session()
         self._create_kazoo_client()
         event = self._client.start_async()
         event.wait(self.config.timeout)
@@ -181,14 +497,70 @@ class ZkClient(object):
             )
             return False
 
-        logging.info("Successfully connected to ZooKeeper: %s", self.config.hosts)
+        logging.info("Successfully connected to ZooKeeper: %s (session bound to %s)", self.config.hosts, self.connected_server())
+        self._on_session_established(client_id)
         return True
 
+    def _take_saved_session(self) -> tuple[int, bytes] | None:
+        if self.config.session_file is None or self._saved_session_offered:
+            return None
+        self._saved_session_offered = True
+        return load_zk_session(self.config.session_file, self.config.hosts)
+
+    def _on_session_established(self, offered: tuple[int, bytes] | None) -> None:
+        client_id = self._client.client_id
+        if offered is not None:
+            if client_id is not None and client_id[0] == offered[0]:
+                self._resumed_session_id = offered[0]
+                logging.info('Resumed ZK session 0x%x', offered[0])
+            else:
+                logging.info('Saved ZK session 0x%x has expired, started a new one', offered[0])
+        self._save_session(client_id)
+
+    def _save_session(self, client_id) -> None:
+        if self.config.session_file is None or client_id is None or client_id[0] == self._saved_session_id:
+            return
+        save_zk_session(self.config.session_file, self.config.hosts, client_id)
+        self._saved_session_id = client_id[0]
+
+    def resumed_session(self) -> bool:
+        """True while the current session is the one resumed from the session file."""
+        if self._resumed_session_id is None or self._kazoo is None:
+            return False
+        client_id = self._kazoo.client_id
+        return client_id is not None and client_id[0] == self._resumed_session_id
+
+    def session_id(self) -> int | None:
+        """Id of the current ZK session, None while there is none."""
+        if self._kazoo is None:
+            return None
+        client_id = self._kazoo.client_id
+        return client_id[0] if client_id else None
+
+    def view(self, path_prefix: str) -> 'ZkClientView':
+        """Client for another path prefix sharing this connection and session."""
+        view = ZkClientView(self, path_prefix)
+        self._views.append(view)
+        return view
+
+    def _detach_view(self, view: 'ZkClientView') -> None:
+        if view in self._views:
+            self._views.remove(view)
+
+    def _notify_views(self, state: ZkConnectionState, exclude: Optional['ZkClientView'] = None) -> None:
+        for view in list(self._views):
+            if view is not exclude and view._state_listener:
+                view._state_listener(state)
+
     def reconnect(self) -> bool:
         """Rebuild the connection with exponential backoff. Returns True on success.
 
         Connection-only: does not touch locks (owned by Zookeeper.reconnect).
         """
+        with self._reconnect_lock:
+            return self._reconnect()
+
+    def _reconnect(self, exclude: Optional['ZkClientView'] = None) -> bool:
         logging.debug("Reconnecting to ZooKeeper")
         if self._failed_inits_count > 0:
             self._sleep_before_reconnect()
@@ -207,6 +579,8 @@ class ZkClient(object):
         if connected:
             logging.info("Successfully reconnected to ZooKeeper")
             self._clear_session_expired_flag()
+            # Locks of views were made by the replaced KazooClient.
+            self._notify_views(ZkConnectionState.LOST, exclude=exclude)
         else:
             self._session_expired = True
             self._failed_inits_count += 1
@@ -226,6 +600,33 @@ class ZkClient(object):
         """Pure state check: True iff KazooState == CONNECTED. No side effects."""
         return self._client.state == KazooState.CONNECTED
 
+    def is_read_only(self) -> bool:
+        """True while connected to a read-only server (config.read_only, ensemble without quorum)."""
+        return self.is_connected() and self._client.client_state == KeeperState.CONNECTED_RO
+
+    def connected_server(self) -> str | None:
+        """host:port of the ensemble server the session is bound to, None if unknown."""
+        try:
+            peer = self._client._connection._socket.getpeername()
+        except Exception:
+            return None
+        return _format_server(peer[0], peer[1])
+
+    def op_timeout(self) -> float:
+        """Timeout of lock acquisitions and pipelined reads: derived from the RTT
+        with adaptive_timeouts, else the static config.timeout."""
+        if not self.config.adaptive_timeouts:
+            return self.config.timeout
+        return self._rtt.timeout()
+
+    def rtt(self) -> float | None:
+        """Smoothed RTT of single ZK requests in seconds, None before the first one."""
+        return self._rtt.rtt()
+
+    def rtt_stats(self) -> dict | None:
+        """Smoothed RTT, its variation and the derived timeout; None before the first request."""
+        return self._rtt.stats()
+
     def close(self) -> None:
         """Explicit shutdown: remove listener, stop and close Kazoo."""
         if self._kazoo is None:
@@ -262,6 +663,15 @@ class ZkClient(object):
             'connection_retry': conn_retry_options,
             'command_retry': command_retry_options,
         }
+        if self._offered_session is not None:
+            args['client_id'] = self._offered_session
+        if self.config.read_only:
+            args['read_only'] = True
+        if self.config.prefer_low_rtt:
+            # Kazoo tries hosts in the given order and moves on to the next one on failure.
+            args['hosts'] = order_hosts_by_rtt(self.config.hosts, min(self.config.timeout, RTT_PROBE_TIMEOUT))
+            args['randomize_hosts'] = False
+            logging.info('ZK servers by RTT: %s', args['hosts'])
         if self.config.auth:
             acl = make_digest_acl(self.config.username, self.config.password, all=True)
             args.update(
@@ -291,13 +701,23 @@ class ZkClient(object):
         """
         if state == KazooState.LOST:
             self._session_expired = True
+        elif state == KazooState.CONNECTED and self.config.read_only and self.is_read_only():
+            # Kazoo keeps looking for a read-write server and reconnects by itself.
+            self._clear_connection_state_flags()
+            logging.warning('Connected to read-only ZK server %s: the ensemble has no quorum, writes are refused', self.connected_server())
         elif state == KazooState.CONNECTED:
             self._clear_connection_state_flags()
+            logging.info('ZK session bound to %s', self.connected_server())
+            if self.config.session_file is not None:
+                # Kazoo replaces an expired session by itself: keep the file current.
+                self._save_session(self._client.client_id)
 
+        domain_state = _KAZOO_STATE_MAP.get(state)
+        if domain_state is None:
+            return
         if self._state_listener:
-            domain_state = _KAZOO_STATE_MAP.get(state)
-            if domain_state is not None:
-                self._state_listener(domain_state)
+            self._state_listener(domain_state)
+        self._notify_views(domain_state)
 
     def _sleep_before_reconnect(self):
         """Exponential backoff with jitter."""
@@ -333,50 +753,166 @@ class ZkClient(object):
     def get(self, path) -> str | None:
         """Return decoded str or None. Raises ZkNoNodeError, ZkSessionExpiredError, ZkClientError."""
         try:
-            data, _ = self._client.get(self._resolve_path(path))
+            with self._rtt.sample():
+                data, _ = self._client.get(self._resolve_path(path))
             if data is None:
                 return None
-            return data.decode('utf-8')
+            return decode_zk_value(data)
         except NoNodeError as e:
             raise ZkNoNodeError(e)
         except SessionExpiredError as e:
             raise ZkSessionExpiredError(e)
         except (KazooException, KazooTimeoutError) as e:
             raise ZkClientError(e)
+        except ZK_VALUE_DECODE_ERRORS as e:
+            raise ZkClientError(f'Cannot decode value of {path}: {e}') from e
 
     def lock_version(self, path) -> str | None:
         """Return min lock sequence or None. Encapsulates '__' split. Raises ZkClientError."""
         try:
-            children = self._client.get_children(self._resolve_path(path))
+            with self._rtt.sample():
+                children = self._client.get_children(self._resolve_path(path))
         except NoNodeError:
             return None
         except (KazooException, KazooTimeoutError) as e:
             raise ZkClientError(e)
-        if not children:
-            return None
-        return min(child.split('__')[-1] for child in children)
+        return lock_version_from_children(children)
+
+    def read_batch(
+        self,
+        get_paths: Iterable[str] = (),
+        children_paths: Iterable[str] = (),
+        exists_paths: Iterable[str] = (),
+    ) -> ZkReadBatch:
+        """Pipelined read: send every request at once, then gather the replies.
+
+        Costs roughly one round trip regardless of the number of paths.
+        All replies share a single deadline of op_timeout().
+        Raises ZkSessionExpiredError, ZkClientError.
+        """
+        batch = ZkReadBatch()
+        try:
+            pending = [('data', path, self._client.get_async(self._resolve_path(path))) for path in get_paths]
+            pending += [
+                ('children', path, self._client.get_children_async(self._resolve_path(path)))
+                for path in children_paths
+            ]
+            pending += [('exists', path, self._client.exists_async(self._resolve_path(path))) for path in exists_paths]
+
+            deadline = time.time() + self.op_timeout()
+            for kind, path, async_result in pending:
+                timeout = max(deadline - time.time(), 0)
+                if kind == 'data':
+                    try:
+                        data, _ = async_result.get(timeout=timeout)
+                    except NoNodeError:
+                        data = None
+                    try:
+                        batch.data[path] = None if data is None else decode_zk_value(data)
+                    except ZK_VALUE_DECODE_ERRORS as e:
+                        raise ZkClientError(f'Cannot decode value of {path}: {e}') from e
+                elif kind == 'children':
+                    try:
+                        batch.children[path] = async_result.get(timeout=timeout)
+                    except NoNodeError:
+                        batch.children[path] = []
+                else:
+                    batch.exists[path] = bool(async_result.get(timeout=timeout))
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+        return batch
 
-    def write(self, path, data):
-        """Set-or-create write via kazoo_write_zk_value.
+    def write(self, path, data: str | bytes):
+        """Set-or-create write via kazoo_write_zk_value. bytes are written as is (see encode_compact).
         Returns True. Raises ZkSessionExpiredError, ZkClientError on failure.
         Note: create uses makepath=True — writing to a child of a deleted host node
         will silently resurrect the parent; verify host membership before writing.
         """
         full_path = self._resolve_path(path)
-        encoded = data.encode()
+        encoded = _to_bytes(data)
         try:
-            kazoo_write_zk_value(self._client, full_path, encoded)
+            kazoo_write_zk_value(self._client, full_path, encoded, self._rtt)
             return True
         except SessionExpiredError as e:
             raise ZkSessionExpiredError(e)
+        except NotReadOnlyCallError as e:
+            raise ZkReadOnlyError(e)
         except (KazooException, KazooTimeoutError) as e:
             raise ZkClientError(e)
 
+    def write_fenced(self, path, data, fence_path: str, fence_version: int = LOCK_NODE_VERSION) -> bool:
+        """Set-or-create write committed atomically with a check of fence_path version.
+
+        One round trip in the common case. Returns False without writing when
+        the fence node is gone or changed (e.g. our lock node after session loss).
+        Raises ZkSessionExpiredError, ZkClientError on other failures.
+        """
+        return self.write_batch([(path, data)], fence_path=fence_path, fence_version=fence_version)
+
+    def write_batch(self, writes: list[tuple[str, str | bytes]], fence_path: str | None = None, fence_version: int = LOCK_NODE_VERSION) -> bool:
+        """Set-or-create several nodes in one all-or-nothing multi transaction.
+
+        writes is a list of (path, data). With fence_path the transaction also
+        checks its version and returns False without writing when it is gone or
+        changed. Missing nodes are created (parents are ensured outside the
+        transaction, as makepath would), which costs extra round trips only on
+        the first write. Raises ZkSessionExpiredError, ZkClientError on failure.
+        """
+        ops = [(self._resolve_path(path), _to_bytes(data)) for path, data in writes]
+        create: set[str] = set()
+        try:
+            # Each node may go set -> create -> set (lost creation race) at most once.
+            for _ in range(2 * len(ops) + 1):
+                failed_path, error = self._commit_batch(ops, create, fence_path, fence_version)
+                if error is None:
+                    return True
+                if failed_path is None:
+                    logging.warning('Fenced write to %s rejected: %s is gone or changed', ', '.join(p for p, _ in ops), fence_path)
+                    return False
+                if isinstance(error, NoNodeError) and failed_path not in create:
+                    self._client.ensure_path(os.path.dirname(failed_path))
+                    create.add(failed_path)
+                elif isinstance(error, NodeExistsError) and failed_path in create:
+                    create.discard(failed_path)
+                else:
+                    raise error
+            raise error
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except NotReadOnlyCallError as e:
+            raise ZkReadOnlyError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    def _commit_batch(self, ops, create, fence_path, fence_version):
+        """Commit one multi. Returns (None, None) on success, else the failed path (None for the fence) and its error."""
+        transaction = self._client.transaction()
+        paths: list[str | None] = []
+        if fence_path is not None:
+            transaction.check(fence_path, fence_version)
+            paths.append(None)
+        for full_path, encoded in ops:
+            if full_path in create:
+                transaction.create(full_path, encoded)
+            else:
+                transaction.set_data(full_path, encoded)
+            paths.append(full_path)
+        with self._rtt.sample():
+            results = transaction.commit()
+        for failed_path, result in zip(paths, results):
+            if isinstance(result, Exception) and not isinstance(result, RolledBackError):
+                return failed_path, result
+        return None, None
+
     def ensure_path(self, path):
         """Ensure path exists. Returns stat. Raises ZkClientError on failure."""
         full_path = self._resolve_path(path)
         try:
             return self._client.ensure_path(full_path)
+        except NotReadOnlyCallError as e:
+            raise ZkReadOnlyError(e)
         except (KazooException, KazooTimeoutError) as e:
             raise ZkClientError(e)
 
@@ -386,7 +922,8 @@ class ZkClient(object):
         Raises ZkClientError on connection failure.
         """
         try:
-            return bool(self._client.exists(self._resolve_path(path)))
+            with self._rtt.sample():
+                return bool(self._client.exists(self._resolve_path(path)))
         except (KazooException, KazooTimeoutError) as e:
             raise ZkClientError(e)
 
@@ -397,7 +934,8 @@ class ZkClient(object):
         """
         full_path = self._resolve_path(path)
         try:
-            return self._client.get_children(full_path)
+            with self._rtt.sample():
+                return self._client.get_children(full_path)
         except NoNodeError:
             logging.debug('No node found at path: %s', full_path, exc_info=True)
             return []
@@ -413,20 +951,373 @@ class ZkClient(object):
         except NoNodeError:
             logging.info('No node %s was found in ZK to delete it.', full_path)
             return True
+        except NotReadOnlyCallError as e:
+            raise ZkReadOnlyError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    # === Bulk operations ===
+
+    def plan_create(self, paths: Iterable[str]) -> List[str]:
+        """Full paths of the nodes missing for paths to exist (ancestors included), parents first.
+
+        Existence of every node is checked in one pipelined round trip.
+        Raises ZkSessionExpiredError, ZkClientError.
+        """
+        full_paths: set[str] = set()
+        for path in paths:
+            parts = self._resolve_path(path).rstrip('/').split('/')
+            full_paths.update('/'.join(parts[:i]) for i in range(2, len(parts) + 1))
+        ordered = sorted(full_paths, key=lambda full_path: (full_path.count('/'), full_path))
+        try:
+            pending = [(full_path, self._client.exists_async(full_path)) for full_path in ordered]
+            deadline = time.time() + self.op_timeout()
+            return [full_path for full_path, async_result in pending if not async_result.get(timeout=max(deadline - time.time(), 0))]
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    def plan_delete(self, paths: Iterable[str]) -> List[str]:
+        """Full paths of paths and all their descendants, children before parents.
+
+        The tree is listed level by level, one pipelined round trip per level.
+        Absent paths are skipped. Raises ZkSessionExpiredError, ZkClientError.
+        """
+        level = [self._resolve_path(path).rstrip('/') for path in paths]
+        found = []
+        try:
+            while level:
+                pending = [(full_path, self._client.get_children_async(full_path)) for full_path in level]
+                deadline = time.time() + self.op_timeout()
+                level = []
+                for full_path, async_result in pending:
+                    try:
+                        children = async_result.get(timeout=max(deadline - time.time(), 0))
+                    except NoNodeError:
+                        continue
+                    found.append(full_path)
+                    level.extend(f'{full_path}/{child}' for child in children)
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+        return list(reversed(found))
+
+    def commit_bulk(self, creates: Iterable[str] = (), deletes: Iterable[str] = (), chunk_size: int = 500) -> None:
+        """Apply deletes, then creates (full paths from plan_*) in multi transactions of chunk_size ops.
+
+        Every chunk is all-or-nothing; chunks committed before a failed one stay
+        applied, so callers re-plan before retrying.
+        Raises ZkSessionExpiredError, ZkClientError on the first failed chunk.
+        """
+        if chunk_size <= 0:
+            raise ValueError(f'chunk_size must be positive, got {chunk_size}')
+        ops = [('delete', full_path) for full_path in deletes] + [('create', full_path) for full_path in creates]
+        try:
+            for start in range(0, len(ops), chunk_size):
+                chunk = ops[start:start + chunk_size]
+                transaction = self._client.transaction()
+                for kind, full_path in chunk:
+                    if kind == 'delete':
+                        transaction.delete(full_path)
+                    else:
+                        transaction.create(full_path, b'')
+                for (kind, full_path), result in zip(chunk, transaction.commit()):
+                    if isinstance(result, Exception) and not isinstance(result, RolledBackError):
+                        logging.warning('Bulk %s of %s failed: %r', kind, full_path, result)
+                        raise result
+                logging.debug('Committed ZK bulk ops %d-%d of %d', start + 1, start + len(chunk), len(ops))
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except NotReadOnlyCallError as e:
+            raise ZkReadOnlyError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    def ensure_ephemeral(self, path, data: str = '') -> None:
+        """Make sure path exists as an ephemeral node owned by the current session.
+
+        A node left over from an older session of ours is replaced. Raises ZkClientError.
+        """
+        full_path = self._resolve_path(path)
+        try:
+            stat = self._client.exists(full_path)
+            if stat is not None:
+                client_id = self._client.client_id
+                if client_id is not None and stat.ephemeralOwner == client_id[0]:
+                    return
+                try:
+                    self._client.delete(full_path, version=stat.version)
+                except NoNodeError:
+                    pass
+            self._client.create(full_path, value=data.encode(), ephemeral=True, makepath=True)
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except NotReadOnlyCallError as e:
+            raise ZkReadOnlyError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    # === Watches ===
+
+    def watch_data(
+        self,
+        path,
+        callback: Callable[[str | None], bool | None],
+        on_error: Callable[[ZkClientError], None] | None = None,
+    ) -> None:
+        """Register a kazoo DataWatch on path.
+
+        callback(value) is called from the kazoo event thread with the decoded value
+        (None while the node is absent) now and on every change; returning False stops the watch.
+        A value that cannot be decoded stops the watch and is reported as ZkClientError:
+        passed to on_error if given, else raised (from the kazoo thread after registration).
+        The watch lives as long as the current KazooClient: reconnect() drops it.
+        Raises ZkClientError.
+        """
+        def _on_change(data, _stat):
+            try:
+                value = None if data is None else decode_zk_value(data)
+            except ZK_VALUE_DECODE_ERRORS as e:
+                error = ZkClientError(f'Cannot decode value of {path}: {e}')
+                if on_error is None:
+                    raise error from e
+                on_error(error)
+                return False
+            return callback(value)
+
+        try:
+            self._client.DataWatch(self._resolve_path(path), _on_change)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    def watch_children(self, path, callback: Callable[[List[str]], bool | None]) -> None:
+        """Register a kazoo ChildrenWatch on path.
+
+        callback(children) follows the watch_data contract. Kazoo stops the watch
+        silently when the node is deleted (or absent at registration).
+        Raises ZkClientError.
+        """
+        try:
+            self._client.ChildrenWatch(self._resolve_path(path), callback)
         except (KazooException, KazooTimeoutError) as e:
             raise ZkClientError(e)
 
     # === Lock recipes ===
 
     def make_lock(self, path, identifier) -> LockHandle:
-        return LockHandle(self._client.Lock(path, identifier))
+        handle = LockHandle(self._client.Lock(path, identifier))
+        if self.resumed_session():
+            handle.adopt(self._client.client_id[0])
+        return handle
 
     def make_read_lock(self, path, identifier) -> LockHandle:
-        return LockHandle(self._client.ReadLock(path, identifier))
+        handle = LockHandle(self._client.ReadLock(path, identifier))
+        if self.resumed_session():
+            handle.adopt(self._client.client_id[0])
+        return handle
+
 
+class ZkClientView(ZkClient):
+    """
+    ZkClient of one cluster in multi-instance mode.
+
+    Resolves paths under its own prefix but runs every operation on the parent's
+    KazooClient: the connection, session and reconnect backoff are shared.
+    Connection state changes of the parent are forwarded to the view's listener.
+    """
+
+    def __init__(self, parent: ZkClient, path_prefix: str):
+        super().__init__(dataclasses.replace(parent.config, path_prefix=path_prefix, session_file=None))
+        self._parent = parent
+        # Same connection, same round trips.
+        self._rtt = parent._rtt
+
+    @property
+    def _client(self) -> KazooClient:
+        return self._parent._client
+
+    def init(self) -> bool:
+        return self._parent.is_connected() or self.reconnect()
+
+    def reconnect(self) -> bool:
+        """Rebuild the shared connection unless another view already did."""
+        with self._parent._reconnect_lock:
+            if self._parent.is_alive():
+                return True
+            return self._parent._reconnect(exclude=self)
+
+    def is_alive(self) -> bool:
+        return self._parent.is_alive()
+
+    def is_connected(self) -> bool:
+        return self._parent.is_connected()
+
+    def resumed_session(self) -> bool:
+        return self._parent.resumed_session()
+
+    def session_id(self) -> int | None:
+        return self._parent.session_id()
+
+    def connected_server(self) -> str | None:
+        return self._parent.connected_server()
+
+    def close(self) -> None:
+        """Detach from the shared connection; the parent owner closes it."""
+        self._parent._detach_view(self)
+
+
+# === Asyncio client ===
+
+async def _await_kazoo(async_result):
+    """Await a kazoo IAsyncResult, which kazoo completes on its own thread."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _resolve(result):
+        if future.done():
+            # Cancelled, e.g. by a gather() deadline.
+            return
+        try:
+            future.set_result(result.get_nowait())
+        except Exception as e:
+            future.set_exception(e)
+
+    def _on_complete(result):
+        try:
+            loop.call_soon_threadsafe(_resolve, result)
+        except RuntimeError:
+            # Event loop already closed: the caller is gone.
+            pass
+
+    async_result.rawlink(_on_complete)
+    return await future
+
+
+class AsyncZkClient(object):
+    """Awaitable data and lock operations on the session of a ZkClient.
+
+    Shares the ZkClient connection (following it across reconnect()) and its
+    exception contract: ZkNoNodeError, ZkSessionExpiredError, ZkClientError.
+    Independent requests are sent at once with gather(), which bounds them
+    with a single deadline. Lock recipes are synchronous in kazoo and run in
+    the default executor.
+    """
 
-def create_zk_client(config: RawConfigParser, path_prefix=None) -> ZkClient:
-    """Factory: create ZkClient from config object."""
+    def __init__(self, zk_client: ZkClient):
+        self._zk_client = zk_client
+
+    @property
+    def _client(self) -> KazooClient:
+        return self._zk_client._client
+
+    def _resolve_path(self, path: str) -> str:
+        return self._zk_client._resolve_path(path)
+
+    async def gather(self, *aws, timeout: float | None = None) -> list:
+        """Run awaitables concurrently; all must finish within timeout (default config.timeout).
+
+        Raises the first domain error of any awaitable, ZkClientError on deadline.
+        """
+        if timeout is None:
+            timeout = self._zk_client.config.timeout
+        try:
+            return await asyncio.wait_for(asyncio.gather(*aws), timeout)
+        except asyncio.TimeoutError as e:
+            raise ZkClientError(f'ZK requests did not complete within {timeout} s') from e
+
+    async def get(self, path) -> str | None:
+        """Return decoded str or None. Raises ZkNoNodeError, ZkSessionExpiredError, ZkClientError."""
+        try:
+            data, _ = await _await_kazoo(self._client.get_async(self._resolve_path(path)))
+            if data is None:
+                return None
+            return decode_zk_value(data)
+        except NoNodeError as e:
+            raise ZkNoNodeError(e)
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+        except ZK_VALUE_DECODE_ERRORS as e:
+            raise ZkClientError(f'Cannot decode value of {path}: {e}') from e
+
+    async def get_children(self, path) -> List[str]:
+        """Return list of children ([] if node absent). Raises ZkSessionExpiredError, ZkClientError."""
+        try:
+            return await _await_kazoo(self._client.get_children_async(self._resolve_path(path)))
+        except NoNodeError:
+            return []
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    async def exists(self, path) -> bool:
+        """Return True if path exists. Raises ZkSessionExpiredError, ZkClientError."""
+        try:
+            return bool(await _await_kazoo(self._client.exists_async(self._resolve_path(path))))
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    async def write(self, path, data: str | bytes) -> bool:
+        """Set-or-create write with the kazoo_write_zk_value semantics.
+
+        Returns True. Raises ZkSessionExpiredError, ZkClientError.
+        """
+        full_path = self._resolve_path(path)
+        encoded = _to_bytes(data)
+        try:
+            try:
+                await _await_kazoo(self._client.set_async(full_path, encoded))
+            except NoNodeError:
+                try:
+                    await _await_kazoo(self._client.create_async(full_path, encoded, makepath=True))
+                except NodeExistsError:
+                    await _await_kazoo(self._client.set_async(full_path, encoded))
+            return True
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    async def delete(self, path) -> bool:
+        """Delete a leaf node. Returns True (including when absent). Raises ZkSessionExpiredError, ZkClientError."""
+        try:
+            await _await_kazoo(self._client.delete_async(self._resolve_path(path)))
+            return True
+        except NoNodeError:
+            return True
+        except SessionExpiredError as e:
+            raise ZkSessionExpiredError(e)
+        except (KazooException, KazooTimeoutError) as e:
+            raise ZkClientError(e)
+
+    async def acquire(self, lock: LockHandle, blocking=True, timeout=None) -> bool:
+        """LockHandle.acquire off the event loop. Raises ZkLockTimeout, ZkClientError."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(lock.acquire, blocking=blocking, timeout=timeout))
+
+    async def release(self, lock: LockHandle):
+        """LockHandle.release off the event loop. Raises ZkConnectionClosedError, ZkClientError."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lock.release)
+
+    async def contenders(self, lock: LockHandle):
+        """LockHandle.contenders off the event loop. Raises ZkNoNodeError, ZkClientError."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lock.contenders)
+
+
+def create_zk_client(config: RawConfigParser, path_prefix=None, session_file=None) -> ZkClient:
+    """Factory: create ZkClient from config object.
+
+    session_file enables session resumption; only the daemon passes it, so
+    CLI tools never take over the daemon's session.
+    """
     zk_auth = config.getboolean('global', 'zk_auth')
     zk_ssl = config.getboolean('global', 'zk_ssl')
 
@@ -466,6 +1357,16 @@ def create_zk_client(config: RawConfigParser, path_prefix=None) -> ZkClient:
         key=key,
         ca=ca,
         verify_certs=config.getboolean('global', 'verify_certs'),
+        session_file=session_file,
+        prefer_low_rtt=config.getboolean('global', 'zk_prefer_low_rtt'),
+        read_only=config.getboolean('global', 'zk_read_only_mode'),
+        adaptive_timeouts=config.getboolean('global', 'zk_adaptive_timeouts'),
+        timeout_min=config.getfloat('global', 'zk_timeout_min'),
+        timeout_max=config.getfloat('global', 'zk_timeout_max'),
     )
+    if zk_config.adaptive_timeouts and not 0 < zk_config.timeout_min <= zk_config.timeout_max:
+        raise ValueError(
+            f'zk_timeout_min ({zk_config.timeout_min}) must be positive and not above zk_timeout_max ({zk_config.timeout_max})'
+        )
 
     return ZkClient(config=zk_config)
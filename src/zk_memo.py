@@ -0,0 +1,87 @@
+# encoding: utf-8
+"""
+Iteration-scoped read-through memo of ZK reads (opt-in, see zk_read_memo_max_age).
+"""
+
+import logging
+import time
+from typing import Any
+
+
+class ZkReadMemo(object):
+    """
+    Results of ZK reads made during one main loop iteration.
+
+    The memo is open only between open() and close(): reads outside an
+    iteration (CLI, tests, helper threads) always go to ZK. Entries older than
+    max_age are re-read, so polling loops inside an iteration (helpers.await_for)
+    still observe remote changes. Local mutations invalidate the touched path,
+    its subtree and the parent's children / existence entries; connection state
+    changes drop everything.
+    """
+
+    def __init__(self, max_age: float):
+        self._max_age = max_age
+        self._open = False
+        self._entries: dict[tuple[str, str], tuple[Any, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def is_open(self) -> bool:
+        return self._open
+
+    def open(self) -> None:
+        """Start a new iteration: forget previous values and reset counters."""
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._open = self._max_age > 0
+
+    def close(self) -> tuple[int, int]:
+        """Finish the iteration. Returns (hits, misses)."""
+        if self._open:
+            logging.debug('ZK read memo: %d hits, %d misses', self.hits, self.misses)
+        self._open = False
+        self._entries = {}
+        return self.hits, self.misses
+
+    def clear(self) -> None:
+        """Drop every value, keeping the memo open."""
+        self._entries = {}
+
+    def lookup(self, kind: str, path: str) -> tuple[bool, Any]:
+        """Return (hit, value) for a read of kind on path."""
+        if not self._open:
+            return False, None
+        entry = self._entries.get((kind, path))
+        if entry is not None:
+            value, stored_at = entry
+            if time.monotonic() - stored_at < self._max_age:
+                self.hits += 1
+                return True, _copy(value)
+            del self._entries[(kind, path)]
+        self.misses += 1
+        return False, None
+
+    def store(self, kind: str, path: str, value: Any) -> None:
+        if self._open:
+            self._entries[(kind, path)] = (_copy(value), time.monotonic())
+
+    def invalidate(self, path: str) -> None:
+        """Forget everything a mutation of path (or its subtree) may have changed."""
+        if not self._entries:
+            return
+        path = path.rstrip('/')
+        prefix = path + '/'
+        # Writes create missing parents, so every ancestor listing may have changed.
+        parts = path.split('/')
+        ancestors = {'/'.join(parts[:i]) for i in range(len(parts))}
+        for key in list(self._entries):
+            kind, entry_path = key
+            if entry_path == path or entry_path.startswith(prefix) or (kind != 'get' and entry_path in ancestors):
+                del self._entries[key]
+
+
+def _copy(value: Any) -> Any:
+    # Callers may mutate returned lists (children, contenders).
+    return list(value) if isinstance(value, list) else value
@@ -0,0 +1,107 @@
+# encoding: utf-8
+"""
+Priority scheduling of ZK writes within one main loop iteration (opt-in, see
+zk_telemetry_budget and zk_telemetry_max_latency).
+"""
+
+import logging
+from enum import Enum
+from typing import Callable
+
+
+class ZkOpPriority(Enum):
+    """Class of a ZK operation."""
+    # Leader lock, elections, failover / switchover coordination.
+    CRITICAL = 'critical'
+    # Cluster state other hosts act on (ha, prio, quorum, maintenance, timings...).
+    STATE = 'state'
+    # Nodes only displayed or used for diagnostics (SSN per host, cluster summary).
+    TELEMETRY = 'telemetry'
+
+
+class ZkOpScheduler(object):
+    """
+    Per-iteration scheduler of ZK writes.
+
+    Every ZK operation of the Zookeeper layer is reported to observe(), which
+    keeps counters per priority. The latency is the smoothed RTT ZkClient
+    estimates for its adaptive timeouts (latency callable), so both agree on
+    whether ZK is slow. Critical and state
+    writes run immediately; the two classes differ only in their counters,
+    nothing orders them. While an iteration is open, telemetry writes are
+    deferred: submit() queues the latest write per key and flush() runs them
+    after the iteration's own work, at most telemetry_budget of them (0: no
+    limit), and none while the smoothed latency exceeds max_latency seconds
+    (0: no limit). Dropped telemetry is not retried, the next iteration
+    submits fresh values.
+    """
+
+    def __init__(self, telemetry_budget: int, max_latency: float, latency: Callable[[], float | None]):
+        self._telemetry_budget = telemetry_budget
+        self._max_latency = max_latency
+        self._latency = latency
+        self._open = False
+        self._deferred: dict[str, Callable[[], bool]] = {}
+        self.ops = {priority: 0 for priority in ZkOpPriority}
+        self.written = 0
+        self.dropped = 0
+
+    def is_enabled(self) -> bool:
+        return self._telemetry_budget > 0 or self._max_latency > 0
+
+    def is_open(self) -> bool:
+        return self._open
+
+    def open(self) -> None:
+        """Start a new iteration: reset counters."""
+        self.ops = {priority: 0 for priority in ZkOpPriority}
+        self.written = 0
+        self.dropped = 0
+        self._open = self.is_enabled()
+
+    def latency(self) -> float | None:
+        """Smoothed ZK round trip time in seconds, None before the first sample."""
+        return self._latency()
+
+    def is_overloaded(self) -> bool:
+        if self._max_latency <= 0:
+            return False
+        latency = self._latency()
+        return latency is not None and latency > self._max_latency
+
+    def observe(self, priority: ZkOpPriority) -> None:
+        self.ops[priority] += 1
+
+    def submit(self, key: str, write: Callable[[], bool]) -> bool:
+        """Run a telemetry write now (scheduler closed) or defer it to flush(). Returns write()'s result or True."""
+        if not self._open:
+            return write()
+        # Only the newest value of a key is worth writing.
+        self._deferred.pop(key, None)
+        self._deferred[key] = write
+        return True
+
+    def flush(self) -> None:
+        """Run deferred telemetry writes within the budget, drop the rest, close the iteration."""
+        deferred, self._deferred = self._deferred, {}
+        for key, write in deferred.items():
+            if self.is_overloaded():
+                logging.debug('ZK latency %.3f s is above %.3f s, dropping telemetry write of %s', self.latency(), self._max_latency, key)
+                self.dropped += 1
+            elif self._telemetry_budget > 0 and self.written >= self._telemetry_budget:
+                logging.debug('Telemetry budget of %d writes is spent, dropping write of %s', self._telemetry_budget, key)
+                self.dropped += 1
+            elif write():
+                self.written += 1
+            else:
+                logging.warning('Could not write telemetry node %s to ZK.', key)
+        if self._open:
+            latency = self.latency()
+            logging.debug(
+                'ZK ops: %s; telemetry written %d, dropped %d; latency %s',
+                ', '.join(f'{priority.value} {count}' for priority, count in self.ops.items()),
+                self.written,
+                self.dropped,
+                f'{latency:.3f} s' if latency is not None else 'n/a',
+            )
+        self._open = False
@@ -55,6 +55,9 @@ if 'kazoo.exceptions' not in sys.modules:
     _kazoo_exc.SessionExpiredError = type('SessionExpiredError', (_kazoo_exc.KazooException,), {})
     _kazoo_exc.ConnectionClosedError = type('ConnectionClosedError', (_kazoo_exc.KazooException,), {})
     _kazoo_exc.LockTimeout = type('LockTimeout', (_kazoo_exc.KazooException,), {})
+    _kazoo_exc.RolledBackError = type('RolledBackError', (_kazoo_exc.KazooException,), {})
+    _kazoo_exc.BadVersionError = type('BadVersionError', (_kazoo_exc.KazooException,), {})
+    _kazoo_exc.NotReadOnlyCallError = type('NotReadOnlyCallError', (_kazoo_exc.KazooException,), {})
     sys.modules['kazoo.exceptions'] = _kazoo_exc
 
 # Stub kazoo.handlers.threading with a real KazooTimeoutError class.
@@ -104,5 +107,6 @@ def zk():
         config.getint.return_value = 10
         config.getfloat.return_value = 5.0
         config.getboolean.return_value = False
-        config.get.return_value = '/pgconsul/'
+        options = {'membership_registry': 'lock', 'host_record_schema': 'v1'}
+        config.get.side_effect = lambda section, option, **kwargs: options.get(option, '/pgconsul/')
         return create_zk(config)
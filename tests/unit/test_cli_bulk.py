@@ -0,0 +1,99 @@
+# encoding: utf-8
+"""Tests for transactional bulk ops and dry-run of pgconsul-util initzk / reset-all."""
+
+from configparser import RawConfigParser
+import argparse
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.cli import _add_bulk_arguments, initzk, reset_all
+
+
+def _conf() -> RawConfigParser:
+    conf = RawConfigParser()
+    conf.add_section('global')
+    return conf
+
+
+def _opts(**kwargs):
+    opts = MagicMock(members=['h1', 'h2'], test=False, dry_run=False, chunk_size=100, force=True, timeout=300)
+    for key, value in kwargs.items():
+        setattr(opts, key, value)
+    return opts
+
+
+def _zk():
+    zk = MagicMock()
+    zk.MEMBERS_PATH = 'all_hosts'
+    zk.MAINTENANCE_PATH = 'maintenance'
+    zk.get_member_path.side_effect = lambda host: f'all_hosts/{host}'
+    zk.plan_create.return_value = ['/p/all_hosts', '/p/all_hosts/h1', '/p/all_hosts/h2']
+    zk.plan_delete.side_effect = lambda nodes: [f'/p/{node}' for node in nodes]
+    zk.get_root_children.return_value = ['alive', 'all_hosts', 'maintenance']
+    zk.get_maintenance_status.return_value = None
+    zk.apply_bulk.return_value = True
+    return zk
+
+
+class TestInitzkBulk:
+
+    @patch('src.cli.create_zk')
+    def test_creates_all_members_in_one_bulk(self, mock_create_zk):
+        zk = _zk()
+        mock_create_zk.return_value = zk
+        initzk(_opts(), _conf())
+        zk.plan_create.assert_called_once_with(['all_hosts/h1', 'all_hosts/h2'])
+        zk.apply_bulk.assert_called_once_with(creates=zk.plan_create.return_value, deletes=[], chunk_size=100)
+
+    @patch('src.cli.create_zk')
+    def test_dry_run_prints_without_applying(self, mock_create_zk, capsys):
+        zk = _zk()
+        mock_create_zk.return_value = zk
+        initzk(_opts(dry_run=True), _conf())
+        zk.apply_bulk.assert_not_called()
+        assert capsys.readouterr().out.splitlines() == ['create /p/all_hosts', 'create /p/all_hosts/h1', 'create /p/all_hosts/h2']
+
+    @patch('time.sleep')
+    @patch('src.cli.create_zk')
+    def test_failure_raises_after_retries(self, mock_create_zk, _sleep):
+        zk = _zk()
+        zk.apply_bulk.return_value = False
+        mock_create_zk.return_value = zk
+        with pytest.raises(RuntimeError):
+            initzk(_opts(), _conf())
+        assert zk.plan_create.call_count == zk.apply_bulk.call_count == 3
+
+
+class TestResetAllDryRun:
+
+    @patch('src.cli.enable_maintenance')
+    @patch('src.cli.create_zk')
+    def test_dry_run_prints_without_touching_zk(self, mock_create_zk, mock_enable, capsys):
+        zk = _zk()
+        mock_create_zk.return_value.__enter__.return_value = zk
+        reset_all(_opts(dry_run=True, force=False), _conf())
+        mock_enable.assert_not_called()
+        zk.write_maintenance_status.assert_not_called()
+        zk.apply_bulk.assert_not_called()
+        assert capsys.readouterr().out.splitlines() == ['delete /p/alive', 'delete /p/maintenance']
+
+
+class TestChunkSize:
+
+    @staticmethod
+    def _parser():
+        parser = argparse.ArgumentParser()
+        _add_bulk_arguments(parser)
+        return parser
+
+    def test_default(self):
+        assert self._parser().parse_args([]).chunk_size == 500
+
+    def test_positive(self):
+        assert self._parser().parse_args(['--chunk-size', '7']).chunk_size == 7
+
+    @pytest.mark.parametrize('value', ['0', '-1', 'x'])
+    def test_rejected(self, value):
+        with pytest.raises(SystemExit):
+            self._parser().parse_args(['--chunk-size', value])
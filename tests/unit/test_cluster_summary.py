@@ -0,0 +1,110 @@
+# encoding: utf-8
+"""Tests for the primary-published cluster summary and `info --short` reading it."""
+
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+DB_STATE = {
+    'timeline': 7,
+    'replics_info': [
+        {'client_hostname': 'h2', 'application_name': 'h2', 'state': 'streaming', 'sync_state': 'quorum', 'replay_lag_msec': 3},
+    ],
+}
+
+
+def _zk_state(zk):
+    return {
+        zk.MAINTENANCE_PATH: {'status': None, 'ts': None},
+        zk.FAILOVER_STATE_PATH: 'finished',
+        zk.SWITCHOVER_STATE_PATH: None,
+        zk.LAST_FAILOVER_TIME_PATH: 1.5,
+    }
+
+
+class TestWriteClusterSummary:
+
+    def test_disabled_by_default(self, zk):
+        zk.write = MagicMock()
+        assert zk.write_cluster_summary(DB_STATE, _zk_state(zk)) is True
+        zk.write.assert_not_called()
+
+    def test_locked_write_of_summary(self, zk):
+        zk.config.cluster_summary = True
+        zk.write = MagicMock(return_value=True)
+        zk.get_quorum = MagicMock(return_value=['h2'])
+        with patch('src.zk.helpers.get_hostname', return_value='h1'):
+            assert zk.write_cluster_summary(DB_STATE, _zk_state(zk)) is True
+        (key, summary), kwargs = zk.write.call_args
+        assert key == 'cluster_summary'
+        assert 'need_lock' not in kwargs
+        assert summary['leader'] == 'h1'
+        assert summary['timeline'] == 7
+        assert summary['quorum'] == ['h2']
+        assert summary['replicas'] == {'h2': {'state': 'streaming', 'sync_state': 'quorum', 'replay_lag_msec': 3}}
+        assert summary['failover_state'] == 'finished'
+
+
+class TestGetClusterSummary:
+
+    def test_fresh_summary(self, zk):
+        zk._zk_client.get = MagicMock(return_value=json.dumps({'v': 1, 'ts': time.time(), 'leader': 'h1'}))
+        assert zk.get_cluster_summary(max_age=5)['leader'] == 'h1'
+
+    def test_stale_summary(self, zk):
+        zk._zk_client.get = MagicMock(return_value=json.dumps({'v': 1, 'ts': time.time() - 60, 'leader': 'h1'}))
+        assert zk.get_cluster_summary(max_age=5) is None
+
+    def test_unknown_version(self, zk):
+        zk._zk_client.get = MagicMock(return_value=json.dumps({'v': 99, 'ts': time.time()}))
+        assert zk.get_cluster_summary() is None
+
+
+class TestShowInfoShort:
+
+    def _run(self, zk):
+        from src import cli
+        conf = MagicMock()
+        conf.getfloat.return_value = 1.0
+        zk.__enter__ = MagicMock(return_value=zk)
+        zk.__exit__ = MagicMock(return_value=None)
+        with patch('src.cli.create_zk', return_value=zk):
+            return cli._show_info(SimpleNamespace(short=True, json=True), conf)
+
+    def test_single_read_from_summary(self):
+        zk = MagicMock()
+        zk.is_alive.return_value = True
+        zk.get_cluster_summary.return_value = {
+            'leader': 'h1',
+            'last_failover_time': 1.5,
+            'maintenance': {'status': None, 'ts': None},
+            'replicas': {'h2': {'state': 'streaming', 'sync_state': 'quorum', 'replay_lag_msec': 3}},
+        }
+        info = self._run(zk)
+        zk.get_state.assert_not_called()
+        zk.get_cluster_summary.assert_called_once_with(max_age=5.0)
+        assert info == {
+            'alive': True,
+            'primary': 'h1',
+            'last_failover_time': 1.5,
+            'maintenance': None,
+            'replics_info': {'h2': 'streaming, sync_state quorum, replay_lag_msec 3'},
+        }
+
+    def test_falls_back_to_full_state(self):
+        zk = MagicMock()
+        zk.MAINTENANCE_PATH = 'maintenance'
+        zk.LAST_FAILOVER_TIME_PATH = 'last_failover_time'
+        zk.get_cluster_summary.return_value = None
+        zk.get_state.return_value = {
+            'alive': True,
+            'lock_holder': 'h1',
+            'maintenance': {'status': 'enable', 'ts': '1'},
+            'last_failover_time': None,
+            'replics_info': None,
+        }
+        info = self._run(zk)
+        zk.get_state.assert_called_once()
+        assert info['primary'] == 'h1'
+        assert info['maintenance'] == {'status': 'enable', 'ts': '1'}
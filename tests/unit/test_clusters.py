@@ -0,0 +1,165 @@
+# encoding: utf-8
+"""Tests for multi-instance mode: [cluster:<name>] configs and the shared ZK connection."""
+
+from configparser import RawConfigParser
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.clusters import _run_cluster, build_cluster_config, build_cluster_configs, get_cluster_names
+from src.zk_client import ZkClient, ZkClientConfig, ZkConnectionState
+
+
+def _config(clusters=None) -> RawConfigParser:
+    config = RawConfigParser()
+    config.read_dict({
+        'global': {'zk_hosts': 'zk1:2181', 'working_dir': '/var/lib/pgconsul', 'iteration_timeout': '1.0'},
+        'commands': {'pg_start': 'pg_ctlcluster 16 main start'},
+    })
+    for name, options in (clusters or {}).items():
+        config.read_dict({f'cluster:{name}': options})
+    return config
+
+
+def _cluster(n):
+    return {
+        'zk_lockpath_prefix': f'/pgconsul/db{n}/',
+        'working_dir': f'/var/lib/pgconsul/db{n}',
+        'local_conn_string': f'port={5432 + n}',
+    }
+
+
+class TestClusterConfig:
+
+    def test_cluster_names_in_order(self):
+        config = _config({'b': _cluster(1), 'a': _cluster(2)})
+        assert get_cluster_names(config) == ['b', 'a']
+
+    def test_no_clusters(self):
+        assert get_cluster_names(_config()) == []
+
+    def test_overrides_global_and_dotted_sections(self):
+        config = _config({'db1': dict(_cluster(1), **{'commands.pg_start': 'pg_ctlcluster 16 db1 start'})})
+        cluster_config = build_cluster_config(config, 'db1')
+        assert cluster_config.get('global', 'working_dir') == '/var/lib/pgconsul/db1'
+        assert cluster_config.get('global', 'zk_hosts') == 'zk1:2181'
+        assert cluster_config.get('commands', 'pg_start') == 'pg_ctlcluster 16 db1 start'
+        assert not any(section.startswith('cluster:') for section in cluster_config.sections())
+
+    def test_base_config_untouched(self):
+        config = _config({'db1': _cluster(1)})
+        build_cluster_config(config, 'db1')
+        assert config.get('global', 'working_dir') == '/var/lib/pgconsul'
+
+    def test_shared_option_rejected(self):
+        config = _config({'db1': dict(_cluster(1), zk_hosts='zk2:2181')})
+        with pytest.raises(ValueError, match='zk_hosts'):
+            build_cluster_config(config, 'db1')
+
+    def test_unknown_cluster(self):
+        with pytest.raises(ValueError):
+            build_cluster_config(_config(), 'db1')
+
+    def test_colliding_options_rejected(self):
+        config = _config({'db1': _cluster(1), 'db2': dict(_cluster(2), working_dir='/var/lib/pgconsul/db1')})
+        with pytest.raises(ValueError, match='working_dir'):
+            build_cluster_configs(config)
+
+    def test_missing_prefix_rejected(self):
+        cluster = _cluster(1)
+        del cluster['zk_lockpath_prefix']
+        with pytest.raises(ValueError, match='zk_lockpath_prefix'):
+            build_cluster_configs(_config({'db1': cluster}))
+
+    def test_all_configs_built(self):
+        configs = build_cluster_configs(_config({'db1': _cluster(1), 'db2': _cluster(2)}))
+        assert list(configs) == ['db1', 'db2']
+
+
+@pytest.fixture
+def shared():
+    config = ZkClientConfig(hosts='zk1:2181', timeout=5.0, connect_max_delay=10.0, max_delay_on_reinit=30, path_prefix='/')
+    client = ZkClient(config)
+    client._kazoo = MagicMock()
+    client._create_kazoo_client = lambda: None
+    return client
+
+
+class TestZkClientView:
+
+    def test_view_resolves_own_prefix_on_shared_kazoo(self, shared):
+        db1 = shared.view('/pgconsul/db1/')
+        db2 = shared.view('/pgconsul/db2/')
+        shared._kazoo.get.return_value = (b'v', MagicMock())
+        db1.get('leader')
+        db2.get('leader')
+        assert [c.args[0] for c in shared._kazoo.get.call_args_list] == ['/pgconsul/db1/leader', '/pgconsul/db2/leader']
+
+    def test_state_changes_forwarded(self, shared):
+        from kazoo.client import KazooState
+        listeners = [MagicMock(), MagicMock()]
+        for listener in listeners:
+            shared.view('/p/').set_state_listener(listener)
+        shared._listener(KazooState.SUSPENDED)
+        for listener in listeners:
+            listener.assert_called_once_with(ZkConnectionState.SUSPENDED)
+
+    def test_view_reconnect_skipped_when_shared_connection_alive(self, shared):
+        from kazoo.client import KazooState
+        shared._kazoo.state = KazooState.CONNECTED
+        view = shared.view('/p/')
+        with patch.object(shared, '_reconnect') as reconnect:
+            assert view.reconnect() is True
+        reconnect.assert_not_called()
+
+    def test_view_reconnect_notifies_other_views(self, shared):
+        shared._session_expired = True
+        db1 = shared.view('/pgconsul/db1/')
+        db2 = shared.view('/pgconsul/db2/')
+        db1.set_state_listener(MagicMock())
+        db2.set_state_listener(MagicMock())
+        with patch.object(shared, 'init', return_value=True), patch.object(shared, 'is_connected', return_value=True):
+            assert db1.reconnect() is True
+        db1._state_listener.assert_not_called()
+        db2._state_listener.assert_called_once_with(ZkConnectionState.LOST)
+
+    def test_view_close_keeps_shared_connection(self, shared):
+        view = shared.view('/p/')
+        view.close()
+        shared._kazoo.stop.assert_not_called()
+        assert view not in shared._views
+
+
+class TestCreateZkShared:
+
+    def test_uses_view_of_shared_client(self, shared):
+        from kazoo.client import KazooState
+        from src.zk import create_zk
+        shared._kazoo.state = KazooState.CONNECTED
+        config = MagicMock()
+        config.getboolean.return_value = False
+        config.getfloat.return_value = 0.0
+        options = {'membership_registry': 'lock', 'host_record_schema': 'v1', 'zk_lockpath_prefix': '/pgconsul/db1/'}
+        config.get.side_effect = lambda section, option, **kwargs: options[option]
+        with patch('src.zk.create_zk_client') as create_client:
+            zk = create_zk(config, shared_client=shared)
+        create_client.assert_not_called()
+        assert zk._zk_client.config.path_prefix == '/pgconsul/db1/'
+        assert zk._zk_client in shared._views
+
+
+class TestRunCluster:
+
+    @pytest.mark.parametrize('error', [SystemExit(1), RuntimeError('boom')])
+    def test_abnormal_end_stops_process(self, error):
+        instance = MagicMock()
+        instance.run.side_effect = error
+        with patch('src.clusters.atexit._run_exitfuncs') as exitfuncs, patch('src.clusters.os._exit') as os_exit:
+            _run_cluster('db1', instance)
+        exitfuncs.assert_called_once()
+        os_exit.assert_called_once_with(1)
+
+    def test_normal_stop_leaves_process_alone(self):
+        with patch('src.clusters.os._exit') as os_exit:
+            _run_cluster('db1', MagicMock())
+        os_exit.assert_not_called()
@@ -19,6 +19,7 @@ from src.commands import (
     CreateSlots,
     DeleteHostOp,
     DoFailover,
+    FailoverTransitionTo,
     LeaveSyncGroup,
     Log,
     ReleaseLock,
@@ -33,12 +34,17 @@ from src.commands import (
     StoreReplicsInfo,
     TransitionTo,
     WriteCandidate,
+    WriteCurrentPromotingHost,
+    WriteElectionStatus,
+    WriteElectionWinner,
     WriteFailoverState,
+    WriteLastFailoverTime,
     WriteLastSwitchoverTime,
     WriteSideReplicas,
     WriteTimeline,
 )
 from src.exceptions import PostgresConnectionError
+from src.failover import FailoverPhase
 from src.switchover import SwitchoverPhase
 from src.zk import ZookeeperException
 
@@ -604,7 +610,7 @@ class TestRun:
         machine = _StubMachine(
             plan=[
                 WriteFailoverState(value='first'),
-                WriteFailoverState(value='second'),
+                Checkpoint(),
             ]
         )
         obs = MagicMock()
@@ -613,6 +619,7 @@ class TestRun:
 
         # Fail-fast: only first cmd ran, second skipped.
         deps['zk'].write_failover_state.assert_called_once_with('first')
+        deps['db'].checkpoint.assert_not_called()
 
     def test_executes_all_commands_when_all_succeed(self):
         executor, deps = _make_executor()
@@ -642,6 +649,95 @@ class TestRun:
         executor.run(_CrashingMachine(), MagicMock())
 
 
+# ---------------------------------------------------------------------------
+# Batched ZK writes
+# ---------------------------------------------------------------------------
+
+
+class TestZkWriteBatching:
+    def test_consecutive_writes_coalesced_into_one_batch(self):
+        executor, deps = _make_executor()
+        deps['zk'].write_batch.return_value = True
+        machine = _StubMachine(
+            plan=[
+                WriteElectionWinner(winner='h2'),
+                WriteElectionStatus(status='done'),
+                FailoverTransitionTo(phase=FailoverPhase.WINNER_SELECTED),
+            ]
+        )
+
+        executor.run(machine, MagicMock())
+
+        deps['zk'].write_batch.assert_called_once_with([
+            deps['zk'].election_winner_op.return_value,
+            deps['zk'].election_status_op.return_value,
+            deps['zk'].failover_state_op.return_value,
+        ])
+        deps['zk'].election_winner_op.assert_called_once_with('h2')
+        deps['zk'].failover_state_op.assert_called_once_with(FailoverPhase.WINNER_SELECTED)
+        deps['zk'].write_election_winner.assert_not_called()
+        deps['zk'].write_failover_state.assert_not_called()
+
+    def test_single_write_not_batched(self):
+        executor, deps = _make_executor()
+        deps['zk'].write_timeline.return_value = True
+        deps['db'].checkpoint.return_value = True
+
+        executor.run(_StubMachine(plan=[WriteTimeline(timeline=3), Checkpoint()]), MagicMock())
+
+        deps['zk'].write_timeline.assert_called_once_with(3)
+        deps['zk'].write_batch.assert_not_called()
+
+    def test_batch_split_by_non_write_command(self):
+        executor, deps = _make_executor()
+        deps['zk'].write_batch.return_value = True
+        deps['db'].checkpoint.return_value = True
+        machine = _StubMachine(
+            plan=[
+                WriteCandidate(candidate='h2'),
+                WriteSideReplicas(side_replicas=('h3',)),
+                Checkpoint(),
+                TransitionTo(SwitchoverPhase.INITIATED),
+                WriteLastSwitchoverTime(),
+            ]
+        )
+
+        executor.run(machine, MagicMock())
+
+        assert deps['zk'].write_batch.call_count == 2
+        deps['db'].checkpoint.assert_called_once()
+
+    def test_failed_batch_stops_plan(self):
+        executor, deps = _make_executor()
+        deps['zk'].write_batch.return_value = False
+        machine = _StubMachine(
+            plan=[
+                WriteCurrentPromotingHost(),
+                WriteLastFailoverTime(),
+                Checkpoint(),
+            ]
+        )
+
+        executor.run(machine, MagicMock())
+
+        deps['db'].checkpoint.assert_not_called()
+
+    def test_batch_zookeeper_exception_stops_plan(self):
+        executor, deps = _make_executor()
+        deps['zk'].write_batch.side_effect = ZookeeperException('zk down')
+        machine = _StubMachine(
+            plan=[
+                WriteFailoverState(value='a'),
+                WriteTimeline(timeline=4),
+                Checkpoint(),
+            ]
+        )
+
+        executor.run(machine, MagicMock())
+
+        deps['db'].checkpoint.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # Exception handling (ADR-0002)
 # ---------------------------------------------------------------------------
@@ -0,0 +1,171 @@
+# encoding: utf-8
+"""Tests for the departed host collector (zk_gc_grace_period) and its Zookeeper helpers."""
+
+from configparser import RawConfigParser
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.exceptions import PostgresConnectionError
+from src.host_gc import DepartedHostCollector, DepartedHostCollectorConfig, create_departed_host_collector
+from src.zk_client import ZkClientError, ZkReadBatch
+
+
+@pytest.fixture
+def gc_zk():
+    zk = MagicMock()
+    zk.get_hosts_with_nodes.return_value = {'me', 'leader', 'quorum1', 'streaming', 'gone1', 'gone2', 'alive1'}
+    zk.get_current_lock_holder.return_value = 'leader'
+    zk.get_quorum.return_value = ['quorum1']
+    zk.get_hosts_with_sessions.side_effect = lambda hosts: set(hosts) & {'alive1'}
+    zk.delete_host_nodes.return_value = True
+    return zk
+
+
+def _collector(zk, grace_period=100.0, hosts_per_scan=1, scan_interval=0.0, drop_slots=None):
+    config = DepartedHostCollectorConfig(grace_period, hosts_per_scan, scan_interval)
+    return DepartedHostCollector(zk, config, drop_slots if drop_slots is not None else MagicMock(return_value=True))
+
+
+DB_STATE = {'replics_info': [{'client_hostname': 'streaming'}]}
+
+
+@pytest.fixture(autouse=True)
+def hostname():
+    with patch('src.host_gc.helpers.get_hostname', return_value='me'):
+        yield
+
+
+class TestDepartedHostCollector:
+
+    def test_disabled(self, gc_zk):
+        _collector(gc_zk, grace_period=0).collect(DB_STATE)
+        gc_zk.get_hosts_with_nodes.assert_not_called()
+
+    def test_only_unprotected_hosts_are_checked(self, gc_zk):
+        _collector(gc_zk).collect(DB_STATE)
+        gc_zk.get_hosts_with_sessions.assert_called_once_with({'gone1', 'gone2', 'alive1'})
+
+    def test_deleted_after_grace_period_rate_limited(self, gc_zk):
+        collector = _collector(gc_zk)
+        with patch('src.host_gc.time.monotonic', return_value=1000.0):
+            collector.collect(DB_STATE)
+        with patch('src.host_gc.time.monotonic', return_value=1050.0):
+            collector.collect(DB_STATE)
+        gc_zk.delete_host_nodes.assert_not_called()
+        with patch('src.host_gc.time.monotonic', return_value=1100.0):
+            collector.collect(DB_STATE)
+        gc_zk.delete_host_nodes.assert_called_once_with(['gone1'])
+        with patch('src.host_gc.time.monotonic', return_value=1101.0):
+            collector.collect(DB_STATE)
+        assert gc_zk.delete_host_nodes.call_args.args[0] == ['gone2']
+
+    def test_returning_host_restarts_grace_period(self, gc_zk):
+        collector = _collector(gc_zk)
+        with patch('src.host_gc.time.monotonic', return_value=1000.0):
+            collector.collect(DB_STATE)
+        gc_zk.get_hosts_with_sessions.side_effect = lambda hosts: set(hosts)
+        with patch('src.host_gc.time.monotonic', return_value=1050.0):
+            collector.collect(DB_STATE)
+        gc_zk.get_hosts_with_sessions.side_effect = lambda hosts: set()
+        with patch('src.host_gc.time.monotonic', return_value=1100.0):
+            collector.collect(DB_STATE)
+        gc_zk.delete_host_nodes.assert_not_called()
+
+    def test_scan_interval(self, gc_zk):
+        collector = _collector(gc_zk, scan_interval=60.0)
+        with patch('src.host_gc.time.monotonic', return_value=1000.0):
+            collector.collect(DB_STATE)
+        with patch('src.host_gc.time.monotonic', return_value=1030.0):
+            collector.collect(DB_STATE)
+        assert gc_zk.get_hosts_with_nodes.call_count == 1
+
+    def test_zk_error_aborts_scan(self, gc_zk):
+        gc_zk.get_hosts_with_sessions.side_effect = None
+        gc_zk.get_hosts_with_sessions.return_value = None
+        _collector(gc_zk, grace_period=0.001).collect(DB_STATE)
+        gc_zk.delete_host_nodes.assert_not_called()
+
+    def test_slots_dropped_before_nodes(self, gc_zk):
+        calls = MagicMock()
+        calls.delete.return_value = True
+        gc_zk.delete_host_nodes.side_effect = calls.delete
+        collector = _collector(gc_zk, grace_period=0.001, drop_slots=calls.drop)
+        with patch('src.host_gc.time.monotonic', side_effect=[1000.0, 1001.0]):
+            collector.collect(DB_STATE)
+            collector.collect(DB_STATE)
+        assert [c[0] for c in calls.mock_calls] == ['drop', 'delete']
+        calls.drop.assert_called_once_with(['gone1'])
+
+    def test_slot_drop_failure_keeps_nodes(self, gc_zk):
+        drop = MagicMock(side_effect=PostgresConnectionError('gone'))
+        collector = _collector(gc_zk, grace_period=0.001, drop_slots=drop)
+        with patch('src.host_gc.time.monotonic', side_effect=[1000.0, 1001.0]):
+            collector.collect(DB_STATE)
+            collector.collect(DB_STATE)
+        drop.assert_called_once()
+        gc_zk.delete_host_nodes.assert_not_called()
+
+    def test_factory_rejects_non_positive_batch(self):
+        config = RawConfigParser()
+        config.read_dict({'global': {'zk_gc_grace_period': '600', 'zk_gc_hosts_per_scan': '0', 'zk_gc_scan_interval': '60'}})
+        with pytest.raises(ValueError):
+            create_departed_host_collector(config, MagicMock(), MagicMock())
+
+
+class TestZookeeperHostNodes:
+
+    def test_get_hosts_with_nodes(self, zk):
+        zk._zk_client = MagicMock()
+        zk._zk_client.read_batch.return_value = ZkReadBatch(
+            children={'all_hosts': ['h1', 'h2'], 'alive': ['h1', '_registry'], 'maintenance': ['ts', 'master', 'h3']}
+        )
+        assert zk.get_hosts_with_nodes() == {'h1', 'h2', 'h3'}
+        assert 'quorum/members' in zk._zk_client.read_batch.call_args.kwargs['children_paths']
+
+    def test_get_hosts_with_nodes_error(self, zk):
+        zk._zk_client = MagicMock()
+        zk._zk_client.read_batch.side_effect = ZkClientError('boom')
+        assert zk.get_hosts_with_nodes() is None
+
+    def test_get_hosts_with_sessions(self, zk):
+        zk._zk_client = MagicMock()
+        zk._zk_client.read_batch.return_value = ZkReadBatch(
+            children={
+                'alive/h1': ['lock-0001'], 'quorum/members/h1': [], 'alive/h2': [], 'quorum/members/h2': [],
+                'alive/h3': [], 'quorum/members/h3': [], 'alive/h4': [], 'quorum/members/h4': [],
+            },
+            exists={
+                'daemons/h1': False, 'alive/_registry/h1': False, 'quorum/members/_registry/h1': False,
+                'daemons/h2': False, 'alive/_registry/h2': True, 'quorum/members/_registry/h2': False,
+                'daemons/h3': False, 'alive/_registry/h3': False, 'quorum/members/_registry/h3': False,
+                # Daemon running with PostgreSQL down: no alive / quorum node.
+                'daemons/h4': True, 'alive/_registry/h4': False, 'quorum/members/_registry/h4': False,
+            },
+        )
+        assert zk.get_hosts_with_sessions(['h1', 'h2', 'h3', 'h4']) == {'h1', 'h2', 'h4'}
+
+    def test_register_daemon_once_per_session(self, zk):
+        zk._zk_client = MagicMock()
+        zk._zk_client.session_id.return_value = 0x100
+        assert zk.register_daemon() is True
+        assert zk.register_daemon() is True
+        zk._zk_client.ensure_ephemeral.assert_called_once()
+        assert zk._zk_client.ensure_ephemeral.call_args.args[0].startswith('daemons/')
+        zk._zk_client.session_id.return_value = 0x200
+        assert zk.register_daemon() is True
+        assert zk._zk_client.ensure_ephemeral.call_count == 2
+
+    def test_register_daemon_retried_after_failure(self, zk):
+        zk._zk_client = MagicMock()
+        zk._zk_client.session_id.return_value = 0x100
+        zk._zk_client.ensure_ephemeral.side_effect = [ZkClientError('boom'), None]
+        assert zk.register_daemon() is False
+        assert zk.register_daemon() is True
+
+    def test_delete_host_nodes(self, zk):
+        with patch.object(zk, 'plan_delete', return_value=['all_hosts/h1/ha']) as plan, patch.object(zk, 'apply_bulk', return_value=True) as apply:
+            assert zk.delete_host_nodes(['h1']) is True
+        assert 'all_hosts/h1' in plan.call_args.args[0]
+        assert 'election_vote/h1' in plan.call_args.args[0]
+        apply.assert_called_once_with(deletes=['all_hosts/h1/ha'])
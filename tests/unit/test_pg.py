@@ -60,7 +60,7 @@ def _make_postgres(conn=None, mock_cmd=None) -> Postgres:
         if conn is not None:
             mock_connect.return_value = conn
         else:
-            fake_conn = MagicMock()
+            fake_conn = MagicMock(closed=0)
             fake_conn.cursor.return_value = MagicMock()
             mock_connect.return_value = fake_conn
 
@@ -119,26 +119,14 @@ class TestExecQueryTranslation:
 
     def _make_pg_with_failing_execute(self, exc):
         """
-        Return a Postgres instance where:
-          - _create_cursor health-check (SELECT 1;) succeeds,
-          - the actual query execute() raises *exc*.
+        Return a Postgres instance with an open, already validated connection
+        whose execute() raises *exc*.
         """
         pg = _make_postgres()
 
-        # _create_cursor calls cursor.execute('SELECT 1;') as a health-check,
-        # then _exec_query calls cursor.execute(real_query, {}).
-        # We distinguish them by call count.
-        call_count = {'n': 0}
-
-        def execute_side_effect(query, *args):
-            call_count['n'] += 1
-            if call_count['n'] > 1:
-                # Second call is the real query
-                raise exc
-
         cur = MagicMock()
-        cur.execute.side_effect = execute_side_effect
-        fake_conn = MagicMock()
+        cur.execute.side_effect = exc
+        fake_conn = MagicMock(closed=0)
         fake_conn.cursor.return_value = cur
         pg.conn_local = fake_conn
         return pg
@@ -166,6 +154,38 @@ class TestExecQueryTranslation:
         with pytest.raises(ValueError):
             pg._exec_query("SELECT something")
 
+    def test_no_select_1_before_query(self):
+        pg = self._make_pg_with_failing_execute(None)
+        pg._exec_query("SELECT something")
+        pg.conn_local.cursor.return_value.execute.assert_called_once_with("SELECT something", {})
+
+    def test_first_query_of_iteration_retried_on_new_connection(self):
+        pg = self._make_pg_with_failing_execute(psycopg2.OperationalError("server closed the connection"))
+        pg.begin_iteration()
+        new_cur = MagicMock()
+
+        def reconnect():
+            pg.conn_local = MagicMock(closed=0)
+            pg.conn_local.cursor.return_value = new_cur
+        with patch.object(pg, 'reconnect', side_effect=reconnect) as mock_reconnect:
+            assert pg._exec_query("SELECT something") is new_cur
+        mock_reconnect.assert_called_once()
+        assert pg._conn_validated is True
+
+    def test_retry_failure_raises(self):
+        pg = self._make_pg_with_failing_execute(psycopg2.OperationalError("broken"))
+        pg.begin_iteration()
+        with patch.object(pg, 'reconnect', side_effect=lambda: setattr(pg, 'conn_local', None)):
+            with pytest.raises(PostgresConnectionError):
+                pg._exec_query("SELECT something")
+
+    def test_closed_connection_reconnects_before_query(self):
+        pg = self._make_pg_with_failing_execute(None)
+        pg.conn_local.closed = 1
+        with patch.object(pg, 'reconnect', side_effect=lambda: setattr(pg, 'conn_local', None)):
+            with pytest.raises(PostgresConnectionError):
+                pg._exec_query("SELECT something")
+
     def test_connection_closed_after_operational_error(self):
         """After psycopg2.OperationalError, self.close() is called."""
         pg = self._make_pg_with_failing_execute(
@@ -572,7 +592,8 @@ class TestGetState:
         # _collect_db_state() propagates PostgresConnectionError (ADR-0001).
         pg = _make_postgres()
         data: dict = {'alive': True}
-        with patch.object(pg, 'get_role', return_value='replica'), \
+        with patch.object(pg, 'take_snapshot'), \
+             patch.object(pg, 'get_role', return_value='replica'), \
              patch.object(pg, '_get_pgdata_path', return_value='/data'), \
              patch.object(pg, 'pgpooler', return_value=(True, True)), \
              patch.object(pg, 'get_timeline', return_value=1), \
@@ -584,7 +605,8 @@ class TestGetState:
         # _collect_db_state() propagates PostgresConnectionError (ADR-0001).
         pg = _make_postgres()
         data: dict = {'alive': True}
-        with patch.object(pg, 'get_role', return_value='primary'), \
+        with patch.object(pg, 'take_snapshot'), \
+             patch.object(pg, 'get_role', return_value='primary'), \
              patch.object(pg, '_get_pgdata_path', return_value='/data'), \
              patch.object(pg, 'pgpooler', return_value=(True, True)), \
              patch.object(pg, 'get_timeline', return_value=1), \
@@ -594,6 +616,131 @@ class TestGetState:
                 pg._collect_db_state(data)
 
 
+class TestDbSnapshot:
+    """take_snapshot reads the iteration's DB state in one query; getters answer from it once."""
+
+    REPLICS = [{'client_hostname': 'h2', 'sync_state': 'quorum', 'reply_time_ms': 1}]
+    WAL_RECEIVER = {'pid': 7, 'status': 'streaming'}
+
+    def _pg_with_snapshot(self, in_recovery=False):
+        pg = _make_postgres()
+        pg.conn_local = MagicMock(closed=0)
+        cur = pg.conn_local.cursor.return_value
+        cur.fetchone.return_value = (
+            in_recovery,
+            {
+                'data_directory': '/data/pg',
+                'synchronous_standby_names': 'ANY 1(h2)',
+                'max_connections': '200',
+                'archive_command': '/bin/false',
+            },
+            self.WAL_RECEIVER if in_recovery else None,
+            self.REPLICS,
+            50,
+            False if in_recovery else None,
+            3,
+        )
+        pg.take_snapshot()
+        cur.execute.reset_mock()
+        return pg, cur
+
+    def test_one_query(self):
+        pg = _make_postgres()
+        pg.conn_local = MagicMock(closed=0)
+        pg.conn_local.cursor.return_value.fetchone.return_value = (False, None, None, [], 0, None, None)
+        snapshot = pg.take_snapshot()
+        pg.conn_local.cursor.return_value.execute.assert_called_once()
+        assert snapshot.role == 'primary'
+        assert snapshot.settings == {}
+
+    def test_getters_answer_from_snapshot(self):
+        pg, cur = self._pg_with_snapshot()
+        assert pg.get_role() == 'primary'
+        assert pg._get_pgdata_path() == '/data/pg'
+        assert pg.get_replics_info('primary') == self.REPLICS
+        assert pg.get_replication_state() == ('sync', 'ANY 1(h2)')
+        assert pg.get_sessions_ratio() == 25.0
+        assert pg._get_wal_receiver_info() is None
+        assert pg._get_param_value('archive_command') == '/bin/false'
+        assert pg.get_timeline() == 3
+        cur.execute.assert_not_called()
+
+    def test_second_call_queries_server(self):
+        pg, cur = self._pg_with_snapshot()
+        cur.fetchone.return_value = (True,)
+        assert pg.get_role() == 'primary'
+        assert pg.get_role() == 'replica'
+        cur.execute.assert_called_once_with('SELECT pg_is_in_recovery();', {})
+
+    def test_missing_setting_queries_server(self):
+        pg, cur = self._pg_with_snapshot()
+        cur.fetchone.return_value = ('/usr/bin/restore',)
+        assert pg._get_param_value('restore_command') == '/usr/bin/restore'
+        cur.execute.assert_called_once_with('SHOW restore_command', {})
+
+    def test_replics_info_of_other_role_queries_server(self):
+        pg, _ = self._pg_with_snapshot()
+        with patch.object(pg, '_get', return_value=[]) as mock_get:
+            assert pg.get_replics_info('replica') == []
+        assert 'pg_last_wal_replay_lsn()' in mock_get.call_args.args[0]
+
+    def test_replica_fields(self):
+        pg, cur = self._pg_with_snapshot(in_recovery=True)
+        assert pg._get_wal_receiver_info() == self.WAL_RECEIVER
+        assert pg.is_wal_replay_paused() is False
+        cur.execute.assert_not_called()
+
+    @pytest.mark.parametrize('action', [
+        lambda pg: pg.reload(),
+        lambda pg: pg.begin_iteration(),
+        lambda pg: pg.close(),
+        lambda pg: pg.stop_postgresql(),
+    ])
+    def test_dropped_by_state_changes(self, action):
+        pg, _ = self._pg_with_snapshot()
+        action(pg)
+        assert pg._snapshot is None
+
+
+class TestIsAliveAndInTerminalState:
+    """The liveness probe reuses a healthy connection and reconnects only on failure."""
+
+    def _open_conn(self, pg):
+        pg.conn_local = MagicMock(closed=0)
+        cur = pg.conn_local.cursor.return_value
+        cur.fetchone.return_value = (42,)
+        return cur
+
+    def test_reuses_open_connection(self):
+        pg = _make_postgres()
+        cur = self._open_conn(pg)
+        with patch.object(pg, 'reconnect') as mock_reconnect:
+            assert pg.is_alive_and_in_terminal_state() == (True, True)
+        mock_reconnect.assert_not_called()
+        cur.execute.assert_called_once_with('SELECT 42;')
+        cur.close.assert_called_once()
+
+    def test_reconnects_when_probe_fails(self):
+        pg = _make_postgres()
+        cur = self._open_conn(pg)
+        cur.execute.side_effect = psycopg2.OperationalError('server closed the connection')
+        with patch.object(pg, 'reconnect') as mock_reconnect, \
+             patch.object(pg, '_exec_query') as mock_exec:
+            mock_exec.return_value.fetchone.return_value = (42,)
+            assert pg.is_alive_and_in_terminal_state() == (True, True)
+        mock_reconnect.assert_called_once()
+
+    def test_reconnects_when_connection_closed(self):
+        pg = _make_postgres()
+        pg.conn_local = MagicMock(closed=2)
+        with patch.object(pg, 'reconnect') as mock_reconnect, \
+             patch.object(pg, '_exec_query', side_effect=PostgresConnectionError('Local conn is dead')):
+            pg.terminal_state = False
+            assert pg.is_alive_and_in_terminal_state() == (False, False)
+        mock_reconnect.assert_called_once()
+        pg.conn_local.cursor.assert_not_called()
+
+
 class TestCheckpoint:
 
     def test_checkpoint_succeeds(self):
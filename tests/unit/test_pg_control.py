@@ -0,0 +1,135 @@
+# encoding: utf-8
+"""Tests for the native pg_control reader (src/pg_control.py) and its use by Postgres."""
+
+import ctypes
+import os
+import platform
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.pg_control import FLOAT_FORMAT_VALUE, LAYOUTS, PgControlReader, crc32c, parse_pg_control
+
+
+def _pg_control(version=1300, state=6, timeline=3, wal_log_hints=True, checksums=1, corrupt=False) -> bytes:
+    """Content of a pg_control file as PostgreSQL writes it (8 kB, CRC over the struct up to crc)."""
+    layout = LAYOUTS[version]
+    control = layout()
+    control.system_identifier = 7000000000000000001
+    control.pg_control_version = version
+    control.state = state
+    control.check_point_copy.this_timeline_id = timeline
+    control.wal_log_hints = wal_log_hints
+    control.float_format = FLOAT_FORMAT_VALUE
+    control.blcksz = 8192
+    control.data_checksum_version = checksums
+    raw = bytearray(bytes(control))
+    control.crc = crc32c(bytes(raw[:layout.crc.offset]))
+    raw = bytearray(bytes(control))
+    if corrupt:
+        raw[20] ^= 0xFF
+    return bytes(raw) + b'\0' * (8192 - len(raw))
+
+
+# Offsets of ControlFileData on x86_64, from catalog/pg_control.h of each major version
+# (offsetof(ControlFileData, crc) is also the CRC length PostgreSQL uses).
+X86_64_OFFSETS = {
+    1201: {'state': 16, 'check_point_copy': 40, 'wal_log_hints': 176, 'float_format': 208, 'data_checksum_version': 252, 'crc': 288},
+    1300: {'state': 16, 'check_point_copy': 40, 'wal_log_hints': 176, 'float_format': 208, 'data_checksum_version': 252, 'crc': 288},
+    1700: {'state': 16, 'check_point_copy': 40, 'wal_log_hints': 176, 'float_format': 208, 'data_checksum_version': 252, 'crc': 288},
+    1800: {'state': 16, 'check_point_copy': 40, 'wal_log_hints': 176, 'float_format': 208, 'data_checksum_version': 252, 'crc': 292},
+}
+
+
+@pytest.mark.skipif(platform.machine() not in ('x86_64', 'AMD64'), reason='offsets are those of x86_64')
+@pytest.mark.parametrize('version', sorted(X86_64_OFFSETS))
+def test_layout_matches_postgres(version):
+    layout = LAYOUTS[version]
+    assert ctypes.sizeof(layout) == 296
+    for field, offset in X86_64_OFFSETS[version].items():
+        assert getattr(layout, field).offset == offset, field
+    # sizeof(CheckPoint) is 88 in every version: PG 17's wal_level fills padding.
+    checkpoint = dict(layout._fields_)['check_point_copy']
+    assert ctypes.sizeof(checkpoint) == 88
+    assert checkpoint.this_timeline_id.offset == 8
+
+
+def test_crc32c_check_value():
+    assert crc32c(b'123456789') == 0xE3069283
+
+
+@pytest.mark.parametrize('version', sorted(LAYOUTS))
+def test_parse(version):
+    data = parse_pg_control(_pg_control(version=version))
+    assert data is not None
+    assert data.parameter('Latest checkpoint.s TimeLineID') == '3'
+    assert data.parameter('Database cluster state') == 'in production'
+    assert data.parameter('Data page checksum version') == '1'
+    assert data.parameter('wal_log_hints setting') == 'on'
+    assert data.parameter('Unknown field') is None
+
+
+def test_crc_mismatch():
+    assert parse_pg_control(_pg_control(corrupt=True)) is None
+
+
+def test_unknown_version():
+    raw = bytearray(_pg_control())
+    raw[8:12] = (1100).to_bytes(4, byteorder=sys.byteorder)
+    assert parse_pg_control(bytes(raw)) is None
+
+
+def test_truncated():
+    assert parse_pg_control(_pg_control()[:100]) is None
+
+
+class TestPgControlReader:
+
+    def _write(self, tmp_path, content):
+        path = tmp_path / 'global' / 'pg_control'
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    def test_reparsed_only_when_content_changes(self, tmp_path):
+        path = self._write(tmp_path, _pg_control(timeline=3))
+        reader = PgControlReader()
+        assert reader.read(str(tmp_path)).timeline == 3
+        with patch('src.pg_control.parse_pg_control') as parse:
+            assert reader.read(str(tmp_path)).timeline == 3
+        parse.assert_not_called()
+        # Rewritten in place within one clock tick: same size and mtime.
+        stat = path.stat()
+        path.write_bytes(_pg_control(timeline=4, state=1))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        data = reader.read(str(tmp_path))
+        assert (data.timeline, data.state) == (4, 'shut down')
+
+    def test_missing_file(self, tmp_path):
+        assert PgControlReader().read(str(tmp_path)) is None
+        assert PgControlReader().read('') is None
+
+
+class TestPostgresControlFile:
+
+    def _postgres(self, control):
+        from src.pg import Postgres
+        pg = Postgres.__new__(Postgres)
+        pg.pgdata = '/data/pg'
+        pg._cmd_manager = MagicMock()
+        pg._pg_control = MagicMock()
+        pg._pg_control.read.return_value = control
+        pg._snapshot = None
+        return pg
+
+    def test_native_value_no_subprocess(self):
+        pg = self._postgres(parse_pg_control(_pg_control(timeline=5)))
+        assert pg.get_timeline() == 5
+        pg._cmd_manager.get_control_parameter.assert_not_called()
+
+    def test_falls_back_to_command(self):
+        pg = self._postgres(None)
+        pg._cmd_manager.get_control_parameter.return_value = 'shut down'
+        assert pg.get_database_cluster_state() == 'shut down'
+        pg._cmd_manager.get_control_parameter.assert_called_once_with('/data/pg', 'Database cluster state', None, True)
@@ -0,0 +1,136 @@
+# encoding: utf-8
+"""Tests for pooled remote health probes (src/pg_probe.py, Postgres.is_host_unreachable)."""
+
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from src.pg_probe import DEFAULT_PROBE_TIMEOUT, ProbeConnectionPool, ProbeTimeout, _wait, probe_timeout
+
+
+def _conn(result=(False,), error=None):
+    conn = MagicMock(closed=0)
+    conn.poll.return_value = psycopg2.extensions.POLL_OK
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = result
+    if error is not None:
+        cur.execute.side_effect = error
+    return conn
+
+
+class TestProbeConnectionPool:
+
+    def test_connection_reused(self):
+        conn = _conn()
+        pool = ProbeConnectionPool(timeout=1.0)
+        with patch('src.pg_probe.psycopg2.connect', return_value=conn) as connect:
+            assert pool.probe('host=h1', 'SELECT pg_is_in_recovery()') is False
+            assert pool.probe('host=h1', 'SELECT pg_is_in_recovery()') is False
+        connect.assert_called_once_with('host=h1', async_=True)
+        conn.close.assert_not_called()
+
+    def test_stale_connection_retried_on_new_one(self):
+        stale = _conn(error=psycopg2.OperationalError('server closed the connection'))
+        fresh = _conn(result=(True,))
+        pool = ProbeConnectionPool(timeout=1.0)
+        pool._keep('host=h1', stale)
+        with patch('src.pg_probe.psycopg2.connect', return_value=fresh):
+            assert pool.probe('host=h1', 'SELECT pg_is_in_recovery()') is True
+        stale.close.assert_called_once()
+
+    def test_new_connection_failure_raises(self):
+        pool = ProbeConnectionPool(timeout=1.0)
+        with patch('src.pg_probe.psycopg2.connect', side_effect=psycopg2.OperationalError('refused')):
+            with pytest.raises(psycopg2.OperationalError):
+                pool.probe('host=h1', 'SELECT 1')
+        assert not pool._connections
+
+    def test_least_recently_used_evicted(self):
+        pool = ProbeConnectionPool(timeout=1.0)
+        conns = [_conn() for _ in range(ProbeConnectionPool.MAX_CONNECTIONS + 1)]
+        for i, conn in enumerate(conns):
+            pool._keep(f'host=h{i}', conn)
+        conns[0].close.assert_called_once()
+        assert 'host=h0' not in pool._connections
+
+    def test_retry_shares_the_deadline(self):
+        stale = _conn(error=psycopg2.OperationalError('server closed the connection'))
+        pool = ProbeConnectionPool(timeout=1.0)
+        pool._keep('host=h1', stale)
+        # Probe starts at 0, the pooled attempt fails at 1.5: no time left for a new connection.
+        with patch('src.pg_probe.time.monotonic', side_effect=[0.0, 1.5]), \
+             patch('src.pg_probe.psycopg2.connect') as connect:
+            with pytest.raises(ProbeTimeout):
+                pool.probe('host=h1', 'SELECT 1')
+        connect.assert_not_called()
+
+    def test_no_reuse(self):
+        pooled, fresh = _conn(), _conn(result=(True,))
+        pool = ProbeConnectionPool(timeout=1.0)
+        pool._keep('host=h1', pooled)
+        with patch('src.pg_probe.psycopg2.connect', return_value=fresh):
+            assert pool.probe('host=h1', 'SELECT pg_is_in_recovery()', reuse=False) is True
+        pooled.close.assert_called_once()
+        fresh.close.assert_called_once()
+        assert not pool._connections
+
+    @pytest.mark.parametrize('configured, append, expected', [
+        (2.5, 'connect_timeout=1', 2.5),
+        (0, 'port=6432 connect_timeout=4 sslmode=verify-full', 4.0),
+        (0, 'port=6432', DEFAULT_PROBE_TIMEOUT),
+        (0, 'connect_timeout=0', DEFAULT_PROBE_TIMEOUT),
+    ])
+    def test_probe_timeout(self, configured, append, expected):
+        assert probe_timeout(configured, append) == expected
+
+    def test_wait_deadline(self):
+        conn = MagicMock()
+        conn.poll.return_value = psycopg2.extensions.POLL_READ
+        with patch('src.pg_probe.select.select'), patch('src.pg_probe.time.monotonic', side_effect=[0.0, 0.5, 1.5]):
+            with pytest.raises(ProbeTimeout):
+                _wait(conn, deadline=1.0)
+
+
+class TestIsHostUnreachable:
+
+    def _postgres(self, append='connect_timeout=1'):
+        from src.pg import Postgres
+        pg = Postgres.__new__(Postgres)
+        pg.config = MagicMock(append_primary_conn_string=append)
+        pg._probe_pool = MagicMock()
+        return pg
+
+    def test_reachable(self):
+        pg = self._postgres()
+        pg._probe_pool.probe.return_value = True
+        assert pg.is_host_unreachable('h1', check_primary=False) is False
+        conninfo = pg._probe_pool.probe.call_args.args[0]
+        assert conninfo.startswith('host=h1 connect_timeout=1 keepalives=1')
+        assert 'target_session_attrs' not in conninfo
+
+    def test_replica_is_not_a_reachable_primary(self):
+        pg = self._postgres()
+        pg._probe_pool.probe.return_value = True
+        assert pg.is_host_unreachable('h1') is True
+        assert 'target_session_attrs=primary' in pg._probe_pool.probe.call_args.args[0]
+
+    def test_probe_failure(self):
+        pg = self._postgres()
+        pg._probe_pool.probe.side_effect = ProbeTimeout()
+        assert pg.is_host_unreachable('h1') is True
+
+    def test_own_target_session_attrs(self):
+        # libpq checks them on connect: a new connection each time, reachable if the query runs.
+        pg = self._postgres(append='connect_timeout=1 target_session_attrs=read-write')
+        pg._probe_pool.probe.return_value = True
+        assert pg.is_host_unreachable('h1') is False
+        assert pg._probe_pool.probe.call_args.kwargs['reuse'] is False
+        assert 'target_session_attrs=primary' not in pg._probe_pool.probe.call_args.args[0]
+
+    def test_own_keepalives_kept(self):
+        pg = self._postgres(append='keepalives=0')
+        pg._probe_pool.probe.return_value = False
+        assert pg.is_host_unreachable('h1') is False
+        assert pg._probe_pool.probe.call_args.args[0] == 'host=h1 keepalives=0 target_session_attrs=primary'
@@ -30,6 +30,9 @@ def _full_config(**section_overrides) -> RawConfigParser:
         'election_timeout': '10',
         'do_consecutive_primary_switch': 'no',
         'max_allowed_switchover_lag_ms': '1000',
+        'zk_gc_grace_period': '0',
+        'zk_gc_hosts_per_scan': '1',
+        'zk_gc_scan_interval': '60',
     }
     global_defaults.update(section_overrides.pop('global', {}))
     replica_defaults = {
@@ -144,7 +147,21 @@ class TestCreatePgconsul:
         assert inst is not None
         mock_cmd.assert_called_once_with(config)
         mock_pg.assert_called_once_with(config=config, cmd_manager=mock_cmd.return_value)
-        mock_zk.assert_called_once_with(config=config)
+        mock_zk.assert_called_once_with(config=config, session_file=None)
         mock_repl.assert_called_once_with(config, mock_pg.return_value, mock_zk.return_value)
         mock_slot.assert_called_once_with(config, mock_pg.return_value, mock_zk.return_value)
         mock_timings.assert_called_once()
+
+    def test_zk_session_resume_passes_session_file(self):
+        config = _full_config(**{'global': {'zk_session_resume': 'yes'}})
+        with patch('src.main.create_command_manager'), \
+             patch('src.main.create_postgres'), \
+             patch('src.main.create_zk') as mock_zk, \
+             patch('src.main.create_replication_manager'), \
+             patch('src.main.create_replication_slot_manager'), \
+             patch('src.main.TimingTracker'), \
+             patch('src.main.Pgconsul.startup_checks'), \
+             patch('src.main.register_sigterm_handler'):
+            create_pgconsul(config)
+
+        mock_zk.assert_called_once_with(config=config, session_file='/var/lib/pgconsul/.pgconsul_zk_session')
@@ -25,6 +25,8 @@ def _make_opts(force: bool = True, timeout: int = 300):
     opts = MagicMock()
     opts.force = force
     opts.timeout = timeout
+    opts.dry_run = False
+    opts.chunk_size = 500
     return opts
 
 
@@ -45,6 +47,8 @@ def _make_zk(children: list[str] | None = None) -> MagicMock:
     ]
     # get_maintenance_status returns None so maintenance_disabled() is True
     zk.get_maintenance_status.return_value = None
+    # Children first, as the real plan_delete returns them.
+    zk.plan_delete.side_effect = lambda nodes: [f'{node}/child' for node in nodes] + list(nodes)
     return zk
 
 
@@ -62,15 +66,18 @@ class TestResetAllWritesDisableBeforeDelete:
         during recursive delete (pgconsul_util.feature:877).
         """
         zk = _make_zk()
-        zk.delete.return_value = True
+        calls = []
+        zk.write_maintenance_status.side_effect = lambda status: calls.append(('write', status))
+        zk.apply_bulk.side_effect = lambda **kwargs: calls.append(('bulk', kwargs['deletes'])) or True
         mock_create_zk.return_value.__enter__.return_value = zk
 
         reset_all(_make_opts(), _make_conf())
 
         # Must write 'disable' before deleting maintenance
-        zk.write_maintenance_status.assert_any_call('disable')
-        # Must have deleted maintenance
-        zk.delete.assert_any_call('maintenance', recursive=True)
+        assert calls.index(('write', 'disable')) < [c[0] for c in calls].index('bulk')
+        # Must have deleted maintenance (and its children first)
+        deletes = zk.apply_bulk.call_args.kwargs['deletes']
+        assert deletes.index('maintenance/child') < deletes.index('maintenance')
 
 
 class TestResetAllRetriesMaintenanceDelete:
@@ -87,27 +94,16 @@ class TestResetAllRetriesMaintenanceDelete:
         to delete maintenance. The delete must be retried.
         """
         zk = _make_zk(children=['alive', 'maintenance'])
-
-        # Track delete calls per node
-        call_counts: dict[str, int] = {}
-
-        def mock_delete(node, recursive=False):
-            call_counts[node] = call_counts.get(node, 0) + 1
-            # 'alive' succeeds on first try
-            if node == 'alive':
-                return True
-            # 'maintenance' fails first, succeeds on retry
-            if node == 'maintenance':
-                return call_counts[node] >= 2
-            return True
-
-        zk.delete.side_effect = mock_delete
+        # First transaction fails (child recreated under maintenance), retry succeeds.
+        zk.apply_bulk.side_effect = [False, True]
         mock_create_zk.return_value.__enter__.return_value = zk
 
         reset_all(_make_opts(), _make_conf())
 
-        # Must have retried maintenance deletion
-        assert call_counts.get('maintenance', 0) >= 2
+        # Must have retried maintenance deletion, re-planning the tree
+        assert zk.apply_bulk.call_count == 2
+        assert zk.plan_delete.call_count == 2
+        assert 'maintenance' in zk.apply_bulk.call_args.kwargs['deletes']
 
     @patch('time.sleep')
     @patch('src.cli._wait_maintenance_disabled')
@@ -116,14 +112,14 @@ class TestResetAllRetriesMaintenanceDelete:
     def test_raises_after_max_retries(self, mock_create_zk, _mock_enable, _mock_wait, _mock_sleep):
         """reset_all must raise ResetException when maintenance delete fails after retries."""
         zk = _make_zk(children=['maintenance'])
-        zk.delete.return_value = False
+        zk.apply_bulk.return_value = False
         mock_create_zk.return_value.__enter__.return_value = zk
 
         with pytest.raises(ResetException):
             reset_all(_make_opts(), _make_conf())
 
         # Must have tried multiple times
-        assert zk.delete.call_count >= 3
+        assert zk.apply_bulk.call_count >= 3
 
 
 class TestResetAllNonMaintenanceNodesRetry:
@@ -140,11 +136,11 @@ class TestResetAllNonMaintenanceNodesRetry:
     def test_non_maintenance_failure_raises_after_retries(self, mock_create_zk, _mock_enable, _mock_wait, _mock_sleep):
         """Non-maintenance node deletion failure must raise ResetException after retries."""
         zk = _make_zk(children=['alive', 'maintenance'])
-        zk.delete.return_value = False
+        zk.apply_bulk.return_value = False
         mock_create_zk.return_value.__enter__.return_value = zk
 
         with pytest.raises(ResetException):
             reset_all(_make_opts(), _make_conf())
 
         # Must have retried (not fail immediately)
-        assert zk.delete.call_count >= 3
+        assert zk.apply_bulk.call_count >= 3
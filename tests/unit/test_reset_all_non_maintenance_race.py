@@ -28,6 +28,8 @@ def _make_opts(force: bool = True, timeout: int = 300):
     opts = MagicMock()
     opts.force = force
     opts.timeout = timeout
+    opts.dry_run = False
+    opts.chunk_size = 500
     return opts
 
 
@@ -48,6 +50,7 @@ def _make_zk(children: list[str] | None = None) -> MagicMock:
     ]
     # get_maintenance_status returns None so maintenance_disabled() is True
     zk.get_maintenance_status.return_value = None
+    zk.plan_delete.side_effect = lambda nodes: list(nodes)
     return zk
 
 
@@ -80,29 +83,20 @@ class TestResetAllRetriesNonMaintenanceNodes:
         """
         zk = _make_zk(children=['alive', 'leader', 'maintenance'])
 
-        call_counts: dict[str, int] = {}
-
-        def mock_delete(node, recursive=False):
-            call_counts[node] = call_counts.get(node, 0) + 1
-            # 'alive' fails first (NotEmptyError race), succeeds on retry
-            if node == 'alive':
-                return call_counts[node] >= 2
-            # 'leader' succeeds on first try
-            if node == 'leader':
-                return True
-            # 'maintenance' succeeds on first try
-            if node == 'maintenance':
-                return True
-            return True
-
-        zk.delete.side_effect = mock_delete
+        attempts: list[list[str]] = []
+
+        def mock_apply_bulk(creates=(), deletes=(), chunk_size=None):
+            attempts.append(list(deletes))
+            # The transaction containing 'alive' fails first (NotEmptyError race), succeeds on retry
+            return len(attempts) >= 2
+
+        zk.apply_bulk.side_effect = mock_apply_bulk
         mock_create_zk.return_value.__enter__.return_value = zk
 
         # Should NOT raise — transient failure on 'alive' must be retried
         reset_all(_make_opts(), _make_conf())
 
         # Must have retried 'alive' deletion
-        assert call_counts.get('alive', 0) >= 2, (
-            f"Expected 'alive' to be retried, but delete was called "
-            f"{call_counts.get('alive', 0)} times"
+        assert sum('alive' in deletes for deletes in attempts) >= 2, (
+            f"Expected 'alive' to be retried, but it was in {attempts}"
         )
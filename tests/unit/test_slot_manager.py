@@ -294,6 +294,36 @@ class TestCreateSlotsForHosts:
             manager.create_slots_for_hosts(['host2'])
 
 
+# ---------------------------------------------------------------------------
+# Tests: drop_slots_for_hosts
+# ---------------------------------------------------------------------------
+
+class TestDropSlotsForHosts:
+    """drop_slots_for_hosts drops the slots of departed hosts."""
+
+    def test_drops_present_slots_and_forgets_countdown(self):
+        """Only existing slots are dropped; the hosts' countdown is cleared."""
+        manager = _make_manager()
+        manager._drop_countdown = {'host2.db': 3, 'host3.db': 1}
+        manager._db.get_replication_slots.return_value = ['host2_db']
+        assert manager.drop_slots_for_hosts(['host2.db', 'host3.db']) is True
+        manager._db._drop_replication_slot.assert_called_once_with('host2_db')
+        assert manager._drop_countdown == {}
+
+    def test_skips_when_use_replication_slots_disabled(self):
+        """No DB access when use_replication_slots is off."""
+        manager = _make_manager(config=_make_config(use_replication_slots=False))
+        assert manager.drop_slots_for_hosts(['host2.db']) is True
+        manager._db.get_replication_slots.assert_not_called()
+
+    def test_propagates_connection_error(self):
+        """PostgresConnectionError propagates to the collector, which keeps the ZK nodes."""
+        manager = _make_manager()
+        manager._db.get_replication_slots.side_effect = PostgresConnectionError('db error')
+        with pytest.raises(PostgresConnectionError):
+            manager.drop_slots_for_hosts(['host2.db'])
+
+
 # ---------------------------------------------------------------------------
 # Tests: reset_on_promote
 # ---------------------------------------------------------------------------
@@ -0,0 +1,172 @@
+# encoding: utf-8
+"""Unit tests for AsyncZkClient — awaitable view over a ZkClient session."""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.zk_client import (
+    AsyncZkClient,
+    ZkClient,
+    ZkClientConfig,
+    ZkClientError,
+    ZkLockTimeout,
+    ZkNoNodeError,
+    ZkSessionExpiredError,
+    encode_compact,
+)
+
+
+class _FakeAsyncResult:
+    """kazoo IAsyncResult completed from another thread after an optional delay."""
+
+    def __init__(self, value=None, exc=None, delay=0.0):
+        self._value = value
+        self._exc = exc
+        self._delay = delay
+
+    def get_nowait(self):
+        if self._exc is not None:
+            raise self._exc
+        return self._value
+
+    def rawlink(self, callback):
+        timer = threading.Timer(self._delay, callback, args=(self,))
+        timer.daemon = True
+        timer.start()
+
+
+@pytest.fixture
+def aclient():
+    client = ZkClient(ZkClientConfig(
+        hosts='localhost:2181',
+        timeout=0.5,
+        connect_max_delay=10.0,
+        max_delay_on_reinit=30,
+        path_prefix='/pgconsul',
+    ))
+    client._kazoo = MagicMock()
+    return AsyncZkClient(client)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncReads:
+
+    def test_get_decodes(self, aclient):
+        aclient._client.get_async.return_value = _FakeAsyncResult((encode_compact('{"a": 1}'), None))
+        assert _run(aclient.get('replics_info')) == '{"a": 1}'
+        aclient._client.get_async.assert_called_once_with('/pgconsul/replics_info')
+
+    def test_get_no_node(self, aclient):
+        from kazoo.exceptions import NoNodeError
+        aclient._client.get_async.return_value = _FakeAsyncResult(exc=NoNodeError())
+        with pytest.raises(ZkNoNodeError):
+            _run(aclient.get('x'))
+
+    def test_get_session_expired(self, aclient):
+        from kazoo.exceptions import SessionExpiredError
+        aclient._client.get_async.return_value = _FakeAsyncResult(exc=SessionExpiredError())
+        with pytest.raises(ZkSessionExpiredError):
+            _run(aclient.get('x'))
+
+    def test_get_children_absent(self, aclient):
+        from kazoo.exceptions import NoNodeError
+        aclient._client.get_children_async.return_value = _FakeAsyncResult(exc=NoNodeError())
+        assert _run(aclient.get_children('all_hosts')) == []
+
+    def test_exists(self, aclient):
+        aclient._client.exists_async.return_value = _FakeAsyncResult(None)
+        assert _run(aclient.exists('x')) is False
+
+    def test_follows_reconnected_client(self, aclient):
+        aclient._zk_client._kazoo = MagicMock()
+        aclient._zk_client._kazoo.exists_async.return_value = _FakeAsyncResult(MagicMock())
+        assert _run(aclient.exists('x')) is True
+
+
+class TestAsyncWrites:
+
+    def test_write_creates_missing(self, aclient):
+        from kazoo.exceptions import NoNodeError
+        aclient._client.set_async.return_value = _FakeAsyncResult(exc=NoNodeError())
+        aclient._client.create_async.return_value = _FakeAsyncResult('/pgconsul/a/b')
+        assert _run(aclient.write('a/b', 'v')) is True
+        aclient._client.create_async.assert_called_once_with('/pgconsul/a/b', b'v', makepath=True)
+
+    def test_write_kazoo_error(self, aclient):
+        from kazoo.exceptions import KazooException
+        aclient._client.set_async.return_value = _FakeAsyncResult(exc=KazooException('boom'))
+        with pytest.raises(ZkClientError):
+            _run(aclient.write('a', 'v'))
+
+    def test_delete_absent(self, aclient):
+        from kazoo.exceptions import NoNodeError
+        aclient._client.delete_async.return_value = _FakeAsyncResult(exc=NoNodeError())
+        assert _run(aclient.delete('a')) is True
+
+
+class TestGather:
+
+    def test_reads_run_concurrently(self, aclient):
+        aclient._client.get_async.side_effect = lambda path: _FakeAsyncResult((path.encode(), None), delay=0.2)
+
+        async def main():
+            return await aclient.gather(*(aclient.get(f'h{i}') for i in range(5)), timeout=0.45)
+
+        # Serial execution would need 1 s and miss the deadline.
+        assert _run(main()) == [f'/pgconsul/h{i}' for i in range(5)]
+
+    def test_single_deadline(self, aclient):
+        aclient._client.get_async.return_value = _FakeAsyncResult((b'v', None), delay=1.0)
+
+        async def main():
+            return await aclient.gather(aclient.get('a'), timeout=0.05)
+
+        with pytest.raises(ZkClientError):
+            _run(main())
+
+    def test_domain_error_propagates(self, aclient):
+        from kazoo.exceptions import NoNodeError
+        aclient._client.get_async.return_value = _FakeAsyncResult(exc=NoNodeError())
+        aclient._client.exists_async.return_value = _FakeAsyncResult(True)
+
+        async def main():
+            return await aclient.gather(aclient.exists('a'), aclient.get('b'))
+
+        with pytest.raises(ZkNoNodeError):
+            _run(main())
+
+    def test_undecodable_value_is_client_error(self, aclient):
+        aclient._client.get_async.return_value = _FakeAsyncResult((b'\x00\x01notzlib', None))
+        aclient._client.exists_async.return_value = _FakeAsyncResult(True)
+
+        async def main():
+            return await aclient.gather(aclient.exists('a'), aclient.get('b'))
+
+        with pytest.raises(ZkClientError):
+            _run(main())
+
+
+class TestAsyncLocks:
+
+    def test_acquire_in_executor(self, aclient):
+        lock = MagicMock()
+        lock.acquire.return_value = True
+        assert _run(aclient.acquire(lock, blocking=False)) is True
+        lock.acquire.assert_called_once_with(blocking=False, timeout=None)
+
+    def test_acquire_timeout_contract(self, aclient):
+        lock = MagicMock()
+        lock.acquire.side_effect = ZkLockTimeout('timeout')
+        with pytest.raises(ZkLockTimeout):
+            _run(aclient.acquire(lock, timeout=1))
+
+    def test_contenders(self, aclient):
+        lock = MagicMock()
+        lock.contenders.return_value = ['h1']
+        assert _run(aclient.contenders(lock)) == ['h1']
@@ -20,8 +20,14 @@ from src.zk_client import (
     ZkConnectionClosedError,
     ZkLockTimeout,
     ZkNoNodeError,
+    RttEstimator,
     ZkSessionExpiredError,
     create_zk_client,
+    decode_zk_value,
+    encode_compact,
+    first_lock_node,
+    order_hosts_by_rtt,
+    parse_zk_hosts,
 )
 
 
@@ -117,6 +123,14 @@ class TestLockHandle:
         assert handle.acquire(blocking=True, timeout=1) is True
         lock.acquire.assert_called_once_with(blocking=True, timeout=1)
 
+    def test_node_path_when_acquired(self):
+        lock = MagicMock(is_acquired=True, path='/pgconsul/leader', node='_c_abc__lock__0000000003')
+        assert LockHandle(lock).node_path() == '/pgconsul/leader/_c_abc__lock__0000000003'
+
+    def test_node_path_when_not_acquired(self):
+        lock = MagicMock(is_acquired=False, path='/pgconsul/leader', node=None)
+        assert LockHandle(lock).node_path() is None
+
     def test_acquire_lock_timeout(self):
         from kazoo.exceptions import LockTimeout
         lock = MagicMock()
@@ -577,6 +591,77 @@ class TestLockVersion:
             client.lock_version('master')
 
 
+# === Data operations: read_batch ===
+
+def _async_result(value=None, exc=None):
+    result = MagicMock()
+    if exc is not None:
+        result.get.side_effect = exc
+    else:
+        result.get.return_value = value
+    return result
+
+
+class TestReadBatch:
+    """read_batch() fires all requests before gathering any reply."""
+
+    def test_all_requests_sent_before_first_reply(self, client):
+        calls = []
+        client._kazoo.get_async.side_effect = lambda path: calls.append(('get', path)) or _async_result((b'v', None))
+        client._kazoo.get_children_async.side_effect = (
+            lambda path: calls.append(('children', path)) or _async_result(['a'])
+        )
+        client._kazoo.exists_async.side_effect = lambda path: calls.append(('exists', path)) or _async_result(None)
+
+        batch = client.read_batch(get_paths=['x', 'y'], children_paths=['z'], exists_paths=['w'])
+
+        assert [kind for kind, _ in calls] == ['get', 'get', 'children', 'exists']
+        assert batch.data == {'x': 'v', 'y': 'v'}
+        assert batch.children == {'z': ['a']}
+        assert batch.exists == {'w': False}
+
+    def test_absent_nodes(self, client):
+        from kazoo.exceptions import NoNodeError
+        client._kazoo.get_async.return_value = _async_result(exc=NoNodeError('missing'))
+        client._kazoo.get_children_async.return_value = _async_result(exc=NoNodeError('missing'))
+
+        batch = client.read_batch(get_paths=['x'], children_paths=['z'])
+
+        assert batch.data == {'x': None}
+        assert batch.children == {'z': []}
+
+    def test_paths_resolved_with_prefix(self, client):
+        client._kazoo.get_async.return_value = _async_result((None, None))
+        client.read_batch(get_paths=['x'])
+        client._kazoo.get_async.assert_called_once_with('/pgconsul/x')
+
+    def test_session_expired(self, client):
+        from kazoo.exceptions import SessionExpiredError
+        client._kazoo.get_async.return_value = _async_result(exc=SessionExpiredError('expired'))
+        with pytest.raises(ZkSessionExpiredError):
+            client.read_batch(get_paths=['x'])
+
+    def test_timeout(self, client):
+        from kazoo.handlers.threading import KazooTimeoutError
+        client._kazoo.exists_async.return_value = _async_result(exc=KazooTimeoutError('timeout'))
+        with pytest.raises(ZkClientError):
+            client.read_batch(exists_paths=['x'])
+
+
+class TestFirstLockNode:
+    """first_lock_node() orders contenders by sequence like the kazoo lock recipe."""
+
+    def test_orders_by_sequence_not_prefix(self):
+        children = ['bbb__lock__0000000002', 'aaa__lock__0000000003', 'ccc__rlock__0000000001']
+        assert first_lock_node(children) == 'ccc__rlock__0000000001'
+
+    def test_unknown_names_sort_last(self):
+        assert first_lock_node(['lease_holder', 'x__lock__0000000009']) == 'x__lock__0000000009'
+
+    def test_empty(self):
+        assert first_lock_node([]) is None
+
+
 # === Data operations: write ===
 
 class TestWrite:
@@ -704,6 +789,227 @@ class TestLockRecipes:
         client._kazoo.ReadLock.assert_called_once_with('/pgconsul/master', 'host1')
 
 
+# === Data operations: ensure_ephemeral ===
+
+class TestEnsureEphemeral:
+    """ensure_ephemeral() keeps exactly one node owned by the current session."""
+
+    def test_creates_when_absent(self, client):
+        client._kazoo.exists.return_value = None
+        client.ensure_ephemeral('alive/_registry/h1')
+        client._kazoo.create.assert_called_once_with(
+            '/pgconsul/alive/_registry/h1', value=b'', ephemeral=True, makepath=True
+        )
+
+    def test_noop_when_owned_by_session(self, client):
+        stat = MagicMock(ephemeralOwner=42)
+        client._kazoo.exists.return_value = stat
+        client._kazoo.client_id = (42, b'pwd')
+        client.ensure_ephemeral('alive/_registry/h1')
+        client._kazoo.create.assert_not_called()
+        client._kazoo.delete.assert_not_called()
+
+    def test_replaces_node_of_older_session(self, client):
+        stat = MagicMock(ephemeralOwner=41, version=0)
+        client._kazoo.exists.return_value = stat
+        client._kazoo.client_id = (42, b'pwd')
+        client.ensure_ephemeral('alive/_registry/h1')
+        client._kazoo.delete.assert_called_once_with('/pgconsul/alive/_registry/h1', version=0)
+        client._kazoo.create.assert_called_once()
+
+    def test_kazoo_exception(self, client):
+        from kazoo.exceptions import KazooException
+        client._kazoo.exists.side_effect = KazooException('boom')
+        with pytest.raises(ZkClientError):
+            client.ensure_ephemeral('alive/_registry/h1')
+
+
+# === Compact value encoding ===
+
+class TestCompactEncoding:
+    """encode_compact / decode_zk_value: versioned binary values, plain text still readable."""
+
+    def test_roundtrip(self):
+        text = '[{"application_name": "h2", "state": "streaming"}]' * 20
+        encoded = encode_compact(text)
+        assert encoded[:2] == b'\x00\x01'
+        assert len(encoded) < len(text)
+        assert decode_zk_value(encoded) == text
+
+    def test_plain_text_passthrough(self):
+        assert decode_zk_value('[{"a": 1}]'.encode()) == '[{"a": 1}]'
+        assert decode_zk_value(b'') == ''
+
+    def test_unknown_version(self):
+        with pytest.raises(ValueError):
+            decode_zk_value(b'\x00\x7fdata')
+
+    def test_get_decodes_compact_value(self, client):
+        client._kazoo.get.return_value = (encode_compact('{"x": 1}'), _make_stat())
+        assert client.get('replics_info') == '{"x": 1}'
+
+    @pytest.mark.parametrize('raw', [b'\x00\x02data', b'\x00\x01notzlib', b'\xff\xfe'])
+    def test_get_undecodable_value(self, client, raw):
+        client._kazoo.get.return_value = (raw, _make_stat())
+        with pytest.raises(ZkClientError):
+            client.get('replics_info')
+
+    def test_read_batch_undecodable_value(self, client):
+        client._kazoo.get_async.return_value = _async_result((b'\x00\x01notzlib', None))
+        with pytest.raises(ZkClientError):
+            client.read_batch(get_paths=['replics_info'])
+
+    def test_write_passes_bytes_through(self, client):
+        client.write('replics_info', b'\x00\x01raw')
+        client._kazoo.set.assert_called_once_with('/pgconsul/replics_info', b'\x00\x01raw')
+
+
+# === Fenced writes ===
+
+def _transaction(*results):
+    """Mock kazoo transactions committing to the given (fence, write) result pairs in order."""
+    transactions = []
+    for result in results:
+        transaction = MagicMock()
+        transaction.commit.return_value = list(result)
+        transactions.append(transaction)
+    return transactions
+
+
+class TestWriteFenced:
+    """write_fenced() commits check(fence) + set/create in one transaction."""
+
+    def test_set_existing_node(self, client):
+        (tx,) = _transaction((True, MagicMock()))
+        client._kazoo.transaction.return_value = tx
+        assert client.write_fenced('timeline', '5', '/pgconsul/leader/_c_x__lock__0000000001') is True
+        tx.check.assert_called_once_with('/pgconsul/leader/_c_x__lock__0000000001', 0)
+        tx.set_data.assert_called_once_with('/pgconsul/timeline', b'5')
+        tx.create.assert_not_called()
+
+    def test_fence_gone_rejects_write(self, client):
+        from kazoo.exceptions import NoNodeError, RolledBackError
+        (tx,) = _transaction((NoNodeError(), RolledBackError()))
+        client._kazoo.transaction.return_value = tx
+        assert client.write_fenced('timeline', '5', '/pgconsul/leader/n') is False
+
+    def test_creates_missing_node(self, client):
+        from kazoo.exceptions import NoNodeError, RolledBackError
+        set_tx, create_tx = _transaction((RolledBackError(), NoNodeError()), (True, '/pgconsul/a/b'))
+        client._kazoo.transaction.side_effect = [set_tx, create_tx]
+        assert client.write_fenced('a/b', 'x', '/pgconsul/leader/n') is True
+        client._kazoo.ensure_path.assert_called_once_with('/pgconsul/a')
+        create_tx.create.assert_called_once_with('/pgconsul/a/b', b'x')
+
+    def test_create_race_falls_back_to_set(self, client):
+        from kazoo.exceptions import NodeExistsError, NoNodeError, RolledBackError
+        txs = _transaction(
+            (RolledBackError(), NoNodeError()),
+            (RolledBackError(), NodeExistsError()),
+            (True, MagicMock()),
+        )
+        client._kazoo.transaction.side_effect = txs
+        assert client.write_fenced('a/b', 'x', '/pgconsul/leader/n') is True
+        txs[2].set_data.assert_called_once_with('/pgconsul/a/b', b'x')
+
+    def test_session_expired(self, client):
+        from kazoo.exceptions import SessionExpiredError
+        client._kazoo.transaction.return_value.commit.side_effect = SessionExpiredError()
+        with pytest.raises(ZkSessionExpiredError):
+            client.write_fenced('timeline', '5', '/pgconsul/leader/n')
+
+    def test_other_write_error(self, client):
+        from kazoo.exceptions import KazooException, RolledBackError
+        (tx,) = _transaction((RolledBackError(), KazooException('boom')))
+        client._kazoo.transaction.return_value = tx
+        with pytest.raises(ZkClientError):
+            client.write_fenced('timeline', '5', '/pgconsul/leader/n')
+
+
+class TestWriteBatch:
+    """write_batch() writes several nodes in one multi, optionally fenced."""
+
+    def test_all_ops_in_one_transaction(self, client):
+        (tx,) = _transaction((MagicMock(), MagicMock()))
+        client._kazoo.transaction.return_value = tx
+        assert client.write_batch([('a', '1'), ('b', '2')]) is True
+        tx.check.assert_not_called()
+        assert tx.set_data.call_args_list == [
+            (('/pgconsul/a', b'1'),),
+            (('/pgconsul/b', b'2'),),
+        ]
+        tx.commit.assert_called_once()
+
+    def test_creates_only_missing_node(self, client):
+        from kazoo.exceptions import NoNodeError, RolledBackError
+        first, second = _transaction(
+            (True, RolledBackError(), NoNodeError()),
+            (True, MagicMock(), '/pgconsul/x/b'),
+        )
+        client._kazoo.transaction.side_effect = [first, second]
+        assert client.write_batch([('a', '1'), ('x/b', '2')], fence_path='/pgconsul/leader/n') is True
+        second.set_data.assert_called_once_with('/pgconsul/a', b'1')
+        second.create.assert_called_once_with('/pgconsul/x/b', b'2')
+        client._kazoo.ensure_path.assert_called_once_with('/pgconsul/x')
+
+    def test_fence_failure_rejects_whole_batch(self, client):
+        from kazoo.exceptions import BadVersionError, RolledBackError
+        (tx,) = _transaction((BadVersionError(), RolledBackError(), RolledBackError()))
+        client._kazoo.transaction.return_value = tx
+        assert client.write_batch([('a', '1'), ('b', '2')], fence_path='/pgconsul/leader/n') is False
+
+
+# === Watches ===
+
+class TestWatches:
+    """watch_data / watch_children register kazoo watch recipes on resolved paths."""
+
+    def test_watch_data_decodes_value(self, client):
+        seen = []
+        client.watch_data('timeline', seen.append)
+        path, func = client._kazoo.DataWatch.call_args[0]
+        assert path == '/pgconsul/timeline'
+        func(b'5', MagicMock())
+        func(None, None)
+        assert seen == ['5', None]
+
+    def test_watch_data_propagates_stop(self, client):
+        client.watch_data('timeline', lambda value: False)
+        _, func = client._kazoo.DataWatch.call_args[0]
+        assert func(b'5', MagicMock()) is False
+
+    def test_watch_data_undecodable_value(self, client):
+        client.watch_data('timeline', lambda value: None)
+        _, func = client._kazoo.DataWatch.call_args[0]
+        with pytest.raises(ZkClientError):
+            func(b'\x00\x02data', MagicMock())
+
+    def test_watch_data_undecodable_value_reported(self, client):
+        errors, seen = [], []
+        client.watch_data('timeline', seen.append, errors.append)
+        _, func = client._kazoo.DataWatch.call_args[0]
+        assert func(b'\x00\x01notzlib', MagicMock()) is False
+        assert seen == []
+        assert isinstance(errors[0], ZkClientError)
+
+    def test_watch_data_kazoo_exception(self, client):
+        from kazoo.exceptions import KazooException
+        client._kazoo.DataWatch.side_effect = KazooException('boom')
+        with pytest.raises(ZkClientError):
+            client.watch_data('timeline', lambda value: None)
+
+    def test_watch_children(self, client):
+        callback = MagicMock()
+        client.watch_children('all_hosts', callback)
+        client._kazoo.ChildrenWatch.assert_called_once_with('/pgconsul/all_hosts', callback)
+
+    def test_watch_children_kazoo_exception(self, client):
+        from kazoo.exceptions import KazooException
+        client._kazoo.ChildrenWatch.side_effect = KazooException('boom')
+        with pytest.raises(ZkClientError):
+            client.watch_children('all_hosts', MagicMock())
+
+
 # === _create_kazoo_client ===
 
 class TestCreateKazooClient:
@@ -793,3 +1099,162 @@ class TestSleepAndFlags:
         client._session_expired = False
         client._clear_session_expired_flag()
         assert client._session_expired is False
+
+
+class TestHostOrderingByRtt:
+    """zk_prefer_low_rtt: servers are tried in order of measured RTT."""
+
+    def test_parse_hosts_with_chroot_and_default_port(self):
+        assert parse_zk_hosts('zk1:2181,zk2,[::1]:2182/pgconsul') == (
+            [('zk1', 2181), ('zk2', 2181), ('::1', 2182)],
+            '/pgconsul',
+        )
+
+    def test_orders_by_rtt_unreachable_last(self):
+        rtts = {'zk1': None, 'zk2': 0.030, 'zk3': 0.001, 'zk4': None}
+        with patch('src.zk_client.measure_rtt', side_effect=lambda host, port, timeout: rtts[host]):
+            ordered = order_hosts_by_rtt('zk1:2181,zk2:2181,zk3:2181,zk4:2181/chroot', 1.0)
+        assert ordered == 'zk3:2181,zk2:2181,zk1:2181,zk4:2181/chroot'
+
+    def test_single_host_not_probed(self):
+        with patch('src.zk_client.measure_rtt') as measure:
+            assert order_hosts_by_rtt('zk1:2181', 1.0) == 'zk1:2181'
+        measure.assert_not_called()
+
+    def test_kazoo_gets_ordered_hosts_without_randomization(self, cfg):
+        cfg.prefer_low_rtt = True
+        with patch('src.zk_client.KazooClient') as kc_cls, \
+             patch('src.zk_client.SequentialThreadingHandler'), \
+             patch('src.zk_client.order_hosts_by_rtt', return_value='zk2:2181,zk1:2181') as order:
+            ZkClient(cfg)._create_kazoo_client()
+        order.assert_called_once_with('localhost:2181', 1.0)
+        assert kc_cls.call_args.kwargs['hosts'] == 'zk2:2181,zk1:2181'
+        assert kc_cls.call_args.kwargs['randomize_hosts'] is False
+
+    def test_random_order_by_default(self, cfg):
+        with patch('src.zk_client.KazooClient') as kc_cls, \
+             patch('src.zk_client.SequentialThreadingHandler'):
+            ZkClient(cfg)._create_kazoo_client()
+        assert kc_cls.call_args.kwargs['hosts'] == 'localhost:2181'
+        assert 'randomize_hosts' not in kc_cls.call_args.kwargs
+
+    def test_connected_server(self, client):
+        client._kazoo._connection._socket.getpeername.return_value = ('10.0.0.2', 2181)
+        assert client.connected_server() == '10.0.0.2:2181'
+
+    def test_connected_server_unknown(self, client):
+        client._kazoo._connection._socket.getpeername.side_effect = OSError()
+        assert client.connected_server() is None
+
+
+class TestBulkOperations:
+    """plan_create / plan_delete / commit_bulk used by initzk and reset-all."""
+
+    def test_plan_create_returns_missing_nodes_parents_first(self, client):
+        existing = {'/pgconsul', '/pgconsul/all_hosts'}
+        client._kazoo.exists_async.side_effect = lambda path: _async_result(MagicMock() if path in existing else None)
+        creates = client.plan_create(['all_hosts/h1', 'all_hosts/h2/x'])
+        assert creates == ['/pgconsul/all_hosts/h1', '/pgconsul/all_hosts/h2', '/pgconsul/all_hosts/h2/x']
+
+    def test_plan_delete_children_first(self, client):
+        from kazoo.exceptions import NoNodeError
+        tree = {'/pgconsul/alive': ['a', 'b'], '/pgconsul/alive/a': ['x'], '/pgconsul/alive/b': [], '/pgconsul/alive/a/x': []}
+        client._kazoo.get_children_async.side_effect = lambda path: (
+            _async_result(tree[path]) if path in tree else _async_result(exc=NoNodeError())
+        )
+        deletes = client.plan_delete(['alive', 'absent'])
+        assert deletes == ['/pgconsul/alive/a/x', '/pgconsul/alive/b', '/pgconsul/alive/a', '/pgconsul/alive']
+
+    def test_commit_bulk_in_chunks(self, client):
+        transactions = _transaction([True, True], [True])
+        client._kazoo.transaction.side_effect = transactions
+        client.commit_bulk(creates=['/p/c'], deletes=['/p/a', '/p/b'], chunk_size=2)
+        transactions[0].delete.assert_any_call('/p/a')
+        transactions[0].delete.assert_any_call('/p/b')
+        transactions[1].create.assert_called_once_with('/p/c', b'')
+
+    def test_commit_bulk_failed_chunk_raises(self, client):
+        from kazoo.exceptions import NoNodeError, RolledBackError
+        client._kazoo.transaction.side_effect = _transaction([RolledBackError(), NoNodeError()], [True])
+        with pytest.raises(ZkClientError):
+            client.commit_bulk(deletes=['/p/a', '/p/b', '/p/c'], chunk_size=2)
+        assert client._kazoo.transaction.call_count == 1
+
+    def test_commit_bulk_rejects_bad_chunk_size(self, client):
+        with pytest.raises(ValueError):
+            client.commit_bulk(deletes=['/p/a'], chunk_size=0)
+
+
+class TestAdaptiveTimeouts:
+    """zk_adaptive_timeouts: op timeouts derived from the measured RTT."""
+
+    def test_first_sample(self):
+        rtt = RttEstimator(0.5, 10.0)
+        assert rtt.stats() is None
+        assert rtt.timeout() == 10.0
+        rtt.add(0.1)
+        assert rtt.stats() == {'rtt_ms': 100.0, 'rttvar_ms': 50.0, 'timeout': 3.0}
+
+    def test_timeout_clamped(self):
+        rtt = RttEstimator(0.5, 10.0)
+        rtt.add(0.001)
+        assert rtt.timeout() == 0.5
+        for _ in range(20):
+            rtt.add(5.0)
+        assert rtt.timeout() == 10.0
+
+    def test_smoothing(self):
+        rtt = RttEstimator(0.5, 10.0)
+        rtt.add(0.1)
+        rtt.add(0.2)
+        assert rtt.srtt == pytest.approx(0.1125)
+        assert rtt.rttvar == pytest.approx(0.0625)
+
+    def test_static_timeout_by_default(self, client):
+        client._rtt.add(0.001)
+        assert client.op_timeout() == 5.0
+
+    def test_adaptive_timeout(self, client):
+        client.config.adaptive_timeouts = True
+        client._rtt.add(0.001)
+        assert client.op_timeout() == client.config.timeout_min
+
+    def test_requests_are_sampled(self, client):
+        client._kazoo.get.return_value = (b'v', MagicMock())
+        assert client.rtt() is None
+        client.get('a')
+        assert client.rtt_stats() is not None
+        assert client.rtt() == client._rtt.srtt
+
+    def test_failed_requests_are_sampled(self, client):
+        from kazoo.handlers.threading import KazooTimeoutError
+        client._kazoo.exists.side_effect = KazooTimeoutError()
+        with pytest.raises(ZkClientError):
+            client.exists('a')
+        assert client.rtt_stats() is not None
+
+    def test_write_samples_only_the_first_request(self, client):
+        from kazoo.exceptions import NoNodeError
+        client._kazoo.set.side_effect = NoNodeError()
+        with patch.object(client._rtt, 'add') as add:
+            client.write('a', '1')
+        client._kazoo.create.assert_called_once()
+        add.assert_called_once()
+
+    def test_read_batch_not_sampled(self, client):
+        client._kazoo.get_async.return_value = _async_result((b'v', None))
+        client.read_batch(get_paths=['x', 'y'])
+        assert client.rtt() is None
+
+    def test_views_share_the_estimate(self, client):
+        view = client.view('/other/')
+        assert view._rtt is client._rtt
+
+    def test_invalid_bounds_rejected(self):
+        config = MagicMock()
+        config.getboolean.side_effect = lambda section, key: key == 'zk_adaptive_timeouts'
+        config.getfloat.side_effect = lambda section, key: {'zk_timeout_min': 5.0, 'zk_timeout_max': 1.0}.get(key, 5.0)
+        config.getint.return_value = 30
+        config.get.return_value = 'localhost:2181'
+        with pytest.raises(ValueError, match='zk_timeout_min'):
+            create_zk_client(config, path_prefix='/pgconsul/')
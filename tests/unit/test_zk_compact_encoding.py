@@ -0,0 +1,51 @@
+# encoding: utf-8
+"""Tests for zk_compact_encoding: which Zookeeper writes use the compact encoding."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.zk_client import decode_zk_value
+
+REPLICS_INFO = [{'application_name': f'host{i}', 'state': 'streaming', 'sync_state': 'quorum'} for i in range(20)]
+
+
+@pytest.fixture
+def czk(zk):
+    zk.config.compact_encoding = True
+    zk._zk_client = MagicMock()
+    zk._zk_client.write.return_value = True
+    return zk
+
+
+def _written(czk):
+    (_, value), _ = czk._zk_client.write.call_args
+    return value
+
+
+class TestCompactEncoding:
+
+    def test_host_replics_info_compacted(self, czk):
+        czk.write_host_replics_info(REPLICS_INFO, 'h1')
+        value = _written(czk)
+        assert isinstance(value, bytes)
+        assert json.loads(decode_zk_value(value)) == REPLICS_INFO
+
+    def test_host_wal_receiver_compacted(self, czk):
+        czk.write('all_hosts/h1/wal_receiver', REPLICS_INFO, preproc=json.dumps, need_lock=False)
+        assert isinstance(_written(czk), bytes)
+
+    def test_other_keys_stay_text(self, czk):
+        czk.write('all_hosts/h1/prio', 100, need_lock=False)
+        assert _written(czk) == '100'
+
+    def test_small_payload_stays_text(self, czk):
+        czk.write('all_hosts/h1/replics_info', [], preproc=json.dumps, need_lock=False)
+        assert _written(czk) == '[]'
+
+    def test_disabled_by_default(self, zk):
+        zk._zk_client = MagicMock()
+        zk.write('all_hosts/h1/replics_info', REPLICS_INFO, preproc=json.dumps, need_lock=False)
+        (_, value), _ = zk._zk_client.write.call_args
+        assert value == json.dumps(REPLICS_INFO)
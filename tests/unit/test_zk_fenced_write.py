@@ -0,0 +1,86 @@
+# encoding: utf-8
+"""Tests for Zookeeper._write / write_batch: locked writes are fenced by our leader lock node."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.zk import ZkWrite, ZookeeperException
+from src.zk_client import ZkClientError
+
+
+def _holding_lock(zk, node_path='/pgconsul/leader/_c_x__lock__0000000001'):
+    handle = MagicMock()
+    handle.node_path.return_value = node_path
+    zk._locks[zk.PRIMARY_LOCK_PATH] = handle
+    zk._zk_client = MagicMock()
+    zk.get_current_lock_holder = MagicMock()
+    return zk
+
+
+class TestFencedWrite:
+
+    def test_uses_transaction_when_lock_held(self, zk):
+        _holding_lock(zk)
+        zk._zk_client.write_fenced.return_value = True
+        assert zk._write('timeline', '5') is True
+        zk._zk_client.write_fenced.assert_called_once_with('timeline', '5', '/pgconsul/leader/_c_x__lock__0000000001')
+        zk._zk_client.write.assert_not_called()
+        zk.get_current_lock_holder.assert_not_called()
+
+    def test_rejected_fence_returns_false(self, zk):
+        _holding_lock(zk)
+        zk._zk_client.write_fenced.return_value = False
+        assert zk._write('timeline', '5') is False
+
+    def test_falls_back_to_holder_check_without_handle(self, zk):
+        _holding_lock(zk, node_path=None)
+        zk.get_current_lock_holder.return_value = zk._get_lock_contender_name()
+        zk._zk_client.write.return_value = True
+        assert zk._write('timeline', '5') is True
+        zk._zk_client.write_fenced.assert_not_called()
+
+    def test_fallback_rejects_foreign_holder(self, zk):
+        _holding_lock(zk, node_path=None)
+        zk.get_current_lock_holder.return_value = 'other-host'
+        assert zk._write('timeline', '5') is False
+        zk._zk_client.write.assert_not_called()
+
+    def test_unlocked_write_skips_fence(self, zk):
+        _holding_lock(zk)
+        zk._write('timeline', '5', need_lock=False)
+        zk._zk_client.write.assert_called_once_with('timeline', '5')
+        zk._zk_client.write_fenced.assert_not_called()
+
+
+class TestWriteBatch:
+
+    def test_unlocked_ops_not_fenced(self, zk):
+        _holding_lock(zk)
+        zk._zk_client.write_batch.return_value = True
+        assert zk.write_batch([ZkWrite('a', 1, need_lock=False), ZkWrite('b', [1], preproc=str, need_lock=False)]) is True
+        zk._zk_client.write_batch.assert_called_once_with([('a', '1'), ('b', '[1]')], fence_path=None)
+
+    def test_any_locked_op_fences_batch(self, zk):
+        _holding_lock(zk)
+        zk._zk_client.write_batch.return_value = True
+        zk.write_batch([ZkWrite('a', 1, need_lock=False), ZkWrite('timeline', 5)])
+        _, kwargs = zk._zk_client.write_batch.call_args
+        assert kwargs['fence_path'] == '/pgconsul/leader/_c_x__lock__0000000001'
+
+    def test_foreign_holder_rejects_batch_without_handle(self, zk):
+        _holding_lock(zk, node_path=None)
+        zk.get_current_lock_holder.return_value = 'other-host'
+        assert zk.write_batch([ZkWrite('timeline', 5)]) is False
+        zk._zk_client.write_batch.assert_not_called()
+
+    def test_empty_batch(self, zk):
+        _holding_lock(zk)
+        assert zk.write_batch([]) is True
+        zk._zk_client.write_batch.assert_not_called()
+
+    def test_client_error_raises_zookeeper_exception(self, zk):
+        _holding_lock(zk)
+        zk._zk_client.write_batch.side_effect = ZkClientError('boom')
+        with pytest.raises(ZookeeperException):
+            zk.write_batch([ZkWrite('timeline', 5)])
@@ -128,11 +128,11 @@ class TestZookeeperHostMethods:
 
     def test_write_host_replics_info_serializes_json(self, zk):
         """Test write_host_replics_info serializes data as JSON."""
-        zk.noexcept_write = MagicMock(return_value=True)
+        zk.noexcept_write_if_changed = MagicMock(return_value=True)
         replics_info = [{'host': 'replica1', 'lag': 100}]
         result = zk.write_host_replics_info(replics_info, 'test-host')
         assert result is True
-        zk.noexcept_write.assert_called_once_with(
+        zk.noexcept_write_if_changed.assert_called_once_with(
             'all_hosts/test-host/replics_info',
             replics_info,
             preproc=json.dumps,
@@ -141,9 +141,9 @@ class TestZookeeperHostMethods:
 
     def test_write_host_replics_info_need_lock_false(self, zk):
         """Test write_host_replics_info always uses need_lock=False."""
-        zk.noexcept_write = MagicMock(return_value=True)
+        zk.noexcept_write_if_changed = MagicMock(return_value=True)
         zk.write_host_replics_info([], 'test-host')
-        call_kwargs = zk.noexcept_write.call_args[1]
+        call_kwargs = zk.noexcept_write_if_changed.call_args[1]
         assert call_kwargs['need_lock'] is False
 
     # === get_host_replics_info tests ===
@@ -166,11 +166,11 @@ class TestZookeeperHostMethods:
 
     def test_write_host_wal_receiver_serializes_json(self, zk):
         """Test write_host_wal_receiver serializes data as JSON."""
-        zk.noexcept_write = MagicMock(return_value=True)
+        zk.noexcept_write_if_changed = MagicMock(return_value=True)
         wal_info = {'status': 'streaming', 'pid': 12345}
         result = zk.write_host_wal_receiver(wal_info, 'test-host')
         assert result is True
-        zk.noexcept_write.assert_called_once_with(
+        zk.noexcept_write_if_changed.assert_called_once_with(
             'all_hosts/test-host/wal_receiver',
             wal_info,
             preproc=json.dumps,
@@ -179,9 +179,9 @@ class TestZookeeperHostMethods:
 
     def test_write_host_wal_receiver_need_lock_false(self, zk):
         """Test write_host_wal_receiver always uses need_lock=False."""
-        zk.noexcept_write = MagicMock(return_value=True)
+        zk.noexcept_write_if_changed = MagicMock(return_value=True)
         zk.write_host_wal_receiver({}, 'test-host')
-        call_kwargs = zk.noexcept_write.call_args[1]
+        call_kwargs = zk.noexcept_write_if_changed.call_args[1]
         assert call_kwargs['need_lock'] is False
 
     # === get_host_wal_receiver tests ===
@@ -0,0 +1,121 @@
+# encoding: utf-8
+"""Tests for the consolidated per-host record (host_record_schema)."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.zk import HostRecordSchema, ZookeeperException
+from src.zk_client import ZkClientError, ZkReadBatch
+
+
+def _record(**fields):
+    record = {'v': 2, 'ha': True, 'prio': '100', 'replics_info': None, 'wal_receiver': None, 'ssn': None}
+    record.update(fields)
+    return json.dumps(record)
+
+
+@pytest.fixture
+def rzk(zk):
+    zk.config.host_record_schema = HostRecordSchema.V2
+    zk._zk_client = MagicMock()
+    zk._zk_client.is_connected.return_value = True
+    zk._zk_client.write.return_value = True
+    return zk
+
+
+class TestWriteHostRecord:
+
+    def test_v1_does_not_publish(self, zk):
+        zk._zk_client = MagicMock()
+        zk.ensure_host_ha = MagicMock(return_value=True)
+        zk.write_host_stat('h1', {'replics_info': [], 'wal_receiver': {}}, None)
+        written = [c.args[0] for c in zk._zk_client.write.call_args_list]
+        assert 'all_hosts/h1/record' not in written
+
+    @pytest.mark.parametrize('schema', [HostRecordSchema.DUAL, HostRecordSchema.V2])
+    def test_publishes_record_with_own_fields(self, rzk, schema):
+        rzk.config.host_record_schema = schema
+        rzk.ensure_host_ha = MagicMock(return_value=True)
+        rzk._zk_client.get.side_effect = lambda path: {
+            'all_hosts/h1/prio': '100',
+            'all_hosts/h1/synchronous_standby_names/value': 'ANY 1(h2)',
+            'all_hosts/h1/synchronous_standby_names/last_update': '1.5',
+        }.get(path)
+        with patch('src.zk.helpers.get_hostname', return_value='h1'):
+            assert rzk.write_host_stat('h1', {'replics_info': [{'a': 1}], 'wal_receiver': {'s': 'x'}}, None) is True
+        writes = {c.args[0]: c.args[1] for c in rzk._zk_client.write.call_args_list}
+        record = json.loads(writes['all_hosts/h1/record'])
+        assert record == {
+            'v': 2,
+            'ha': True,
+            'prio': '100',
+            'replics_info': [{'a': 1}],
+            'wal_receiver': {'s': 'x'},
+            'ssn': ['ANY 1(h2)', '1.5'],
+        }
+        # Per-field nodes are still written.
+        assert 'all_hosts/h1/replics_info' in writes
+
+    def test_missing_field_keeps_last_value(self, rzk):
+        rzk.ensure_host_ha = MagicMock(return_value=True)
+        rzk.delete_host_ha = MagicMock(return_value=True)
+        rzk._zk_client.get.return_value = None
+        rzk.write_host_stat('h1', {'replics_info': [{'a': 1}], 'wal_receiver': None}, None)
+        rzk.write_host_stat('h1', {'replics_info': None, 'wal_receiver': None}, 'h0')
+        record = json.loads(rzk._zk_client.write.call_args.args[1])
+        assert record['replics_info'] == [{'a': 1}]
+        assert record['ha'] is False
+
+    def test_prio_write_updates_record_field(self, rzk):
+        with patch('src.zk.helpers.get_hostname', return_value='h1'):
+            rzk.write_host_prio(42)
+        assert rzk._own_record['prio'] == '42'
+
+
+class TestReadHostRecords:
+
+    def test_get_host_records_single_batch(self, rzk):
+        rzk._zk_client.read_batch.return_value = ZkReadBatch(data={
+            'all_hosts/h1/record': _record(),
+            'all_hosts/h2/record': None,
+            'all_hosts/h3/record': '{broken',
+        })
+        records = rzk.get_host_records(['h1', 'h2', 'h3'])
+        rzk._zk_client.read_batch.assert_called_once()
+        assert records['h1']['prio'] == '100'
+        assert records['h2'] is None
+        assert records['h3'] is None
+
+    def test_get_host_records_raises(self, rzk):
+        rzk._zk_client.read_batch.side_effect = ZkClientError('boom')
+        with pytest.raises(ZookeeperException):
+            rzk.get_host_records(['h1'])
+
+    def test_ha_hosts_from_records_with_fallback(self, rzk):
+        rzk._zk_client.get_children.return_value = ['h1', 'h2', 'h3']
+        rzk._zk_client.read_batch.return_value = ZkReadBatch(data={
+            'all_hosts/h1/record': _record(ha=True),
+            'all_hosts/h2/record': _record(ha=False),
+            'all_hosts/h3/record': None,
+        })
+        rzk.exists_path = MagicMock(return_value=True)
+        assert rzk.get_ha_hosts() == ['h1', 'h3']
+        rzk.exists_path.assert_called_once_with('all_hosts/h3/ha', catch_except=True)
+
+    def test_ssn_info_from_records(self, rzk):
+        rzk._zk_client.get_children.return_value = ['h1', 'h2']
+        rzk._zk_client.read_batch.return_value = ZkReadBatch(data={
+            'all_hosts/h1/record': _record(ssn=['ANY 1(h2)', '1.5']),
+            'all_hosts/h2/record': None,
+        })
+        rzk._zk_client.get.side_effect = lambda path: {'all_hosts/h2/synchronous_standby_names/value': ''}.get(path)
+        assert rzk._get_ssn_info() == {'h1': ('ANY 1(h2)', '1.5'), 'h2': ('', None)}
+
+    def test_v1_reads_per_field_nodes(self, zk):
+        zk._zk_client = MagicMock()
+        zk._zk_client.get_children.return_value = ['h1']
+        zk.exists_path = MagicMock(return_value=True)
+        assert zk.get_ha_hosts() == ['h1']
+        zk._zk_client.read_batch.assert_not_called()
@@ -0,0 +1,171 @@
+# encoding: utf-8
+"""Tests for the iteration-scoped read memo of Zookeeper (zk_read_memo_max_age)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.zk_client import ZkConnectionState, ZkNoNodeError, ZkReadBatch
+from src.zk_memo import ZkReadMemo
+
+
+@pytest.fixture
+def mzk(zk):
+    """zk with a connected mocked client and a 5 s memo age (from the zk fixture config)."""
+    zk._zk_client = MagicMock()
+    zk._zk_client.is_connected.return_value = True
+    zk._zk_client.write.return_value = True
+    zk._zk_client.delete.return_value = True
+    zk._zk_client.get.return_value = 'v'
+    zk._zk_client.get_children.return_value = ['h1', 'h2']
+    zk._zk_client.exists.return_value = True
+    return zk
+
+
+class TestZkReadMemo:
+
+    def test_closed_memo_never_hits(self):
+        memo = ZkReadMemo(5.0)
+        memo.store('get', 'a', 'v')
+        assert memo.lookup('get', 'a') == (False, None)
+
+    def test_disabled_with_zero_age(self):
+        memo = ZkReadMemo(0.0)
+        memo.open()
+        assert not memo.is_open()
+
+    def test_hit_and_miss_counters(self):
+        memo = ZkReadMemo(5.0)
+        memo.open()
+        assert memo.lookup('get', 'a') == (False, None)
+        memo.store('get', 'a', 'v')
+        assert memo.lookup('get', 'a') == (True, 'v')
+        assert memo.close() == (1, 1)
+
+    def test_entry_expires(self):
+        memo = ZkReadMemo(0.5)
+        memo.open()
+        with patch('src.zk_memo.time.monotonic', side_effect=[100.0, 100.4, 100.6]):
+            memo.store('get', 'a', 'v')
+            assert memo.lookup('get', 'a') == (True, 'v')
+            assert memo.lookup('get', 'a') == (False, None)
+
+    def test_returned_lists_are_copies(self):
+        memo = ZkReadMemo(5.0)
+        memo.open()
+        memo.store('children', 'a', ['x'])
+        memo.lookup('children', 'a')[1].append('y')
+        assert memo.lookup('children', 'a') == (True, ['x'])
+
+    def test_invalidate_path_subtree_and_ancestor_listings(self):
+        memo = ZkReadMemo(5.0)
+        memo.open()
+        for kind, path in [
+            ('get', 'all_hosts/h1/prio'),
+            ('get', 'all_hosts/h1'),
+            ('children', 'all_hosts/h1/prio/x'),
+            ('children', 'all_hosts'),
+            ('exists', 'all_hosts/h1'),
+            ('get', 'all_hosts/h2/prio'),
+            ('get', 'all_hosts'),
+        ]:
+            memo.store(kind, path, 'v')
+        memo.invalidate('all_hosts/h1/prio')
+        assert memo.lookup('get', 'all_hosts/h1/prio')[0] is False
+        assert memo.lookup('children', 'all_hosts/h1/prio/x')[0] is False
+        assert memo.lookup('children', 'all_hosts')[0] is False
+        assert memo.lookup('exists', 'all_hosts/h1')[0] is False
+        assert memo.lookup('get', 'all_hosts/h1')[0] is True
+        assert memo.lookup('get', 'all_hosts/h2/prio')[0] is True
+        assert memo.lookup('get', 'all_hosts')[0] is True
+
+
+class TestZookeeperReadMemo:
+
+    def test_reads_outside_iteration_not_memoized(self, mzk):
+        mzk.get('a')
+        mzk.get('a')
+        assert mzk._zk_client.get.call_count == 2
+
+    def test_duplicate_reads_within_iteration(self, mzk):
+        mzk.begin_iteration()
+        assert mzk.get('a') == 'v'
+        assert mzk.get('a') == 'v'
+        assert mzk.get_children('all_hosts') == ['h1', 'h2']
+        assert mzk.get_children('all_hosts') == ['h1', 'h2']
+        assert mzk.exists_path('x') is True
+        assert mzk.exists_path('x') is True
+        assert mzk._zk_client.get.call_count == 1
+        assert mzk._zk_client.get_children.call_count == 1
+        assert mzk._zk_client.exists.call_count == 1
+        assert mzk.read_memo_stats() == {'hits': 3, 'misses': 3}
+        assert mzk.end_iteration() == (3, 3)
+
+    def test_absent_node_memoized(self, mzk):
+        mzk._zk_client.get.side_effect = ZkNoNodeError('nope')
+        mzk.begin_iteration()
+        assert mzk.get('a') is None
+        assert mzk.get('a') is None
+        assert mzk._zk_client.get.call_count == 1
+
+    def test_prefixed_and_relative_paths_share_entry(self, mzk):
+        mzk.begin_iteration()
+        mzk.get_children('/pgconsul/all_hosts')
+        mzk.get_children('all_hosts')
+        assert mzk._zk_client.get_children.call_count == 1
+
+    def test_new_iteration_rereads(self, mzk):
+        mzk.begin_iteration()
+        mzk.get('a')
+        mzk.end_iteration()
+        mzk.begin_iteration()
+        mzk.get('a')
+        assert mzk._zk_client.get.call_count == 2
+
+    def test_local_write_invalidates(self, mzk):
+        mzk.begin_iteration()
+        mzk.get('a')
+        mzk.write('a', 'w', need_lock=False)
+        mzk._zk_client.get.return_value = 'w'
+        assert mzk.get('a') == 'w'
+
+    def test_delete_invalidates_subtree_and_listing(self, mzk):
+        mzk.begin_iteration()
+        mzk.get('all_hosts/h1/prio')
+        mzk.get_children('all_hosts')
+        mzk.delete('all_hosts/h1', recursive=True)
+        mzk.get('all_hosts/h1/prio')
+        mzk.get_children('all_hosts')
+        assert mzk._zk_client.get.call_count == 2
+        assert mzk._zk_client.get_children.call_count == 2
+
+    def test_connection_change_clears(self, mzk):
+        mzk.begin_iteration()
+        mzk.get('a')
+        mzk._listener(ZkConnectionState.SUSPENDED)
+        mzk.get('a')
+        assert mzk._zk_client.get.call_count == 2
+
+    def test_lock_holder_memoized_until_release(self, mzk):
+        lock = MagicMock()
+        lock.contenders.return_value = ['me']
+        mzk._locks = {mzk.PRIMARY_LOCK_PATH: lock}
+        mzk.begin_iteration()
+        assert mzk.get_current_lock_holder() == 'me'
+        assert mzk.get_current_lock_holder() == 'me'
+        assert lock.contenders.call_count == 1
+        mzk.release_lock()
+        mzk._locks = {mzk.PRIMARY_LOCK_PATH: lock}
+        lock.contenders.return_value = []
+        assert mzk.get_current_lock_holder() is None
+
+    def test_snapshot_seeds_memo(self, mzk):
+        mzk.begin_iteration()
+        batch = ZkReadBatch(data={'a': 'v'}, children={'all_hosts': ['h1']}, exists={'x': False})
+        mzk._seed_memo(batch)
+        assert mzk.get('a') == 'v'
+        assert mzk.get_children('all_hosts') == ['h1']
+        assert mzk.exists_path('x') is False
+        mzk._zk_client.get.assert_not_called()
+        mzk._zk_client.get_children.assert_not_called()
+        mzk._zk_client.exists.assert_not_called()
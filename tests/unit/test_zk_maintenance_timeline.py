@@ -206,11 +206,11 @@ class TestZookeeperReplicsInfo:
 
     def test_write_replics_info_serializes_json(self, zk):
         """Test write_replics_info serializes data as JSON."""
-        zk.write = MagicMock(return_value=True)
+        zk.write_if_changed = MagicMock(return_value=True)
         replics_info = [{'host': 'replica1', 'lag': 100}]
         result = zk.write_replics_info(replics_info)
         assert result is True
-        zk.write.assert_called_once_with('replics_info', replics_info, preproc=json.dumps)
+        zk.write_if_changed.assert_called_once_with('replics_info', replics_info, preproc=json.dumps)
 
     def test_write_replics_info_failure_returns_false(self, zk):
         """Test write_replics_info returns False on exception."""
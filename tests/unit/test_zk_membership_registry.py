@@ -0,0 +1,152 @@
+# encoding: utf-8
+"""
+Tests for alive / quorum membership publication modes (membership_registry).
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.zk import MembershipRegistry, ZookeeperException
+
+
+def _with_mode(zk, mode):
+    zk.config.membership_registry = mode
+    return zk
+
+
+def _children(mapping):
+    return MagicMock(side_effect=lambda path, catch_except=True: mapping.get(path, []))
+
+
+class TestGetAliveHosts:
+
+    def test_lock_mode_checks_every_host(self, zk):
+        _with_mode(zk, MembershipRegistry.LOCK)
+        zk.get_ha_hosts = MagicMock(return_value=['h1', 'h2'])
+        zk.get_children = MagicMock(side_effect=AssertionError('registry read in lock mode'))
+        zk.get_current_lock_holder = MagicMock(side_effect=lambda path, catch_except=True: 'h1' if path == 'alive/h1' else None)
+        with patch('src.zk.helpers.await_for', side_effect=lambda event, timeout, name: event()):
+            assert zk.get_alive_hosts() == ['h1']
+
+    def test_registry_mode_single_listing(self, zk):
+        _with_mode(zk, MembershipRegistry.REGISTRY)
+        zk.get_ha_hosts = MagicMock(return_value=['h1', 'h2', 'h3'])
+        zk.get_children = _children({zk.ALIVE_REGISTRY_PATH: ['h3', 'h1', 'gone']})
+        zk.get_current_lock_holder = MagicMock(side_effect=AssertionError('lock read in registry mode'))
+        assert zk.get_alive_hosts() == ['h1', 'h3']
+        zk.get_children.assert_called_once()
+
+    def test_compat_mode_falls_back_to_lock_for_unregistered(self, zk):
+        _with_mode(zk, MembershipRegistry.COMPAT)
+        zk.get_ha_hosts = MagicMock(return_value=['h1', 'h2', 'h3'])
+        zk.get_children = _children({zk.ALIVE_REGISTRY_PATH: ['h1']})
+        zk.get_current_lock_holder = MagicMock(side_effect=lambda path, catch_except=True: 'h2' if path == 'alive/h2' else None)
+        with patch('src.zk.helpers.await_for', side_effect=lambda event, timeout, name: event()):
+            assert zk.get_alive_hosts() == ['h1', 'h2']
+        checked = [call.args[0] for call in zk.get_current_lock_holder.call_args_list]
+        assert checked == ['alive/h2', 'alive/h3']
+
+
+class TestGetSyncQuorumHosts:
+
+    def test_registry_mode(self, zk):
+        _with_mode(zk, MembershipRegistry.REGISTRY)
+        zk.get_children = _children({zk.MEMBERS_PATH: ['h1', 'h2'], zk.QUORUM_REGISTRY_PATH: ['h2']})
+        zk.get_current_lock_holder = MagicMock(side_effect=AssertionError('lock read in registry mode'))
+        assert zk.get_sync_quorum_hosts() == ['h2']
+
+    def test_compat_mode(self, zk):
+        _with_mode(zk, MembershipRegistry.COMPAT)
+        zk.get_children = _children({zk.MEMBERS_PATH: ['h1', 'h2', 'h3'], zk.QUORUM_REGISTRY_PATH: ['h2']})
+        zk.get_current_lock_holder = MagicMock(side_effect=lambda path: 'h1' if path == 'quorum/members/h1' else None)
+        assert zk.get_sync_quorum_hosts() == ['h1', 'h2']
+
+    def test_lock_mode(self, zk):
+        _with_mode(zk, MembershipRegistry.LOCK)
+        zk.get_children = _children({zk.MEMBERS_PATH: ['h1', 'h2']})
+        zk.get_current_lock_holder = MagicMock(side_effect=lambda path: 'h2' if path == 'quorum/members/h2' else None)
+        assert zk.get_sync_quorum_hosts() == ['h2']
+
+
+class TestIsHostAlive:
+
+    def test_registry_mode_uses_exists(self, zk):
+        _with_mode(zk, MembershipRegistry.REGISTRY)
+        zk.exists_path = MagicMock(return_value=True)
+        zk.get_current_lock_holder = MagicMock(side_effect=AssertionError('lock read in registry mode'))
+        assert zk.is_host_alive('h1', timeout=1) is True
+        zk.exists_path.assert_called_once_with('alive/_registry/h1', catch_except=True)
+
+    def test_compat_mode_falls_back_to_lock(self, zk):
+        _with_mode(zk, MembershipRegistry.COMPAT)
+        zk.exists_path = MagicMock(return_value=False)
+        zk.get_current_lock_holder = MagicMock(return_value='h1')
+        assert zk.is_host_alive('h1', timeout=1) is True
+
+
+class TestRegistration:
+
+    @pytest.fixture(autouse=True)
+    def _hostname(self):
+        with patch('src.zk.helpers.get_hostname', return_value='me'):
+            yield
+
+    def test_register_alive_registry_mode(self, zk):
+        _with_mode(zk, MembershipRegistry.REGISTRY)
+        zk._zk_client.ensure_ephemeral = MagicMock()
+        zk.try_acquire_lock = MagicMock(side_effect=AssertionError('lock taken in registry mode'))
+        assert zk.register_alive() is True
+        zk._zk_client.ensure_ephemeral.assert_called_once_with('alive/_registry/me')
+
+    def test_register_alive_compat_mode_publishes_both(self, zk):
+        _with_mode(zk, MembershipRegistry.COMPAT)
+        zk._zk_client.ensure_ephemeral = MagicMock()
+        zk.get_current_lock_holder = MagicMock(return_value=None)
+        zk.try_acquire_lock = MagicMock(return_value=True)
+        assert zk.register_alive() is True
+        zk.try_acquire_lock.assert_called_once_with('alive/me')
+
+    def test_register_alive_lock_mode_skips_when_held(self, zk):
+        _with_mode(zk, MembershipRegistry.LOCK)
+        zk._zk_client.ensure_ephemeral = MagicMock(side_effect=AssertionError('registry used in lock mode'))
+        zk.get_current_lock_holder = MagicMock(return_value='me')
+        zk.try_acquire_lock = MagicMock()
+        assert zk.register_alive() is True
+        zk.try_acquire_lock.assert_not_called()
+
+    def test_unregister_alive_compat(self, zk):
+        _with_mode(zk, MembershipRegistry.COMPAT)
+        zk.delete = MagicMock(return_value=True)
+        zk.release_lock = MagicMock()
+        zk.unregister_alive()
+        zk.delete.assert_called_once_with('alive/_registry/me')
+        zk.release_lock.assert_called_once_with('alive/me')
+
+    def test_register_quorum_member_failure_raises(self, zk):
+        from src.zk_client import ZkClientError
+        _with_mode(zk, MembershipRegistry.REGISTRY)
+        zk._zk_client.ensure_ephemeral = MagicMock(side_effect=ZkClientError('boom'))
+        with pytest.raises(ZookeeperException):
+            zk.register_quorum_member()
+
+    def test_register_quorum_member_lock_mode(self, zk):
+        _with_mode(zk, MembershipRegistry.LOCK)
+        zk.acquire_lock = MagicMock()
+        zk.register_quorum_member()
+        zk.acquire_lock.assert_called_once_with('quorum/members/me')
+
+    def test_unregister_quorum_member_registry_mode(self, zk):
+        _with_mode(zk, MembershipRegistry.REGISTRY)
+        zk.delete = MagicMock(return_value=True)
+        zk.release_if_hold = MagicMock()
+        zk.unregister_quorum_member()
+        zk.delete.assert_called_once_with('quorum/members/_registry/me')
+        zk.release_if_hold.assert_not_called()
+
+
+class TestMembershipRegistryConfig:
+
+    def test_invalid_value_rejected(self):
+        with pytest.raises(ValueError):
+            MembershipRegistry('sometimes')
@@ -0,0 +1,133 @@
+# encoding: utf-8
+"""Tests for the ZK op priority scheduler (zk_telemetry_budget / zk_telemetry_max_latency)."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.zk_scheduler import ZkOpPriority, ZkOpScheduler
+
+
+@pytest.fixture
+def szk(zk):
+    """zk with a connected mocked client; the zk fixture config gives a budget of 10 and a 5 s latency limit."""
+    zk._zk_client = MagicMock()
+    zk._zk_client.is_connected.return_value = True
+    zk._zk_client.write.return_value = True
+    zk._zk_client.get.return_value = None
+    return zk
+
+
+def _written_paths(zk):
+    return [c.args[0] for c in zk._zk_client.write.call_args_list]
+
+
+class TestZkOpScheduler:
+
+    def test_disabled_runs_writes_immediately(self):
+        scheduler = ZkOpScheduler(0, 0.0, lambda: None)
+        scheduler.open()
+        write = MagicMock(return_value=False)
+        assert scheduler.submit('a', write) is False
+        write.assert_called_once_with()
+
+    def test_deferred_until_flush_newest_value_wins(self):
+        scheduler = ZkOpScheduler(10, 0.0, lambda: None)
+        scheduler.open()
+        first, second = MagicMock(return_value=True), MagicMock(return_value=True)
+        assert scheduler.submit('a', first) is True
+        scheduler.submit('a', second)
+        second.assert_not_called()
+        scheduler.flush()
+        first.assert_not_called()
+        second.assert_called_once_with()
+        assert scheduler.written == 1
+
+    def test_budget_drops_the_rest(self):
+        scheduler = ZkOpScheduler(2, 0.0, lambda: None)
+        scheduler.open()
+        writes = [MagicMock(return_value=True) for _ in range(3)]
+        for i, write in enumerate(writes):
+            scheduler.submit(str(i), write)
+        scheduler.flush()
+        assert [w.call_count for w in writes] == [1, 1, 0]
+        assert (scheduler.written, scheduler.dropped) == (2, 1)
+
+    def test_high_latency_drops_telemetry(self):
+        scheduler = ZkOpScheduler(0, 0.5, lambda: 2.0)
+        scheduler.open()
+        write = MagicMock(return_value=True)
+        scheduler.submit('a', write)
+        scheduler.flush()
+        write.assert_not_called()
+        assert scheduler.dropped == 1
+
+    def test_latency_read_from_client_estimate(self):
+        latency = MagicMock(return_value=0.4)
+        scheduler = ZkOpScheduler(0, 0.5, latency)
+        assert scheduler.latency() == 0.4
+        assert not scheduler.is_overloaded()
+        latency.return_value = None
+        assert not scheduler.is_overloaded()
+        scheduler.observe(ZkOpPriority.STATE)
+        assert scheduler.ops[ZkOpPriority.STATE] == 1
+
+
+class TestZookeeperScheduling:
+
+    @pytest.mark.parametrize('key, priority', [
+        ('leader', ZkOpPriority.CRITICAL),
+        ('/pgconsul/switchover/state', ZkOpPriority.CRITICAL),
+        ('election_vote/h1/lsn', ZkOpPriority.CRITICAL),
+        ('all_hosts/h1/replics_info', ZkOpPriority.STATE),
+        ('all_hosts/h1/wal_receiver', ZkOpPriority.STATE),
+        ('all_hosts/h1/synchronous_standby_names/value', ZkOpPriority.TELEMETRY),
+        ('cluster_summary', ZkOpPriority.TELEMETRY),
+        ('all_hosts/h1/ha', ZkOpPriority.STATE),
+        ('timing/downtime', ZkOpPriority.STATE),
+        ('leadership', ZkOpPriority.STATE),
+    ])
+    def test_op_priority(self, szk, key, priority):
+        assert szk.op_priority(key) == priority
+
+    def test_telemetry_deferred_to_end_of_iteration(self, szk, monkeypatch):
+        monkeypatch.setattr('src.zk.helpers.get_hostname', lambda: 'h1')
+        szk.begin_iteration()
+        assert szk.write_ssn_on_changes('ANY 1(h2)') is True
+        szk.write('all_hosts/h1/prio', 100, need_lock=False)
+        assert _written_paths(szk) == ['all_hosts/h1/prio']
+        szk.end_iteration()
+        assert 'all_hosts/h1/synchronous_standby_names/value' in _written_paths(szk)
+
+    def test_telemetry_written_immediately_outside_iteration(self, szk, monkeypatch):
+        monkeypatch.setattr('src.zk.helpers.get_hostname', lambda: 'h1')
+        assert szk.write_ssn_on_changes('ANY 1(h2)') is True
+        assert 'all_hosts/h1/synchronous_standby_names/value' in _written_paths(szk)
+
+    def test_cluster_summary_deferred(self, szk, monkeypatch):
+        monkeypatch.setattr('src.zk.helpers.get_hostname', lambda: 'h1')
+        szk.config.cluster_summary = True
+        szk._zk_client.get.return_value = '[]'
+        szk.begin_iteration()
+        assert szk.write_cluster_summary({'timeline': 3}, {}) is True
+        assert 'cluster_summary' not in _written_paths(szk)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(szk, 'write', lambda path, value, **kwargs: szk._zk_client.write(path, value))
+            szk.end_iteration()
+        assert 'cluster_summary' in _written_paths(szk)
+
+    def test_replication_state_never_deferred(self, szk):
+        # Read by other hosts for cascade and catch-up decisions.
+        szk.begin_iteration()
+        assert szk.write_host_replics_info([{'a': 1}], 'h1') is True
+        assert szk.write_host_wal_receiver({'a': 1}, 'h1') is True
+        assert _written_paths(szk) == ['all_hosts/h1/replics_info', 'all_hosts/h1/wal_receiver']
+
+    def test_ops_counted_by_priority(self, szk):
+        szk.begin_iteration()
+        szk.write('failover_state', 'finished', need_lock=False)
+        szk.get('all_hosts/h1/ha')
+        assert szk._scheduler.ops[ZkOpPriority.CRITICAL] == 1
+        assert szk._scheduler.ops[ZkOpPriority.STATE] == 1
+        szk._zk_client.rtt.return_value = 0.002
+        assert szk.zk_latency() == 0.002
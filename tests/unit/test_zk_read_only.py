@@ -0,0 +1,122 @@
+# encoding: utf-8
+"""Tests for read-only ZK mode during ensemble quorum loss (zk_read_only_mode)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.zk import ZookeeperException
+from src.zk_client import ZkClient, ZkClientConfig, ZkClientError, ZkReadOnlyError
+
+
+@pytest.fixture
+def ro_client():
+    """ZkClient with read_only enabled, connected to a read-only server."""
+    from kazoo.client import KazooState, KeeperState
+    config = ZkClientConfig(
+        hosts='zk1:2181', timeout=5.0, connect_max_delay=10.0, max_delay_on_reinit=30, path_prefix='/pgconsul/', read_only=True
+    )
+    client = ZkClient(config)
+    client._kazoo = MagicMock(state=KazooState.CONNECTED, client_state=KeeperState.CONNECTED_RO)
+    return client
+
+
+def _not_read_only():
+    from kazoo.exceptions import NotReadOnlyCallError
+    return NotReadOnlyCallError()
+
+
+class TestZkClientReadOnly:
+
+    def test_kazoo_read_only_flag(self, ro_client):
+        with patch('src.zk_client.KazooClient') as kc_cls, patch('src.zk_client.SequentialThreadingHandler'):
+            ro_client._create_kazoo_client()
+        assert kc_cls.call_args.kwargs['read_only'] is True
+
+    def test_not_passed_by_default(self):
+        config = ZkClientConfig(hosts='zk1:2181', timeout=5.0, connect_max_delay=10.0, max_delay_on_reinit=30, path_prefix='/p/')
+        with patch('src.zk_client.KazooClient') as kc_cls, patch('src.zk_client.SequentialThreadingHandler'):
+            ZkClient(config)._create_kazoo_client()
+        assert 'read_only' not in kc_cls.call_args.kwargs
+
+    def test_is_read_only(self, ro_client):
+        from kazoo.client import KeeperState
+        assert ro_client.is_read_only() is True
+        ro_client._kazoo.client_state = KeeperState.CONNECTED
+        assert ro_client.is_read_only() is False
+
+    def test_reads_work(self, ro_client):
+        ro_client._kazoo.get.return_value = (b'v', MagicMock())
+        assert ro_client.get('leader') == 'v'
+
+    @pytest.mark.parametrize('call', [
+        lambda client: client.write('a', 'v'),
+        lambda client: client.delete('a'),
+        lambda client: client.ensure_path('a'),
+    ])
+    def test_refused_writes_raise_read_only_error(self, ro_client, call):
+        ro_client._kazoo.set.side_effect = _not_read_only()
+        ro_client._kazoo.delete.side_effect = _not_read_only()
+        ro_client._kazoo.ensure_path.side_effect = _not_read_only()
+        with pytest.raises(ZkReadOnlyError):
+            call(ro_client)
+
+    def test_read_only_error_is_client_error(self):
+        assert issubclass(ZkReadOnlyError, ZkClientError)
+
+    def test_listener_warns_on_read_only_server(self, ro_client, caplog):
+        from kazoo.client import KazooState
+        ro_client._listener(KazooState.CONNECTED)
+        assert any('read-only ZK server' in r.message for r in caplog.records)
+
+
+class TestZookeeperReadOnly:
+
+    def test_write_refused_as_zookeeper_exception(self, zk):
+        zk._zk_client = MagicMock()
+        zk._zk_client.write.side_effect = ZkReadOnlyError('ro')
+        with pytest.raises(ZookeeperException):
+            zk.write('a', 'v', need_lock=False)
+
+    def test_lock_not_acquired(self, zk):
+        zk._zk_client = MagicMock()
+        lock = MagicMock()
+        lock.contenders.return_value = []
+        lock.acquire.side_effect = ZkReadOnlyError('ro')
+        zk._locks = {'remaster': lock}
+        assert zk.try_acquire_lock('remaster') is False
+
+
+def _instance(role_maintenance=False):
+    from src.main import Pgconsul
+    inst = Pgconsul.__new__(Pgconsul)
+    inst.zk = MagicMock()
+    inst.db = MagicMock()
+    inst._maintenance = MagicMock(is_in_maintenance=role_maintenance)
+    inst._is_single_node = False
+    inst._replication_manager = MagicMock()
+    return inst
+
+
+class TestReadOnlyIteration:
+
+    def test_primary_closes_without_reconnect(self):
+        inst = _instance()
+        inst._replication_manager.should_close.return_value = True
+        inst.read_only_iter('primary', {})
+        inst.db.pgpooler.assert_called_once_with('stop')
+        inst.db.stop_archiving_wal.assert_called_once_with()
+        inst.zk.reconnect.assert_not_called()
+        inst.zk.get_current_lock_holder.assert_not_called()
+
+    def test_replica_keeps_serving_under_detached_rule(self):
+        inst = _instance()
+        with patch.object(inst, 'handle_detached_replica') as detached:
+            inst.read_only_iter('replica', {'wal_receiver': None})
+        detached.assert_called_once_with({'wal_receiver': None})
+        inst.zk.write.assert_not_called()
+
+    def test_nothing_in_maintenance(self):
+        inst = _instance(role_maintenance=True)
+        inst.read_only_iter('primary', {})
+        inst.db.pgpooler.assert_not_called()
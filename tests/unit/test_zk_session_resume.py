@@ -0,0 +1,186 @@
+# encoding: utf-8
+"""Tests for ZK session resumption across daemon restarts (zk_session_resume)."""
+
+import os
+import stat
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.zk_client import LockHandle, ZkClient, ZkClientConfig, load_zk_session, save_zk_session
+
+HOSTS = 'zk1:2181,zk2:2181'
+SESSION_ID = 0x1234
+PASSWORD = b'\x00\x01secret'
+
+
+@pytest.fixture
+def session_file(tmp_path):
+    return str(tmp_path / '.pgconsul_zk_session')
+
+
+@pytest.fixture
+def make_client(session_file):
+    """Build a ZkClient whose KazooClient constructor is mocked and reports client_id."""
+    def _make(client_id=(SESSION_ID, PASSWORD), connected=True):
+        config = ZkClientConfig(
+            hosts=HOSTS,
+            timeout=5.0,
+            connect_max_delay=10.0,
+            max_delay_on_reinit=30,
+            path_prefix='/pgconsul/',
+            session_file=session_file,
+        )
+        kazoo = MagicMock(connected=connected, client_id=client_id)
+        with patch('src.zk_client.SequentialThreadingHandler'), \
+             patch('src.zk_client.KazooClient', return_value=kazoo) as kazoo_cls:
+            client = ZkClient(config)
+            result = client.init()
+        return client, kazoo_cls, result
+    return _make
+
+
+class TestSessionFile:
+
+    def test_roundtrip(self, session_file):
+        save_zk_session(session_file, HOSTS, (SESSION_ID, PASSWORD))
+        assert load_zk_session(session_file, HOSTS) == (SESSION_ID, PASSWORD)
+
+    def test_owner_only_permissions(self, session_file):
+        save_zk_session(session_file, HOSTS, (SESSION_ID, PASSWORD))
+        assert stat.S_IMODE(os.stat(session_file).st_mode) == 0o600
+
+    def test_missing_file(self, session_file):
+        assert load_zk_session(session_file, HOSTS) is None
+
+    def test_other_hosts_ignored(self, session_file):
+        save_zk_session(session_file, 'other:2181', (SESSION_ID, PASSWORD))
+        assert load_zk_session(session_file, HOSTS) is None
+
+    def test_garbage_ignored(self, session_file):
+        with open(session_file, 'w') as fobj:
+            fobj.write('not json')
+        assert load_zk_session(session_file, HOSTS) is None
+
+
+class TestResume:
+
+    def test_first_start_saves_session(self, make_client, session_file):
+        client, kazoo_cls, connected = make_client()
+        assert connected is True
+        assert 'client_id' not in kazoo_cls.call_args.kwargs
+        assert client.resumed_session() is False
+        assert load_zk_session(session_file, HOSTS) == (SESSION_ID, PASSWORD)
+
+    def test_restart_offers_saved_session(self, make_client, session_file):
+        save_zk_session(session_file, HOSTS, (SESSION_ID, PASSWORD))
+        client, kazoo_cls, _ = make_client()
+        assert kazoo_cls.call_args.kwargs['client_id'] == (SESSION_ID, PASSWORD)
+        assert client.resumed_session() is True
+
+    def test_expired_session_replaced(self, make_client, session_file):
+        save_zk_session(session_file, HOSTS, (SESSION_ID, PASSWORD))
+        client, _, _ = make_client(client_id=(0x5678, b'new'))
+        assert client.resumed_session() is False
+        assert load_zk_session(session_file, HOSTS) == (0x5678, b'new')
+
+    def test_saved_session_offered_only_once(self, make_client, session_file):
+        save_zk_session(session_file, HOSTS, (SESSION_ID, PASSWORD))
+        client, _, _ = make_client()
+        with patch('src.zk_client.SequentialThreadingHandler'), \
+             patch('src.zk_client.KazooClient') as kazoo_cls:
+            kazoo_cls.return_value.client_id = (SESSION_ID, PASSWORD)
+            client.init()
+        assert 'client_id' not in kazoo_cls.call_args.kwargs
+
+    def test_session_replaced_by_kazoo_is_saved(self, make_client, session_file):
+        from kazoo.client import KazooState
+        client, _, _ = make_client()
+        client._kazoo.client_id = (0x9999, b'p')
+        client._listener(KazooState.CONNECTED)
+        assert load_zk_session(session_file, HOSTS) == (0x9999, b'p')
+        assert client.resumed_session() is False
+
+    def test_no_session_file_configured(self):
+        config = ZkClientConfig(hosts=HOSTS, timeout=5.0, connect_max_delay=10.0, max_delay_on_reinit=30, path_prefix='/pgconsul/')
+        with patch('src.zk_client.SequentialThreadingHandler'), \
+             patch('src.zk_client.KazooClient') as kazoo_cls:
+            ZkClient(config).init()
+        assert 'client_id' not in kazoo_cls.call_args.kwargs
+
+
+def _kazoo_lock(children, nodes):
+    lock = MagicMock(path='/pgconsul/leader', data=b'host1', node=None, is_acquired=False, _NODE_NAME='__lock__')
+    lock.client.get_children.return_value = children
+    lock.client.get.side_effect = lambda path: nodes[path.rsplit('/', 1)[1]]
+    return lock
+
+
+class TestLockAdoption:
+
+    def test_adopts_own_node(self):
+        lock = _kazoo_lock(
+            ['aaa__lock__0000000002'],
+            {'aaa__lock__0000000002': (b'host1', SimpleNamespace(ephemeralOwner=SESSION_ID))},
+        )
+        handle = LockHandle(lock)
+        assert handle.adopt(SESSION_ID) is True
+        assert lock.is_acquired is True
+        assert lock.prefix == 'aaa__lock__'
+        assert handle.node_path() == '/pgconsul/leader/aaa__lock__0000000002'
+
+    def test_ignores_nodes_of_other_sessions(self):
+        lock = _kazoo_lock(
+            ['aaa__lock__0000000002'],
+            {'aaa__lock__0000000002': (b'host1', SimpleNamespace(ephemeralOwner=0x9999))},
+        )
+        assert LockHandle(lock).adopt(SESSION_ID) is False
+        assert lock.is_acquired is False
+
+    def test_ignores_other_identifiers(self):
+        lock = _kazoo_lock(
+            ['aaa__lock__0000000002'],
+            {'aaa__lock__0000000002': (b'host2', SimpleNamespace(ephemeralOwner=SESSION_ID))},
+        )
+        assert LockHandle(lock).adopt(SESSION_ID) is False
+
+    def test_make_lock_adopts_in_resumed_session(self, make_client, session_file):
+        save_zk_session(session_file, HOSTS, (SESSION_ID, PASSWORD))
+        client, _, _ = make_client()
+        with patch.object(LockHandle, 'adopt') as adopt:
+            client.make_lock('/pgconsul/leader', 'host1')
+        adopt.assert_called_once_with(SESSION_ID)
+
+    def test_make_lock_does_not_adopt_in_new_session(self, make_client):
+        client, _, _ = make_client()
+        with patch.object(LockHandle, 'adopt') as adopt:
+            client.make_lock('/pgconsul/leader', 'host1')
+        adopt.assert_not_called()
+
+    def test_queued_node_not_adopted(self):
+        lock = _kazoo_lock(
+            ['bbb__lock__0000000001', 'aaa__lock__0000000002'],
+            {
+                'bbb__lock__0000000001': (b'host2', SimpleNamespace(ephemeralOwner=0x9999)),
+                'aaa__lock__0000000002': (b'host1', SimpleNamespace(ephemeralOwner=SESSION_ID)),
+            },
+        )
+        assert LockHandle(lock).adopt(SESSION_ID) is False
+        assert lock.is_acquired is False
+        assert lock.node is None
+
+    def test_read_lock_adopted_behind_readers_only(self):
+        children = ['bbb__rlock__0000000001', 'aaa__rlock__0000000002']
+        nodes = {
+            'bbb__rlock__0000000001': (b'host2', SimpleNamespace(ephemeralOwner=0x9999)),
+            'aaa__rlock__0000000002': (b'host1', SimpleNamespace(ephemeralOwner=SESSION_ID)),
+        }
+        lock = _kazoo_lock(children, nodes)
+        lock._NODE_NAME = '__rlock__'
+        assert LockHandle(lock).adopt(SESSION_ID) is True
+
+        nodes['ccc__lock__0000000000'] = (b'host3', SimpleNamespace(ephemeralOwner=0x9999))
+        lock = _kazoo_lock(['ccc__lock__0000000000'] + children, nodes)
+        lock._NODE_NAME = '__rlock__'
+        assert LockHandle(lock).adopt(SESSION_ID) is False
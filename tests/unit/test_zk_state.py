@@ -44,3 +44,101 @@ class TestGetState:
         zk.is_alive = MagicMock(return_value=False)
         with pytest.raises(ZookeeperException):
             zk.get_state()
+
+
+class TestGetStateSnapshot:
+    """Snapshot mode reads the state with two pipelined batches."""
+
+    def _batch(self, data=None, children=None, exists=None):
+        from src.zk_client import ZkReadBatch
+        return ZkReadBatch(data=data or {}, children=children or {}, exists=exists or {})
+
+    def _first_batch(self, zk, **overrides):
+        values = {
+            zk.REPLICS_INFO_PATH: '[{"application_name": "h2"}]',
+            zk.LAST_FAILOVER_TIME_PATH: '1.5',
+            zk.LAST_SWITCHOVER_TIME_PATH: None,
+            zk.FAILOVER_STATE_PATH: 'finished',
+            zk.CURRENT_PROMOTING_HOST: None,
+            zk.TIMELINE_INFO_PATH: '7',
+            zk.SWITCHOVER_PRIMARY_PATH: None,
+            zk.SWITCHOVER_CANDIDATE: None,
+            zk.SWITCHOVER_SIDE_REPLICAS: 'not json',
+            zk.SWITCHOVER_STATE_PATH: None,
+            zk.MAINTENANCE_PATH: 'disable',
+            zk.MAINTENANCE_TIME_PATH: None,
+            zk.LAST_PRIMARY_PATH: 'h1',
+        }
+        values.update(overrides)
+        return self._batch(
+            data=values,
+            children={
+                zk._lockpath: ['b__lock__0000000002', 'a__lock__0000000001'],
+                zk.MEMBERS_PATH: ['h1'],
+            },
+            exists={zk.FAILOVER_MUST_BE_RESET: False, zk.SINGLE_NODE_PATH: True},
+        )
+
+    def _make_snapshot_zk(self, zk, first, second):
+        zk.config.state_snapshot = True
+        zk.is_alive = MagicMock(return_value=True)
+        zk._zk_client.read_batch = MagicMock(side_effect=[first, second])
+        zk.get = MagicMock(side_effect=AssertionError('sequential get in snapshot mode'))
+        return zk
+
+    def test_snapshot_state(self, zk):
+        holder_path = f'{zk._lockpath}/a__lock__0000000001'
+        second = self._batch(data={
+            'all_hosts/h1/synchronous_standby_names/value': 'ANY 1(h2)',
+            'all_hosts/h1/synchronous_standby_names/last_update': '100.0',
+            holder_path: 'h1',
+        })
+        self._make_snapshot_zk(zk, self._first_batch(zk), second)
+
+        state = zk.get_state()
+
+        assert zk._zk_client.read_batch.call_count == 2
+        assert state[zk.REPLICS_INFO_PATH] == [{'application_name': 'h2'}]
+        assert state[zk.LAST_FAILOVER_TIME_PATH] == 1.5
+        assert state[zk.TIMELINE_INFO_PATH] == 7
+        assert state[zk.SWITCHOVER_SIDE_REPLICAS] is None
+        assert state[zk.MAINTENANCE_PATH] == {'status': 'disable', 'ts': None}
+        assert state['lock_holder'] == 'h1'
+        assert state['lock_version'] == '0000000001'
+        assert state['single_node'] is True
+        assert state['synchronous_standby_names'] == {'h1': ('ANY 1(h2)', '100.0')}
+
+    def test_snapshot_reads_ssn_from_host_records(self, zk):
+        from src.zk import HostRecordSchema
+        zk.config.host_record_schema = HostRecordSchema.V2
+        holder_path = f'{zk._lockpath}/a__lock__0000000001'
+        second = self._batch(data={
+            'all_hosts/h1/record': '{"v": 2, "ha": true, "ssn": ["ANY 1(h2)", "100.0"]}',
+            holder_path: 'h1',
+        })
+        self._make_snapshot_zk(zk, self._first_batch(zk), second)
+
+        state = zk.get_state()
+
+        second_paths = list(zk._zk_client.read_batch.call_args_list[1].kwargs['get_paths'])
+        assert second_paths == ['all_hosts/h1/record', holder_path]
+        assert state['synchronous_standby_names'] == {'h1': ('ANY 1(h2)', '100.0')}
+
+    def test_snapshot_falls_back_when_holder_node_vanished(self, zk):
+        second = self._batch(data={
+            'all_hosts/h1/synchronous_standby_names/value': None,
+            'all_hosts/h1/synchronous_standby_names/last_update': None,
+        })
+        self._make_snapshot_zk(zk, self._first_batch(zk), second)
+        zk.get_current_lock_holder = MagicMock(return_value='h2')
+
+        assert zk.get_state()['lock_holder'] == 'h2'
+
+    def test_snapshot_translates_client_errors(self, zk):
+        from src.zk import ZookeeperException
+        from src.zk_client import ZkClientError
+        zk.config.state_snapshot = True
+        zk.is_alive = MagicMock(return_value=True)
+        zk._zk_client.read_batch = MagicMock(side_effect=ZkClientError('boom'))
+        with pytest.raises(ZookeeperException):
+            zk.get_state()
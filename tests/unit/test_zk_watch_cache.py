@@ -0,0 +1,172 @@
+# encoding: utf-8
+"""
+Unit tests for ZkWatchCache and its integration into Zookeeper (zk_watch_cache).
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.zk_cache import ZkWatchCache
+from src.zk_client import ZkClientError, ZkConnectionState
+
+
+class FakeWatchClient:
+    """Records watch callbacks and fires them synchronously like kazoo does on registration."""
+
+    def __init__(self, values=None, children=None):
+        self.values = values or {}
+        self.children = children or {}
+        self.data_callbacks = {}
+        self.children_callbacks = {}
+        self.error_callbacks = {}
+
+    def watch_data(self, path, callback, on_error=None):
+        self.data_callbacks.setdefault(path, []).append(callback)
+        self.error_callbacks[path] = on_error
+        callback(self.values.get(path))
+
+    def watch_children(self, path, callback):
+        self.children_callbacks.setdefault(path, []).append(callback)
+        if path in self.children:
+            callback(self.children[path])
+
+    def fire_data(self, path, value):
+        self.values[path] = value
+        return [cb(value) for cb in self.data_callbacks.get(path, [])]
+
+    def fire_children(self, path, children):
+        self.children[path] = children
+        return [cb(children) for cb in self.children_callbacks.get(path, [])]
+
+
+@pytest.fixture
+def client():
+    return FakeWatchClient(values={'timeline': '3'}, children={'all_hosts': ['h1', 'h2']})
+
+
+@pytest.fixture
+def cache(client):
+    return ZkWatchCache(client, data_paths=('timeline', 'maintenance'), children_paths=('all_hosts',))
+
+
+class TestZkWatchCache:
+
+    def test_lookup_arms_lazily(self, cache, client):
+        assert not cache.is_armed()
+        assert cache.lookup('timeline') == (True, '3')
+        assert cache.is_armed()
+        assert cache.lookup('maintenance') == (True, None)
+
+    def test_untracked_path_misses(self, cache):
+        assert cache.lookup('failover_state') == (False, None)
+
+    def test_watch_event_updates_value(self, cache, client):
+        cache.lookup('timeline')
+        client.fire_data('timeline', '4')
+        assert cache.lookup('timeline') == (True, '4')
+
+    def test_children(self, cache, client):
+        assert cache.lookup_children('all_hosts') == (True, ['h1', 'h2'])
+        client.fire_children('all_hosts', ['h1'])
+        assert cache.lookup_children('all_hosts') == (True, ['h1'])
+
+    def test_children_parent_deleted_rearms(self, cache, client):
+        cache.lookup_children('all_hosts')
+        del client.children['all_hosts']
+        client.fire_data('all_hosts', None)
+        assert cache.lookup_children('all_hosts') == (False, [])
+        client.children['all_hosts'] = ['h3']
+        assert cache.lookup_children('all_hosts') == (True, ['h3'])
+
+    def test_disarm_stops_old_watches(self, cache, client):
+        cache.lookup('timeline')
+        cache.disarm()
+        assert client.fire_data('timeline', '5') == [False]
+        # Re-armed on the next lookup with a fresh generation.
+        assert cache.lookup('timeline') == (True, '5')
+
+    def test_undecodable_value_disarms(self, cache, client):
+        assert cache.lookup('timeline') == (True, '3')
+        client.error_callbacks['timeline'](ZkClientError('cannot decode'))
+        assert not cache.is_armed()
+        assert 'timeline' not in cache._values
+
+    def test_arm_failure_falls_back(self, client):
+        client.watch_data = MagicMock(side_effect=ZkClientError('boom'))
+        cache = ZkWatchCache(client, data_paths=('timeline',))
+        assert cache.lookup('timeline') == (False, None)
+        assert not cache.is_armed()
+
+    def test_update_write_through(self, cache):
+        cache.lookup('timeline')
+        cache.update('timeline', '9')
+        assert cache.lookup('timeline') == (True, '9')
+
+    def test_update_ignored_when_not_armed(self, cache, client):
+        cache.update('timeline', '9')
+        assert cache.lookup('timeline') == (True, '3')
+
+    def test_delete_subtree(self, client):
+        cache = ZkWatchCache(client, data_paths=('maintenance', 'maintenance/ts'))
+        client.values.update({'maintenance': 'enable', 'maintenance/ts': '1'})
+        cache.lookup('maintenance')
+        cache.delete_subtree('maintenance')
+        assert cache.lookup('maintenance') == (True, None)
+        assert cache.lookup('maintenance/ts') == (True, None)
+
+
+class TestZookeeperWatchCache:
+    """Zookeeper serves tracked nodes from the cache and keeps it coherent."""
+
+    def _enable_cache(self, zk, client):
+        zk._cache = ZkWatchCache(
+            client,
+            data_paths=zk.WATCH_CACHE_DATA_PATHS,
+            children_paths=zk.WATCH_CACHE_CHILDREN_PATHS,
+        )
+        zk._zk_client.is_connected = MagicMock(return_value=True)
+        zk._zk_client.get = MagicMock(side_effect=AssertionError('cached path read from ZK'))
+        return zk
+
+    def test_get_served_from_cache(self, zk, client):
+        self._enable_cache(zk, client)
+        assert zk.get_timeline() == 3
+
+    def test_get_children_served_from_cache(self, zk, client):
+        self._enable_cache(zk, client)
+        zk._zk_client.get_children = MagicMock(side_effect=AssertionError('cached path read from ZK'))
+        assert zk.get_members() == ['h1', 'h2']
+
+    def test_untracked_path_reads_zk(self, zk, client):
+        self._enable_cache(zk, client)
+        zk._zk_client.get = MagicMock(return_value='finished')
+        assert zk.get_failover_state() == 'finished'
+
+    def test_disconnected_reads_zk(self, zk, client):
+        self._enable_cache(zk, client)
+        zk._zk_client.is_connected = MagicMock(return_value=False)
+        zk._zk_client.get = MagicMock(return_value='8')
+        assert zk.get_timeline() == 8
+
+    def test_write_through(self, zk, client):
+        self._enable_cache(zk, client)
+        zk._zk_client.write = MagicMock(return_value=True)
+        zk.get_timeline()
+        assert zk.write_switchover_state('scheduled')
+        assert zk.get_switchover_state() == 'scheduled'
+
+    def test_delete_through(self, zk, client):
+        self._enable_cache(zk, client)
+        zk._zk_client.delete = MagicMock(return_value=True)
+        client.values[zk.MAINTENANCE_PATH] = 'enable'
+        assert zk.get_maintenance_status() == 'enable'
+        zk.delete_maintenance()
+        assert zk.get_maintenance_status() is None
+
+    @pytest.mark.parametrize('state', list(ZkConnectionState))
+    def test_connection_transition_disarms(self, zk, client, state):
+        self._enable_cache(zk, client)
+        zk.get_timeline()
+        zk._listener(state)
+        assert not zk._cache.is_armed()
@@ -0,0 +1,85 @@
+# encoding: utf-8
+"""Tests for Zookeeper.write_if_changed: unchanged payloads are not rewritten."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def szk(zk):
+    """zk with a connected mocked client and a 5 s refresh interval (from the zk fixture config)."""
+    zk._zk_client = MagicMock()
+    zk._zk_client.is_connected.return_value = True
+    zk._zk_client.write.return_value = True
+    return zk
+
+
+class TestWriteIfChanged:
+
+    def test_second_identical_write_skipped(self, szk):
+        assert szk.write_if_changed('a', {'x': 1}, preproc=json.dumps, need_lock=False) is True
+        assert szk.write_if_changed('a', {'x': 1}, preproc=json.dumps, need_lock=False) is True
+        szk._zk_client.write.assert_called_once_with('a', '{"x": 1}')
+
+    def test_changed_payload_written(self, szk):
+        szk.write_if_changed('a', 1, need_lock=False)
+        szk.write_if_changed('a', 2, need_lock=False)
+        assert szk._zk_client.write.call_count == 2
+
+    def test_forced_refresh_after_interval(self, szk):
+        with patch('src.zk.time.monotonic', side_effect=[100.0, 104.0, 106.0]):
+            szk.write_if_changed('a', 1, need_lock=False)
+            szk.write_if_changed('a', 1, need_lock=False)
+            szk.write_if_changed('a', 1, need_lock=False)
+        assert szk._zk_client.write.call_count == 2
+
+    def test_failed_write_not_remembered(self, szk):
+        szk._zk_client.write.return_value = False
+        szk.write_if_changed('a', 1, need_lock=False)
+        szk._zk_client.write.return_value = True
+        szk.write_if_changed('a', 1, need_lock=False)
+        assert szk._zk_client.write.call_count == 2
+
+    def test_not_skipped_while_disconnected(self, szk):
+        szk.write_if_changed('a', 1, need_lock=False)
+        szk._zk_client.is_connected.return_value = False
+        szk.write_if_changed('a', 1, need_lock=False)
+        assert szk._zk_client.write.call_count == 2
+
+    def test_connection_transition_forgets_digests(self, szk):
+        from src.zk_client import ZkConnectionState
+        szk.write_if_changed('a', 1, need_lock=False)
+        szk._listener(ZkConnectionState.SUSPENDED)
+        szk.write_if_changed('a', 1, need_lock=False)
+        assert szk._zk_client.write.call_count == 2
+
+    def test_delete_forgets_subtree_digests(self, szk):
+        szk.write_if_changed('all_hosts/h1/prio', 1, need_lock=False)
+        szk.delete('all_hosts/h1', recursive=True)
+        szk.write_if_changed('all_hosts/h1/prio', 1, need_lock=False)
+        assert szk._zk_client.write.call_count == 2
+
+    def test_new_lock_node_forces_locked_write(self, szk):
+        handle = MagicMock()
+        handle.node_path.return_value = '/pgconsul/leader/n1'
+        szk._locks[szk.PRIMARY_LOCK_PATH] = handle
+        szk._zk_client.write_fenced.return_value = True
+        szk.write_if_changed('replics_info', [], preproc=json.dumps)
+        szk.write_if_changed('replics_info', [], preproc=json.dumps)
+        handle.node_path.return_value = '/pgconsul/leader/n2'
+        szk.write_if_changed('replics_info', [], preproc=json.dumps)
+        assert szk._zk_client.write_fenced.call_count == 2
+
+    def test_zero_interval_disables_suppression(self, szk):
+        szk.config.write_refresh_interval = 0
+        szk.write_if_changed('a', 1, need_lock=False)
+        szk.write_if_changed('a', 1, need_lock=False)
+        assert szk._zk_client.write.call_count == 2
+
+    def test_quorum_always_written(self, szk):
+        # Other hosts write the quorum too: a matching local digest proves nothing.
+        szk.write_quorum(['h1'])
+        szk.write_quorum(['h1'])
+        assert szk._zk_client.write.call_count == 2